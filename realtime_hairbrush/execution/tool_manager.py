@@ -146,6 +146,27 @@ class ToolManager:
         self.logical_position = {'x': 0.0, 'y': 0.0, 'z': 0.0}
         self.soft_limits_disabled = False
         self._synced_from_observed_once: bool = False
+        # Latest observed XY, kept current by a state subscription
+        self._observed_xy: Optional[tuple] = None
+        self._on_observed_coords(None)
+        self._unsubscribe_coords = self.state.subscribe(("raw_status.raw.coords", "raw_status.raw.position"), self._on_observed_coords)
+
+    def close(self) -> None:
+        """Stop following the observed position; call before discarding the manager."""
+        if self._unsubscribe_coords:
+            self._unsubscribe_coords()
+            self._unsubscribe_coords = None
+
+    def _on_observed_coords(self, changes: Optional[Dict]) -> None:
+        raw = self.state.get("raw_status.raw", {}) or {}
+        # Prefer userPosition when available
+        coords = (raw.get("coords", {}) or {})
+        pos = coords.get("userPosition") or coords.get("machine") or coords.get("xyz") or raw.get("position")
+        if isinstance(pos, (list, tuple)) and len(pos) >= 2:
+            try:
+                self._observed_xy = (float(pos[0]), float(pos[1]))
+            except (TypeError, ValueError):
+                pass
         
     def switch_tool(self, tool: Union[Tool, str, int], wait: bool = True) -> None:
         """
@@ -165,17 +186,13 @@ class ToolManager:
         # Synchronize logical position from observed state before computing moves
         if not self._synced_from_observed_once:
             try:
-                snap = self.state.snapshot().get("observed", {})
-                raw = (snap.get("raw_status", {}) or {}).get("raw", {})
-                # Prefer userPosition when available
-                coords = (raw.get("coords", {}) or {})
-                pos = coords.get("userPosition") or coords.get("machine") or coords.get("xyz") or raw.get("position")
-                if isinstance(pos, (list, tuple)) and len(pos) >= 2:
+                if self._observed_xy is not None:
+                    x, y = self._observed_xy
                     cur_offset = self.tool_offsets[self.current_tool or Tool.BRUSH_A]
                     # logical = user - current_internal_offset
-                    self.logical_position['x'] = float(pos[0]) - cur_offset.x
-                    self.logical_position['y'] = float(pos[1]) - cur_offset.y
-                    _log_note(f"TOOL one-time sync logical from observed: user=({pos[0]},{pos[1]}) cur_offset=({cur_offset.x},{cur_offset.y}) -> logical=({self.logical_position['x']},{self.logical_position['y']})")
+                    self.logical_position['x'] = x - cur_offset.x
+                    self.logical_position['y'] = y - cur_offset.y
+                    _log_note(f"TOOL one-time sync logical from observed: user=({x},{y}) cur_offset=({cur_offset.x},{cur_offset.y}) -> logical=({self.logical_position['x']},{self.logical_position['y']})")
             except Exception:
                 # Best-effort; ignore sync errors
                 pass
@@ -5,11 +5,14 @@ machine state management. All G-code execution should flow through Dispatcher.
 """
 
 from .events import RuntimeEvent, SentEvent, ReceivedEvent, AckEvent, ErrorEvent, StateUpdatedEvent
-from .queue import InstructionQueue
+from .queue import InstructionQueue, InstructionGroup
 from .dispatcher import Dispatcher
 from .state import MachineState
+from .interpreter import ModalInterpreter
+from .telemetry import TelemetryBuffer, TelemetrySeries
+from .motion import PositionEstimator
 from .object_model_agent import ObjectModelAgent
 
 # Expose new sequencer API
 from .sequencer import RequestSequencer
-from .sequencer import Request, Result, Priority, RequestKind 
\ No newline at end of file
+from .sequencer import Request, Result, Priority, RequestKind, CommandGroup 
\ No newline at end of file
@@ -1,31 +1,51 @@
+import asyncio
 import threading
 import time
 import uuid
-from typing import Callable, List, Optional
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Deque, Dict, Iterable, List, Optional
 
 from semantic_gcode.gcode.base import GCodeInstruction
 from semantic_gcode.gcode.mixins import BlocksExecution, ExpectsAcknowledgement
 
-from .events import SentEvent, ReceivedEvent, AckEvent, ErrorEvent
-from .queue import InstructionQueue
+from .events import SentEvent, ReceivedEvent, AckEvent, ErrorEvent, EmergencyStopEvent
+from .queue import InstructionQueue, InstructionGroup
+from .flow import FlowControl
+from .motion import PositionEstimator
 from ..transport.airbrush_transport import AirbrushTransport
 from .state import MachineState
 
 # New imports for sequencer integration
 from .sequencer import RequestSequencer
-from .sequencer import Request, Result, Priority, RequestKind
+from .sequencer import Request, Result, Priority, RequestKind, CommandGroup
 
 
 class Dispatcher:
-    def __init__(self, transport: AirbrushTransport, state: MachineState) -> None:
+    # Commands that wait for queued motion, a dwell, heaters or a macro to finish
+    _WAIT_COMMANDS = frozenset({"M400", "M116", "G4", "M98", "M109", "M190", "M191"})
+
+    def __init__(self, transport: AirbrushTransport, state: MachineState, max_queued: int = 1024,
+                 max_in_flight: int = 32) -> None:
         self.transport = transport
         self.state = state
-        self.queue = InstructionQueue()
+        # Bounded so an enqueue storm blocks its producer instead of growing without limit
+        self.queue = InstructionQueue(maxsize=max_queued)
+        self.flow = FlowControl(max_in_flight=max_in_flight, planner_capacity=self._planner_capacity)
         self._listeners: List[Callable] = []
         self._stop = threading.Event()
         self._worker: Optional[threading.Thread] = None
         # Single-threaded request sequencer; it is the sole I/O owner
         self.sequencer = RequestSequencer(transport=self.transport, on_event=self._emit)
+        # Futures from submit() per queued instruction object, in queue order
+        self._futures: Dict[int, Deque[Future]] = {}
+        self._futures_lock = threading.Lock()
+        # Predicted time the motion submitted so far finishes; extends wait timeouts
+        self._motion_done_at = 0.0
+        # Held while handing work to the sequencer, and by emergency_stop() while it cancels
+        self._submit_lock = threading.Lock()
+        # Optional dead-reckoning of the live position from the commanded moves
+        self.estimator: Optional[PositionEstimator] = None
 
     def on_event(self, callback: Callable) -> None:
         self._listeners.append(callback)
@@ -38,26 +58,152 @@ class Dispatcher:
                 pass
 
     def enqueue(self, instruction: GCodeInstruction) -> None:
+        self.submit(instruction)
+
+    def submit(self, instruction: GCodeInstruction) -> "Future[Result]":
+        """
+        Queue an instruction for execution.
+
+        Blocks while the instruction queue is full (see FlowControl).
+
+        Returns:
+            Future[Result]: Resolves with the instruction's Result once the
+            sequencer has run it (for acknowledged commands, once acknowledged)
+        """
+        fut: "Future[Result]" = Future()
+        with self._futures_lock:
+            self._futures.setdefault(id(instruction), deque()).append(fut)
         self.queue.put(instruction)
+        return fut
+
+    def submit_group(self, instructions: Iterable[GCodeInstruction], batch: bool = True) -> List["Future[Result]"]:
+        """
+        Queue instructions to run as one contiguous unit, e.g. a stroke.
+
+        The sequencer sends the group's instructions in order with nothing in
+        between: status polling is paused while the group runs and resumes
+        straight after it. With ``batch`` set, runs of instructions that neither
+        block (M400) nor run long (G28, T, M98) are streamed in one write. If an
+        instruction fails, the rest of the group is not sent.
+
+        Returns:
+            List[Future[Result]]: One future per instruction, in order
+        """
+        group = InstructionGroup(instructions, batch=batch)
+        futures: List["Future[Result]"] = [Future() for _ in group.instructions]
+        with self._futures_lock:
+            for instr, fut in zip(group.instructions, futures):
+                self._futures.setdefault(id(instr), deque()).append(fut)
+        self.queue.put(group)
+        return futures
+
+    def submit_async(self, instruction: GCodeInstruction) -> "asyncio.Future[Result]":
+        """Queue an instruction and return an awaitable for its Result (call from a running loop)."""
+        return asyncio.wrap_future(self.submit(instruction))
+
+    def wait_all(self, futures: Iterable["Future[Result]"], timeout: Optional[float] = None) -> List[Result]:
+        """Wait for a batch of submitted instructions; see RequestSequencer.wait_all."""
+        return self.sequencer.wait_all(futures, timeout=timeout)
+
+    def emergency_stop(self, line: str = "M112") -> Result:
+        """
+        Stop the machine now, ahead of all queued and in-flight work.
+
+        Queued work is cancelled first: the sequencer's queue is cleared and its
+        epoch bumped, and every instruction not yet handed to the sequencer is
+        taken out of the dispatcher, so nothing can be sent after the stop. The
+        stop line is then written from the calling thread straight to the
+        transport, bypassing the instruction queue, the sequencer and the I/O
+        lock, and an acknowledgement wait in progress is released by the
+        transport.
+
+        Returns:
+            Result: ok if the line was written; latency_s is the time from the
+            call to the line being on the wire
+        """
+        start = time.time()
+        reason = "cancelled: emergency stop"
+        stopper = getattr(self.transport, "emergency_stop", None)
+        with self._submit_lock:
+            cancelled = self.sequencer.cancel_pending(reason)
+            self.queue.drain()
+            # Instructions the worker has already taken but not submitted lose their
+            # futures here, which tells the worker to drop them
+            with self._futures_lock:
+                pending, self._futures = self._futures, {}
+            try:
+                ok = stopper(line) if callable(stopper) else self.transport.send_line(line)
+                error = None if ok else (getattr(self.transport, "_last_error", None) or "emergency stop not sent")
+            except Exception as e:
+                ok, error = False, str(e)
+        res = Result(ok=bool(ok), error=error, started_at_s=start, finished_at_s=time.time())
+
+        for futures in pending.values():
+            for fut in futures:
+                _resolve(fut, Result(ok=False, error=reason, finished_at_s=time.time()))
+                cancelled += 1
+        self._emit(EmergencyStopEvent(line=line, ok=res.ok, latency_s=res.latency_s, cancelled=cancelled))
+        return res
+
+    def _planner_capacity(self) -> Optional[int]:
+        capacity = self.state.get("planner.gcode_length")
+        return capacity if isinstance(capacity, int) else None
+
+    def _take_future(self, instruction: GCodeInstruction) -> Optional[Future]:
+        with self._futures_lock:
+            pending = self._futures.get(id(instruction))
+            if not pending:
+                return None
+            fut = pending.popleft()
+            if not pending:
+                del self._futures[id(instruction)]
+            return fut
 
     def start(self) -> None:
         if self._worker and self._worker.is_alive():
             return
         self._stop.clear()
+        self.flow.start()
         self.sequencer.start()
         self._worker = threading.Thread(target=self._run_loop, daemon=True)
         self._worker.start()
 
     def stop(self) -> None:
         self._stop.set()
+        self.queue.wake()
+        self.flow.stop()
         try:
             self.sequencer.stop()
         except Exception:
             pass
         if self._worker:
             self._worker.join(timeout=1.0)
+        # Instructions still queued will not run; release anyone waiting on them
+        with self._futures_lock:
+            pending, self._futures = self._futures, {}
+        for futures in pending.values():
+            for fut in futures:
+                _resolve(fut, Result(ok=False, error="dispatcher stopped", finished_at_s=time.time()))
 
-    def _to_request(self, instr: GCodeInstruction) -> Request:
+    def _predict(self, instr: GCodeInstruction) -> float:
+        # Apply an instruction to the predictive state; returns its predicted motion time
+        motion_s = 0.0
+        try:
+            motion_s = self.state.apply_predictive(instr)
+        except Exception as e:
+            self._emit(ErrorEvent(message=f"apply failed: {e}", context={"instruction": str(instr)}))
+        if self.estimator is not None:
+            code = (getattr(instr, "code_type", None), getattr(instr, "code_number", None))
+            if code in (("G", 0), ("G", 1)):
+                position = self.state.get("position", {}, tree="predictive") or {}
+                feed = self.state.get("feedrate", tree="predictive")
+                self.estimator.plan([position.get(a) for a in ("x", "y", "z")], feed)
+            elif code[0] == "T" or (code[0] == "G" and code[1] in (10, 28, 92, 54, 55, 56, 57, 58, 59)):
+                # Homing, offset, workplace and tool changes move the frame the estimator cannot follow
+                self.estimator.invalidate()
+        return motion_s
+
+    def _to_request(self, instr: GCodeInstruction, motion_s: float = 0.0) -> Request:
         line = str(instr)
         # Infer behavior
         needs_ack = isinstance(instr, ExpectsAcknowledgement) or isinstance(instr, BlocksExecution)
@@ -65,13 +211,27 @@ class Dispatcher:
         upper = line.strip().upper()
         if upper.startswith("G28") or upper.startswith("T") or upper.startswith("M98"):
             side_effects.add("LongRunning")
+        if isinstance(instr, BlocksExecution):
+            side_effects.add("Blocking")
         # Priority: ensure motion and tool-select are not reordered behind M400
         if upper.startswith("G0") or upper.startswith("G1") or upper.startswith("T"):
             priority = Priority.HIGH
         else:
             priority = Priority.HIGH if needs_ack else Priority.MEDIUM
         # Timeout heuristics
-        timeout_s = 30.0 if ("LongRunning" in side_effects) else max(5.0, float(getattr(self.transport.config, "timeout", 10.0)))
+        # The blanket timeouts apply until the sequencer has seen enough of this command
+        # class; then a high percentile of its latency plus the move's predicted duration.
+        # Either way the predicted motion still queued ahead is added: with the planner
+        # full, even a short move is only acknowledged once that motion has drained
+        default_s = 30.0 if ("LongRunning" in side_effects) else max(5.0, float(getattr(self.transport.config, "timeout", 10.0)))
+        now = time.time()
+        ahead_s = max(0.0, self._motion_done_at - now)
+        self._motion_done_at = max(self._motion_done_at, now) + motion_s
+        if isinstance(instr, BlocksExecution) or self.sequencer.command_class(line) in self._WAIT_COMMANDS:
+            # Past latencies of a wait say nothing about how long this one lasts
+            timeout_s = default_s + ahead_s + motion_s
+        else:
+            timeout_s = self.sequencer.timeout_for(line, default_s, extra_s=motion_s + ahead_s)
 
         def on_complete(res: Result) -> None:
             if needs_ack:
@@ -89,17 +249,69 @@ class Dispatcher:
 
     def _run_loop(self) -> None:
         while not self._stop.is_set():
-            try:
-                instr = self.queue.get(timeout=0.1)
-            except Exception:
+            # Blocks until an instruction arrives or stop() wakes the queue
+            instr = self.queue.get()
+            if instr is None:
                 continue
+            # Wait until the firmware side has room; stop() releases the wait
+            if not self.flow.acquire():
+                continue
+            with self._submit_lock:
+                if isinstance(instr, InstructionGroup):
+                    self._run_group(instr)
+                    continue
+                fut = self._take_future(instr)
+                if fut is None:
+                    # Cancelled by emergency_stop() after it left the queue
+                    self.flow.release()
+                    continue
+
+                motion_s = self._predict(instr)
+
+                # Create a Request and submit to the sequencer
+                req = self._to_request(instr, motion_s)
+                done = self.sequencer.submit(req)
+            done.add_done_callback(lambda f: self.flow.release())
+            done.add_done_callback(lambda f, fut=fut: _resolve(fut, f.result()))
+
+    def _run_group(self, group: InstructionGroup) -> None:
+        # Caller holds _submit_lock
+        futures: List[Optional[Future]] = [self._take_future(instr) for instr in group.instructions]
+        if group.instructions and all(fut is None for fut in futures):
+            # Cancelled by emergency_stop() after it left the queue
+            self.flow.release()
+            return
+        subs: List[Request] = []
+        for instr in group.instructions:
+            motion_s = self._predict(instr)
+            subs.append(self._to_request(instr, motion_s))
+        if not subs:
+            self.flow.release()
+            return
+        req = Request(
+            kind=RequestKind.COMMAND,
+            priority=Priority.HIGH,
+            payload=CommandGroup(requests=subs, batch=group.batch),
+            timeout_s=sum(r.timeout_s for r in subs),
+            side_effects={"Group"},
+        )
+
+        def resolve_all(done: Future) -> None:
+            res = done.result()
+            per_line = res.data if isinstance(res.data, list) and len(res.data) == len(subs) else [res] * len(subs)
+            for fut, sub_res in zip(futures, per_line):
+                if fut is not None:
+                    _resolve(fut, sub_res)
+
+        done = self.sequencer.submit(req)
+        done.add_done_callback(lambda f: self.flow.release())
+        done.add_done_callback(resolve_all)
 
-            try:
-                self.state.apply_predictive(instr)
-            except Exception as e:
-                self._emit(ErrorEvent(message=f"apply failed: {e}", context={"instruction": str(instr)}))
 
-            # Create a Request and submit to the sequencer
-            req = self._to_request(instr)
-            self.sequencer.submit(req)
-            time.sleep(0.01) 
\ No newline at end of file
+def _resolve(fut: Future, res: Result) -> None:
+    try:
+        if not fut.done():
+            fut.set_result(res)
+    except Exception:
+        # Cancelled by the caller in the meantime
+        pass
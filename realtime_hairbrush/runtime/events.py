@@ -23,6 +23,7 @@ class AckEvent(RuntimeEvent):
     instruction: str = ""
     ok: bool = True
     message: Optional[str] = None
+    latency_s: Optional[float] = None
 
 
 @dataclass
@@ -43,4 +44,18 @@ class UpdatesPausedEvent(RuntimeEvent):
 
 @dataclass
 class UpdatesResumedEvent(RuntimeEvent):
-    pass 
\ No newline at end of file
+    pass 
+
+@dataclass
+class QueueOverflowEvent(RuntimeEvent):
+    priority: str = ""
+    payload: str = ""
+    total: int = 0
+
+
+@dataclass
+class EmergencyStopEvent(RuntimeEvent):
+    line: str = ""
+    ok: bool = True
+    latency_s: float = 0.0
+    cancelled: int = 0
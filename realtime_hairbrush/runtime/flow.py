@@ -0,0 +1,78 @@
+import threading
+from typing import Callable, Dict, Optional
+
+
+class FlowControl:
+    """
+    Bounds how far the Dispatcher runs ahead of the firmware.
+
+    The Dispatcher takes a slot before handing a command (or a command group) to
+    the sequencer and gives it back when the command completes. At most
+    ``max_in_flight`` commands are outstanding, and fewer when the firmware
+    reports a smaller planner: once ``planner_capacity`` returns the length of
+    the G-code move queue (``move.queue[0].gcodeLength``) the window is clipped
+    to it, so the host keeps the planner full without queueing work the
+    firmware cannot take yet. Everything beyond the window waits in the
+    bounded InstructionQueue, which in turn blocks producers when full.
+
+    Device-side backpressure (the firmware's input buffer filling up because the
+    planner is full) is handled by the transport, which holds the next write
+    until the buffer has room.
+    """
+
+    def __init__(self, max_in_flight: int = 32, planner_capacity: Optional[Callable[[], Optional[int]]] = None) -> None:
+        self.max_in_flight = max(1, int(max_in_flight))
+        self._planner_capacity = planner_capacity or (lambda: None)
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._peak = 0
+        self._waits = 0
+        self._stopped = False
+
+    def window(self) -> int:
+        try:
+            capacity = self._planner_capacity()
+        except Exception:
+            capacity = None
+        if isinstance(capacity, int) and capacity > 0:
+            return min(self.max_in_flight, capacity)
+        return self.max_in_flight
+
+    def acquire(self) -> bool:
+        """
+        Block until a slot is free.
+
+        Returns:
+            bool: True once a slot is taken, False if stop() was called while waiting
+        """
+        with self._cond:
+            if self._in_flight >= self.window():
+                self._waits += 1
+            while self._in_flight >= self.window() and not self._stopped:
+                # The window can grow when the planner size is first reported
+                self._cond.wait(0.1)
+            if self._stopped:
+                return False
+            self._in_flight += 1
+            self._peak = max(self._peak, self._in_flight)
+            return True
+
+    def release(self) -> None:
+        with self._cond:
+            self._in_flight = max(0, self._in_flight - 1)
+            self._cond.notify()
+
+    def start(self) -> None:
+        with self._cond:
+            self._stopped = False
+
+    def stop(self) -> None:
+        """Release a waiting acquire(); completions still in flight are released as they finish."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, int]:
+        """Outstanding commands, the current window, the peak and how often the window was full."""
+        with self._cond:
+            return {"in_flight": self._in_flight, "window": self.window(), "peak": self._peak, "waits": self._waits}
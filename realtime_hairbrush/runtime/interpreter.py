@@ -0,0 +1,240 @@
+import math
+import re
+from typing import Any, Dict, Iterable, Optional
+
+# Letters that address axes in motion, G10 and G92 words
+AXES = "XYZUVWABC"
+# Parameter words: a letter and a number or quoted string (comments are stripped first)
+_WORD = re.compile(r'([A-Za-z])\s*([-+]?(?:\d+\.?\d*|\.\d+)|"[^"]*")')
+_COMMENT = re.compile(r"\([^)]*\)|;.*$")
+
+
+class ModalInterpreter:
+    """
+    Modal G-code interpreter for the predicted machine state.
+
+    Tracks what the firmware will do with each instruction: absolute and
+    relative positioning (G90/G91), units (G20/G21), feedrate, the active
+    workplace (G54..G59.3) and its offsets (G10 L2/L20), G92 offsets, machine
+    coordinates for the next move (G53), the selected tool (T) and tool offsets
+    (G10 P), homing (G28) and dwell (G4).
+
+    Positions are kept in machine coordinates and updated in place; the
+    workplace position is derived from them with the RepRapFirmware
+    convention ``machine = user + workplace + G92 - tool offset``. Nothing is
+    copied per instruction, so a whole job can be run through feed() before
+    it is streamed: ``travel_mm`` and ``motion_s`` accumulate the length and
+    the feedrate-limited duration of every move (acceleration is not modelled).
+    """
+
+    __slots__ = (
+        "machine", "relative", "scale", "feedrate", "workspace", "work_offsets",
+        "g92", "tool", "tool_offsets", "machine_next", "moves", "travel_mm",
+        "motion_s", "version",
+    )
+
+    def __init__(self) -> None:
+        # Commanded position per axis letter, machine coordinates in mm; absent until known
+        self.machine: Dict[str, float] = {}
+        self.relative = False
+        self.scale = 1.0  # mm per programmed unit
+        self.feedrate: Optional[float] = None  # mm/min
+        self.workspace = 1  # G54
+        self.work_offsets: Dict[int, Dict[str, float]] = {}
+        self.g92: Dict[str, float] = {}
+        self.tool: Optional[int] = None
+        self.tool_offsets: Dict[int, Dict[str, float]] = {}
+        self.machine_next = False
+        self.moves = 0
+        self.travel_mm = 0.0
+        self.motion_s = 0.0
+        self.version = 0
+
+    def offset(self, axis: str) -> float:
+        """Machine minus user coordinate of an axis under the current modal state."""
+        return self.work_offsets.get(self.workspace, {}).get(axis, 0.0) + self.g92.get(axis, 0.0) - self._tool_offset(axis)
+
+    def _tool_offset(self, axis: str) -> float:
+        return self.tool_offsets.get(self.tool, {}).get(axis, 0.0) if self.tool is not None else 0.0
+
+    def position(self) -> Dict[str, float]:
+        """Commanded position in user (workplace) coordinates, keyed by lower-case axis."""
+        return {a.lower(): v - self.offset(a) for a, v in self.machine.items()}
+
+    def apply(self, instruction: Any) -> Optional[float]:
+        """
+        Apply an instruction object (code_type, code_number, parameters).
+
+        Returns:
+            Optional[float]: Predicted motion or dwell time in seconds, or None if
+                the instruction does not affect the modelled state
+        """
+        code_type = str(getattr(instruction, "code_type", "") or "").upper()
+        params = {str(k).upper(): v for k, v in (getattr(instruction, "parameters", None) or {}).items()}
+        return self.execute(code_type, getattr(instruction, "code_number", None), params)
+
+    def feed(self, line: str) -> float:
+        """
+        Apply one line of G-code text; several G/M/T words on a line run in order.
+
+        Returns:
+            float: Predicted motion or dwell time of the line in seconds
+        """
+        words = _WORD.findall(_COMMENT.sub("", line))
+        codes = []
+        params: Dict[str, Any] = {}
+        for letter, value in words:
+            letter = letter.upper()
+            if letter in "GMT" and not value.startswith('"'):
+                codes.append((letter, float(value)))
+            else:
+                params[letter] = value.strip('"') if value.startswith('"') else float(value)
+        total = 0.0
+        for letter, number in codes:
+            total += self.execute(letter, int(number) if number.is_integer() else number, params) or 0.0
+        return total
+
+    def run(self, lines: Iterable[str]) -> "ModalInterpreter":
+        """Feed every line of a job; returns self for reading the totals."""
+        for line in lines:
+            self.feed(line)
+        return self
+
+    def execute(self, code_type: str, number: Any, params: Dict[str, Any]) -> Optional[float]:
+        """Apply one command word with its parameters (keyed by upper-case letter)."""
+        p = params
+        if code_type == "T":
+            tool = number if number is not None else p.get("T")
+            try:
+                tool = int(tool)
+            except (TypeError, ValueError):
+                return None
+            self.tool = tool if tool >= 0 else None
+            return self._changed(0.0)
+        number = _num(number)
+        if code_type != "G" or number is None:
+            return None
+        if number in (0, 1, 2, 3):
+            return self._changed(self._move(p))
+        if number == 4:
+            seconds = _num(p.get("S"))
+            ms = _num(p.get("P"))
+            return self._changed(seconds if seconds is not None else (ms or 0.0) / 1000.0)
+        if number == 10:
+            self._set_offsets(p)
+        elif number == 20:
+            self.scale = 25.4
+        elif number == 21:
+            self.scale = 1.0
+        elif number == 28:
+            homed = [a for a in AXES if a in p] or ["X", "Y", "Z"]
+            for axis in homed:
+                self.machine[axis] = 0.0
+        elif number == 53:
+            self.machine_next = True
+        elif 54 <= number < 60:
+            # G54..G59 are workplaces 1-6; G59.1..G59.3 are 7-9
+            self.workspace = int(number) - 53 if number.is_integer() else 6 + int(round((number - 59) * 10))
+        elif number == 90:
+            self.relative = False
+        elif number == 91:
+            self.relative = True
+        elif number == 92:
+            self._set_g92(p)
+        else:
+            return None
+        return self._changed(0.0)
+
+    def _changed(self, seconds: float) -> float:
+        self.version += 1
+        return seconds
+
+    def _move(self, p: Dict[str, Any]) -> float:
+        feed = _num(p.get("F"))
+        if feed is not None and feed > 0:
+            self.feedrate = feed * self.scale
+        moved = {}
+        for axis, raw in p.items():
+            if axis not in AXES:
+                continue
+            value = _num(raw)
+            if value is None:
+                continue
+            value *= self.scale
+            old = self.machine.get(axis)
+            if self.relative:
+                if old is None:
+                    continue
+                new = old + value
+            else:
+                new = value if self.machine_next else value + self.offset(axis)
+            self.machine[axis] = new
+            if old is not None:
+                moved[axis] = new - old
+        self.machine_next = False
+        # The feedrate applies to the XYZ path; moves of other axes alone use their own length
+        xyz = math.sqrt(sum(d * d for a, d in moved.items() if a in "XYZ"))
+        dist = xyz or math.sqrt(sum(d * d for d in moved.values()))
+        if dist <= 0:
+            return 0.0
+        self.moves += 1
+        self.travel_mm += dist
+        if not self.feedrate:
+            return 0.0
+        seconds = dist / (self.feedrate / 60.0)
+        self.motion_s += seconds
+        return seconds
+
+    def _set_offsets(self, p: Dict[str, Any]) -> None:
+        mode = _num(p.get("L"))
+        target = _num(p.get("P"))
+        if mode in (2, 20):
+            ws = int(target) if target is not None else self.workspace
+            offsets = self.work_offsets.setdefault(ws, {})
+            for axis in AXES:
+                value = _num(p.get(axis))
+                if value is None:
+                    continue
+                if mode == 2:
+                    offsets[axis] = value * self.scale
+                elif axis in self.machine:
+                    # L20: choose the offset so the current position reads as the given value
+                    offsets[axis] = self.machine[axis] - value * self.scale - self.g92.get(axis, 0.0) + self._tool_offset(axis)
+        elif mode is None and target is not None:
+            offsets = self.tool_offsets.setdefault(int(target), {})
+            for axis in AXES:
+                value = _num(p.get(axis))
+                if value is not None:
+                    offsets[axis] = value * self.scale
+
+    def _set_g92(self, p: Dict[str, Any]) -> None:
+        given = {a: v for a, v in ((a, _num(p.get(a))) for a in AXES) if v is not None}
+        if not given:
+            self.g92.clear()
+            return
+        for axis, value in given.items():
+            if axis not in self.machine:
+                # Nothing known to offset from: the machine is where the user says
+                self.machine[axis] = value * self.scale + self.offset(axis)
+                continue
+            workplace = self.work_offsets.get(self.workspace, {}).get(axis, 0.0)
+            self.g92[axis] = self.machine[axis] - value * self.scale - workplace + self._tool_offset(axis)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """State in the layout of MachineState's predictive tree."""
+        return {
+            "position": self.position(),
+            "machine_position": {a.lower(): v for a, v in self.machine.items()},
+            "feedrate": self.feedrate,
+            "positioning": {"mode": "relative" if self.relative else "absolute"},
+            "units": "inch" if self.scale != 1.0 else "mm",
+            "workspace": self.workspace,
+            "tool": {"current": self.tool},
+        }
+
+
+def _num(value: Any) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
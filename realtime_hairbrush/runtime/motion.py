@@ -0,0 +1,194 @@
+import math
+import threading
+import time
+from typing import List, Optional, Sequence, Tuple
+
+Vec = Tuple[float, float, float]
+
+
+class _Segment:
+    """One straight move with a symmetric trapezoidal speed profile."""
+
+    __slots__ = ("p0", "p1", "d", "a", "vp", "ta", "da", "duration", "start")
+
+    def __init__(self, p0: Vec, p1: Vec, speed: float, accel: float, start: float) -> None:
+        self.p0 = p0
+        self.p1 = p1
+        self.d = math.dist(p0, p1)
+        self.a = accel
+        if speed * speed / accel <= self.d:
+            # Accelerate to speed, cruise, decelerate
+            self.vp = speed
+            self.ta = speed / accel
+            self.da = speed * speed / (2.0 * accel)
+            self.duration = 2.0 * self.ta + (self.d - 2.0 * self.da) / speed
+        else:
+            # Too short to reach speed: triangular profile
+            self.vp = math.sqrt(accel * self.d)
+            self.ta = self.vp / accel
+            self.da = self.d / 2.0
+            self.duration = 2.0 * self.ta
+        self.start = start
+
+    @property
+    def end(self) -> float:
+        return self.start + self.duration
+
+    def distance_at(self, tau: float) -> float:
+        # Distance travelled tau seconds into the move
+        if tau <= 0.0:
+            return 0.0
+        if tau >= self.duration:
+            return self.d
+        if tau < self.ta:
+            return 0.5 * self.a * tau * tau
+        if tau < self.duration - self.ta:
+            return self.da + self.vp * (tau - self.ta)
+        rest = self.duration - tau
+        return self.d - 0.5 * self.a * rest * rest
+
+    def time_at(self, s: float) -> float:
+        # Inverse of distance_at
+        s = min(max(s, 0.0), self.d)
+        if s < self.da:
+            return math.sqrt(2.0 * s / self.a)
+        if s < self.d - self.da:
+            return self.ta + (s - self.da) / self.vp
+        return self.duration - math.sqrt(max(0.0, 2.0 * (self.d - s) / self.a))
+
+    def point(self, s: float) -> Vec:
+        f = s / self.d if self.d > 0 else 1.0
+        return tuple(a + (b - a) * f for a, b in zip(self.p0, self.p1))  # type: ignore[return-value]
+
+    def project(self, p: Vec) -> Tuple[float, float]:
+        # Distance along the move of the point closest to p, and how far p is off the line
+        u = [b - a for a, b in zip(self.p0, self.p1)]
+        w = [c - a for a, c in zip(self.p0, p)]
+        s = min(max(sum(x * y for x, y in zip(u, w)) / self.d, 0.0), self.d) if self.d > 0 else 0.0
+        return s, math.dist(self.point(s), p)
+
+
+class PositionEstimator:
+    """
+    Dead-reckoned XYZ position between position polls.
+
+    The Dispatcher reports every commanded G0/G1 target and feedrate through
+    plan(); each becomes a segment with a trapezoidal speed profile (constant
+    ``accel_mm_s2``), chained after the previous one. position() evaluates the
+    chain at any time, so a display can animate smoothly from what was
+    commanded instead of polling the machine position at display rate.
+
+    Polled positions only correct drift: correct() finds where on the planned
+    path the machine actually is and shifts the timing of the remaining moves
+    to match, and learns the offset between the commanded frame and the frame
+    of the polled position (tool offsets, user vs machine coordinates) while
+    the machine is at rest. Commands that move the machine or change the frame
+    in ways the estimator does not model (homing, G92, tool changes) should be
+    reported with invalidate(); nothing is extrapolated until the next poll.
+    """
+
+    def __init__(self, accel_mm_s2: float = 1000.0, tolerance_mm: float = 1.0) -> None:
+        self.accel = max(1e-3, float(accel_mm_s2))
+        self.tolerance = float(tolerance_mm)
+        self._lock = threading.Lock()
+        self._segments: List[_Segment] = []
+        # Last polled position while no move was pending, in the polled frame
+        self._rest: Optional[Vec] = None
+        # Polled frame minus commanded frame; None until learned
+        self._frame: Optional[Vec] = None
+        # Last commanded target, in the commanded frame
+        self._target: Optional[Vec] = None
+
+    def plan(self, target: Sequence[Optional[float]], feedrate_mm_min: Optional[float], t: Optional[float] = None) -> bool:
+        """
+        Add a move to the commanded target.
+
+        Args:
+            target: Commanded X, Y, Z; None keeps that axis at its last target
+            feedrate_mm_min: Feedrate of the move in mm/min
+            t: Time the move was issued (default: now)
+
+        Returns:
+            bool: True if the move was added to the chain
+        """
+        now = time.time() if t is None else t
+        with self._lock:
+            prev = self._target
+            merged = [float(c) if c is not None else (prev[i] if prev else None) for i, c in enumerate(list(target)[:3])]
+            if len(merged) < 3 or any(c is None for c in merged):
+                return False
+            self._target = (merged[0], merged[1], merged[2])
+            try:
+                speed = float(feedrate_mm_min) / 60.0  # type: ignore[arg-type]
+            except (TypeError, ValueError):
+                return False
+            if self._frame is None or speed <= 0:
+                return False
+            p1 = tuple(c + o for c, o in zip(self._target, self._frame))
+            if self._segments:
+                p0 = self._segments[-1].p1
+                start = max(now, self._segments[-1].end)
+            elif self._rest is not None:
+                p0, start = self._rest, now
+            else:
+                return False
+            if math.dist(p0, p1) <= 1e-9:
+                return False
+            self._segments.append(_Segment(p0, p1, speed, self.accel, start))  # type: ignore[arg-type]
+            return True
+
+    def invalidate(self) -> None:
+        """Forget planned moves and the learned frame; the next poll re-anchors."""
+        with self._lock:
+            self._segments.clear()
+            self._frame = None
+
+    def correct(self, observed: Sequence[float], t: Optional[float] = None) -> None:
+        """Take a polled position (first three values: X, Y, Z) as ground truth at time t."""
+        if len(observed) < 3:
+            return
+        now = time.time() if t is None else t
+        p = (float(observed[0]), float(observed[1]), float(observed[2]))
+        with self._lock:
+            for i, seg in enumerate(self._segments):
+                s, off = seg.project(p)
+                if off > self.tolerance:
+                    continue
+                if i == len(self._segments) - 1 and seg.d - s <= self.tolerance:
+                    # Arrived at the last target; refine the frame from it
+                    self._settle(p, learn=True)
+                    return
+                # Earlier moves are done; shift this one and those after it in time
+                shift = (now - seg.time_at(s)) - seg.start
+                del self._segments[:i]
+                for later in self._segments:
+                    later.start += shift
+                return
+            # Not on the planned path, or nothing planned: the machine is where the poll says.
+            # The frame is kept; frame changes are reported through invalidate()
+            self._settle(p, learn=self._frame is None)
+
+    def _settle(self, p: Vec, learn: bool) -> None:
+        self._segments.clear()
+        self._rest = p
+        if learn and self._target is not None:
+            self._frame = tuple(a - b for a, b in zip(p, self._target))  # type: ignore[assignment]
+
+    def moving(self, t: Optional[float] = None) -> bool:
+        """True while a planned move is still in progress at time t."""
+        now = time.time() if t is None else t
+        with self._lock:
+            return bool(self._segments) and now < self._segments[-1].end
+
+    def position(self, t: Optional[float] = None) -> Optional[Vec]:
+        """Estimated position at time t in the polled frame, or None before the first poll."""
+        now = time.time() if t is None else t
+        with self._lock:
+            for seg in self._segments:
+                if now < seg.start:
+                    return seg.p0
+                if now < seg.end:
+                    return seg.point(seg.distance_at(now - seg.start))
+            if self._segments:
+                return self._segments[-1].p1
+            return self._rest
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+import threading
+from typing import Any, Dict, List, Optional
 
 
 def parse_object_model(data: Dict[str, Any]) -> Dict[str, Any]:
@@ -69,4 +70,148 @@ def parse_object_model(data: Dict[str, Any]) -> Dict[str, Any]:
     except Exception:
         pass
 
-    return out 
\ No newline at end of file
+    return out 
+
+# Top-level object model sections kept by ObjectModelMirror
+MIRRORED_SECTIONS = ("move", "state", "sensors", "boards", "job")
+
+# Keys read back from the mirror after a section is refetched, per section.
+# machinePosition comes before userPosition so readers that map both onto one
+# legacy field end up showing user coordinates.
+SECTION_KEYS = {
+    "move": (
+        "move.axes[].machinePosition",
+        "move.axes[].userPosition",
+        "move.axes[].homed",
+        "move.queue[].gcodeLength",
+    ),
+    "state": ("state.status", "state.currentTool"),
+    "sensors": ("sensors.endstops[].triggered",),
+    "boards": ("boards[].vIn.current", "boards[].mcuTemp.current"),
+}
+
+
+def _split_path(path: str) -> List[str]:
+    return [p for p in path.split('.') if p]
+
+
+def _resolve(node: Any, parts: List[str]) -> Any:
+    if not parts:
+        return node
+    part, rest = parts[0], parts[1:]
+    name, _, index = part.partition('[')
+    if name:
+        if not isinstance(node, dict):
+            return None
+        node = node.get(name)
+    if not index:
+        return _resolve(node, rest)
+    if not isinstance(node, list):
+        return None
+    index = index.rstrip(']')
+    if index == '':
+        # "axes[]" maps the rest of the path over every element
+        return [_resolve(item, rest) for item in node]
+    try:
+        return _resolve(node[int(index)], rest)
+    except (ValueError, IndexError):
+        return None
+
+
+def _assign(node: Any, parts: List[str], value: Any) -> None:
+    part, rest = parts[0], parts[1:]
+    name, _, index = part.partition('[')
+    if not index:
+        if not rest:
+            node[name] = value
+            return
+        child = node.get(name)
+        if not isinstance(child, dict):
+            child = node[name] = {}
+        _assign(child, rest, value)
+        return
+    items = node.get(name) if name else node
+    if not isinstance(items, list):
+        items = node[name] = []
+    index = index.rstrip(']')
+    if index == '':
+        # "axes[].userPosition" with a list value sets one element per item
+        if not rest or not isinstance(value, list):
+            return
+        while len(items) < len(value):
+            items.append({})
+        for item, v in zip(items, value):
+            if isinstance(item, dict):
+                _assign(item, rest, v)
+        return
+    try:
+        i = int(index)
+    except ValueError:
+        return
+    while len(items) <= i:
+        items.append({})
+    if not rest:
+        items[i] = value
+    elif isinstance(items[i], dict):
+        _assign(items[i], rest, value)
+
+
+class ObjectModelMirror:
+    """
+    Local copy of selected RepRapFirmware object model sections.
+
+    RRF bumps a per-section counter in ``seqs`` whenever a section changes, so a
+    poller can fetch ``rr_model?key=seqs`` (a few dozen bytes) and refetch only the
+    sections whose counter moved. Live values such as positions and sensor
+    readings change without bumping ``seqs``; callers fetch those by key and
+    store them with set().
+    """
+
+    def __init__(self, sections=MIRRORED_SECTIONS) -> None:
+        self.sections = tuple(sections)
+        self._lock = threading.Lock()
+        self._model: Dict[str, Any] = {}
+        self._seqs: Dict[str, int] = {}
+
+    def stale_sections(self, seqs: Dict[str, Any]) -> List[str]:
+        """Return the mirrored sections that are missing or whose counter changed."""
+        with self._lock:
+            return [
+                s for s in self.sections
+                if s not in self._model or (s in seqs and seqs.get(s) != self._seqs.get(s))
+            ]
+
+    def apply_section(self, section: str, value: Any, seq: Optional[int] = None) -> None:
+        """Replace one top-level section and record the counter it was fetched at."""
+        with self._lock:
+            self._model[section] = value
+            if seq is not None:
+                self._seqs[section] = seq
+
+    def set(self, path: str, value: Any) -> None:
+        """Store a value fetched by key, e.g. ``move.axes[].userPosition``."""
+        parts = _split_path(path)
+        if not parts:
+            return
+        with self._lock:
+            _assign(self._model, parts, value)
+
+    def get(self, path: str, default: Any = None) -> Any:
+        """Read a value by object model path; ``[]`` maps over list elements."""
+        with self._lock:
+            value = _resolve(self._model, _split_path(path))
+        return default if value is None else value
+
+    def values(self, keys) -> Dict[str, Any]:
+        """Read several paths at once as ``{key: value}``."""
+        return {key: self.get(key) for key in keys}
+
+    def invalidate(self) -> None:
+        """Forget all sections so the next refresh refetches everything."""
+        with self._lock:
+            self._model.clear()
+            self._seqs.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._model)
@@ -2,10 +2,13 @@ from __future__ import annotations
 
 import asyncio
 import time
-from typing import Any, Awaitable, Callable, Dict, Optional
+from typing import Any, Awaitable, Callable, Dict, Optional, Union
 
+from semantic_gcode.transport.base import AsyncTransport
 from realtime_hairbrush.transport.airbrush_transport import AirbrushTransport
 from realtime_hairbrush.runtime.events import StateUpdatedEvent
+from realtime_hairbrush.runtime.object_model import ObjectModelMirror, SECTION_KEYS
+from realtime_hairbrush.runtime.sequencer import Request, RequestKind, Priority, RequestSequencer, HttpQuerySpec
 
 
 class ObjectModelAgent:
@@ -14,11 +17,16 @@ class ObjectModelAgent:
     - Uses M409 for live coords at a short interval during motion (serial)
     - Uses rr_model for targeted status when HTTP available
     - Emits minimal patches via callback with normalized fields for the UI
-    - Wraps sync transport calls using asyncio.to_thread initially
+    - Awaits async transports (e.g. AsyncSerialTransport) directly; sync transport
+      calls are wrapped with asyncio.to_thread
+    - While idle, follows rr_model seqs and refetches only the sections that changed
+    - With a sequencer set, rr_model reads go through it so identical reads from
+      the poller and UI are shared instead of repeated
     """
 
     def __init__(self) -> None:
-        self._transport: Optional[AirbrushTransport] = None
+        self._transport: Optional[Union[AirbrushTransport, AsyncTransport]] = None
+        self._sequencer: Optional[RequestSequencer] = None
         self._task_loop: Optional[asyncio.Task] = None
         self._running = asyncio.Event()
         self._callbacks: list[Callable[[Dict[str, Any]], None]] = []
@@ -28,6 +36,11 @@ class ObjectModelAgent:
         self._verbose = False
         self._lock = asyncio.Lock()
 
+        # object model mirror, kept current from seqs while idle (None until probed)
+        self.mirror = ObjectModelMirror()
+        self._mirror_interval_s: float = 0.25
+        self._mirror_supported: Optional[bool] = None
+
         # coalescing tokens
         self._want_coords = asyncio.Event()
         self._want_snapshot = asyncio.Event()
@@ -35,9 +48,18 @@ class ObjectModelAgent:
     def set_verbose(self, on: bool) -> None:
         self._verbose = on
 
-    def set_transport(self, transport: AirbrushTransport) -> None:
+    def set_transport(self, transport: Union[AirbrushTransport, AsyncTransport]) -> None:
         self._transport = transport
 
+    def set_sequencer(self, sequencer: Optional[RequestSequencer]) -> None:
+        self._sequencer = sequencer
+
+    async def _query(self, line: str) -> Optional[str]:
+        # Async transports are awaited on the loop; sync ones need a worker thread
+        if isinstance(self._transport, AsyncTransport):
+            return await self._transport.query(line)
+        return await asyncio.to_thread(self._transport.query, line)
+
     def on_change(self, cb: Callable[[Dict[str, Any]], None]) -> None:
         self._callbacks.append(cb)
 
@@ -61,36 +83,72 @@ class ObjectModelAgent:
         else:
             self._motion_active.clear()
 
+    def set_coords_interval(self, seconds: float) -> None:
+        """Minimum time between position reads while moving."""
+        self._cooldown_coords_s = max(0.05, float(seconds))
+
     def request_snapshot_now(self) -> None:
         self._want_snapshot.set()
 
     def request_coords_now(self) -> None:
         self._want_coords.set()
 
+    def _model_source(self) -> Any:
+        # Async transports expose get_model themselves; sync ones are unwrapped from
+        # AirbrushTransport (.transport) and the logging wrapper (.inner)
+        if isinstance(self._transport, AsyncTransport):
+            return self._transport
+        # Dual link: the HTTP query link serves reads while serial carries commands
+        inner = getattr(self._transport, 'query_transport', None) or getattr(self._transport, 'transport', None)
+        return getattr(inner, 'inner', inner)
+
     def _http_available(self) -> bool:
         try:
-            inner = getattr(self._transport, 'transport', None)
-            # unwrap logging wrapper if present
-            inner2 = getattr(inner, 'transport', inner)
-            return hasattr(inner2, 'get_model') and callable(getattr(inner2, 'get_model'))
+            return callable(getattr(self._model_source(), 'get_model', None))
         except Exception:
             return False
 
     def _http_get_model(self, key: Optional[str] = None, flags: Optional[str] = None) -> Optional[Dict[str, Any]]:
         try:
-            inner = getattr(self._transport, 'transport', None)
-            inner2 = getattr(inner, 'transport', inner)
-            getter = getattr(inner2, 'get_model', None)
+            getter = getattr(self._model_source(), 'get_model', None)
             if callable(getter):
                 return getter(key=key, flags=flags)
         except Exception:
             return None
         return None
 
+    async def _get_model(self, key: Optional[str] = None, flags: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        if self._sequencer is not None:
+            return await self._sequenced_get_model(key, flags)
+        source = self._model_source()
+        if isinstance(source, AsyncTransport):
+            try:
+                return await source.get_model(key=key, flags=flags)
+            except Exception:
+                return None
+        return await asyncio.to_thread(self._http_get_model, key, flags)
+
+    def _fetches_concurrently(self) -> bool:
+        # Async transports and the sequencer both accept many reads at once
+        return self._sequencer is not None or isinstance(self._model_source(), AsyncTransport)
+
+    async def _sequenced_get_model(self, key: Optional[str], flags: Optional[str]) -> Optional[Dict[str, Any]]:
+        params = {"key": key} if key else {}
+        if flags:
+            params["flags"] = flags
+        req = Request(kind=RequestKind.QUERY, priority=Priority.MEDIUM,
+                      payload=HttpQuerySpec(endpoint="rr_model", params=params), timeout_s=2.0)
+        try:
+            res = await asyncio.wait_for(self._sequencer.submit_async(req), timeout=2.5)
+        except asyncio.TimeoutError:
+            return None
+        return res.data if res.ok and isinstance(res.data, dict) else None
+
     async def _run(self) -> None:
         # initial snapshot once running
         self._want_snapshot.set()
         last_coords_at = 0.0
+        last_mirror_at = 0.0
         while self._running.is_set():
             try:
                 # prefer explicit requests
@@ -110,6 +168,13 @@ class ObjectModelAgent:
                         last_coords_at = now
                         await self._do_coords()
                         continue
+                elif self._mirror_supported is not False:
+                    # idle: follow object model changes through seqs
+                    now = time.time()
+                    if now - last_mirror_at >= self._mirror_interval_s:
+                        last_mirror_at = now
+                        await self._sync_mirror()
+                        continue
 
                 await asyncio.sleep(0.02)
             except asyncio.CancelledError:
@@ -136,73 +201,16 @@ class ObjectModelAgent:
                     ("boards[].vIn.current", "f"),
                     ("boards[].mcuTemp.current", "f"),
                 ]
-                observed: Dict[str, Any] = {"raw_status": {"raw": {}}, "firmware": {}}
-                # Fast keys
-                for key, flags in fast_keys:
-                    data = await asyncio.to_thread(self._http_get_model, key, flags)
-                    if not isinstance(data, dict):
-                        continue
-                    # state.status
-                    if key == "state.status":
-                        st = data.get("result", data.get("state", {}).get("status"))
-                        if st is not None:
-                            observed.setdefault("firmware", {})["status"] = st
-                    # move.axes[].machinePosition
-                    elif key == "move.axes[].machinePosition":
-                        res = data.get("result")
-                        if isinstance(res, list):
-                            observed.setdefault("coords", {})["machine_position"] = res
-                            # Mirror for legacy UI readers
-                            observed.setdefault("raw_status", {}).setdefault("raw", {}).setdefault("coords", {})["machine"] = res
-                    # move.axes[].homed
-                    elif key == "move.axes[].homed":
-                        res = data.get("result")
-                        if isinstance(res, list):
-                            observed.setdefault("homed", {})["axes"] = res
-                            # Mirror for legacy UI readers
-                            observed.setdefault("raw_status", {}).setdefault("raw", {}).setdefault("coords", {})["axesHomed"] = res
-                    # state.currentTool
-                    elif key == "state.currentTool":
-                        res = data.get("result")
-                        if res is not None:
-                            try:
-                                observed["raw_status"]["raw"]["currentTool"] = int(res)
-                            except Exception:
-                                observed["raw_status"]["raw"]["currentTool"] = res
-                    # sensors.endstops[].triggered
-                    elif key.startswith("sensors.endstops"):
-                        res = data.get("result")
-                        ends_map = {}
-                        if isinstance(res, list):
-                            for idx, v in enumerate(res):
-                                try:
-                                    trig = bool(v if isinstance(v, (int, float, bool)) else (v.get("triggered") if isinstance(v, dict) else False))
-                                except Exception:
-                                    trig = False
-                                ends_map[str(idx)] = trig
-                        if ends_map:
-                            observed.setdefault("endstops", {}).update(ends_map)
-                # Medium keys (diagnostics)
-                for key, flags in medium_keys:
-                    data = await asyncio.to_thread(self._http_get_model, key, flags)
-                    if not isinstance(data, dict):
-                        continue
-                    if key == "boards[].vIn.current":
-                        res = data.get("result")
-                        try:
-                            vin_val = float(res[0]) if isinstance(res, list) and res else None
-                        except Exception:
-                            vin_val = None
-                        if vin_val is not None:
-                            observed.setdefault("diagnostics", {})["vin"] = vin_val
-                    elif key == "boards[].mcuTemp.current":
-                        res = data.get("result")
-                        try:
-                            mcu = float(res[0]) if isinstance(res, list) and res else None
-                        except Exception:
-                            mcu = None
-                        if mcu is not None:
-                            observed.setdefault("diagnostics", {})["mcu_temp_c"] = mcu
+                # An async transport fetches every key concurrently over its connection
+                # pool (about one round-trip) and the sequencer takes them all at once;
+                # a bare sync transport keeps one request at a time
+                keys = fast_keys + medium_keys
+                if self._fetches_concurrently():
+                    fetched = await asyncio.gather(*(self._get_model(key, flags) for key, flags in keys))
+                else:
+                    fetched = [await self._get_model(key, flags) for key, flags in keys]
+                results = {key: data for (key, _), data in zip(keys, fetched)}
+                observed = self._observed_from_results(results)
                 if observed:
                     self._emit_patch(observed)
                 return
@@ -211,11 +219,14 @@ class ObjectModelAgent:
                 pass
         # Fallback legacy snapshot via M408 (serial or HTTP if rr_model not available)
         try:
-            # Prefer compact M408 S0 to populate homed[] and quick status
-            line0 = "M408 S0"
-            resp0 = await asyncio.to_thread(self._transport.query, line0)
+            # Prefer compact M408 S0 to populate homed[] and quick status, with S2 for
+            # the fuller object model; both are issued together so an async transport
+            # can have them in flight at once
+            resp0, resp2 = await asyncio.gather(
+                self._query("M408 S0"), self._query("M408 S2"), return_exceptions=True
+            )
             data0 = None
-            if resp0:
+            if isinstance(resp0, str) and resp0:
                 try:
                     import json
                     t0 = resp0.strip()
@@ -224,12 +235,9 @@ class ObjectModelAgent:
                     data0 = json.loads(t0) if t0 else None
                 except Exception:
                     data0 = None
-            # Optionally follow with S2 for fuller object model
             data2 = None
             try:
-                line2 = "M408 S2"
-                resp2 = await asyncio.to_thread(self._transport.query, line2)
-                if resp2:
+                if isinstance(resp2, str) and resp2:
                     import json
                     t2 = resp2.strip()
                     if "{" in t2 and "}" in t2:
@@ -256,13 +264,115 @@ class ObjectModelAgent:
         except Exception:
             pass
 
+    async def _sync_mirror(self) -> None:
+        if not self._transport or not self._transport.is_connected() or not self._http_available():
+            return
+        # state.status is a live value that does not bump seqs, so it is read alongside
+        concurrent = self._fetches_concurrently()
+        if concurrent:
+            seqs_data, status_data = await asyncio.gather(self._get_model("seqs"), self._get_model("state.status", "f"))
+        else:
+            seqs_data = await self._get_model("seqs")
+            status_data = await self._get_model("state.status", "f")
+        if not isinstance(seqs_data, dict):
+            return
+        seqs = seqs_data.get("result")
+        if not isinstance(seqs, dict):
+            # Firmware without seqs: rely on snapshots and motion coords polling
+            self._mirror_supported = False
+            return
+        self._mirror_supported = True
+
+        results: Dict[str, Any] = {}
+        status = status_data.get("result") if isinstance(status_data, dict) else None
+        if status is not None and status != self.mirror.get("state.status"):
+            self.mirror.set("state.status", status)
+            results["state.status"] = {"result": status}
+        stale = self.mirror.stale_sections(seqs)
+        if concurrent:
+            fetched = await asyncio.gather(*(self._get_model(section, "d99v") for section in stale))
+        else:
+            fetched = [await self._get_model(section, "d99v") for section in stale]
+        for section, data in zip(stale, fetched):
+            if isinstance(data, dict) and "result" in data:
+                self.mirror.apply_section(section, data["result"], seqs.get(section))
+                for key in SECTION_KEYS.get(section, ()):
+                    results[key] = {"result": self.mirror.get(key)}
+        if results:
+            self._emit_patch(self._observed_from_results(results))
+
+    def _observed_from_results(self, results: Dict[str, Any]) -> Dict[str, Any]:
+        # Normalize rr_model replies ({key: {"result": ...}}) into an observed patch
+        observed: Dict[str, Any] = {"raw_status": {"raw": {}}, "firmware": {}}
+        for key, data in results.items():
+            if not isinstance(data, dict):
+                continue
+            # state.status
+            if key == "state.status":
+                st = data.get("result", data.get("state", {}).get("status"))
+                if st is not None:
+                    observed.setdefault("firmware", {})["status"] = st
+            # move.axes[].machinePosition
+            elif key == "move.axes[].machinePosition":
+                res = data.get("result")
+                if isinstance(res, list):
+                    observed.setdefault("coords", {})["machine_position"] = res
+                    # Mirror for legacy UI readers
+                    observed.setdefault("raw_status", {}).setdefault("raw", {}).setdefault("coords", {})["machine"] = res
+            # move.axes[].homed
+            elif key == "move.axes[].homed":
+                res = data.get("result")
+                if isinstance(res, list):
+                    observed.setdefault("homed", {})["axes"] = res
+                    # Mirror for legacy UI readers
+                    observed.setdefault("raw_status", {}).setdefault("raw", {}).setdefault("coords", {})["axesHomed"] = res
+            # state.currentTool
+            elif key == "state.currentTool":
+                res = data.get("result")
+                if res is not None:
+                    try:
+                        observed["raw_status"]["raw"]["currentTool"] = int(res)
+                    except Exception:
+                        observed["raw_status"]["raw"]["currentTool"] = res
+            # sensors.endstops[].triggered
+            elif key.startswith("sensors.endstops"):
+                res = data.get("result")
+                ends_map = {}
+                if isinstance(res, list):
+                    for idx, v in enumerate(res):
+                        try:
+                            trig = bool(v if isinstance(v, (int, float, bool)) else (v.get("triggered") if isinstance(v, dict) else False))
+                        except Exception:
+                            trig = False
+                        ends_map[str(idx)] = trig
+                if ends_map:
+                    observed.setdefault("endstops", {}).update(ends_map)
+            # Diagnostics
+            elif key == "boards[].vIn.current":
+                res = data.get("result")
+                try:
+                    vin_val = float(res[0]) if isinstance(res, list) and res else None
+                except Exception:
+                    vin_val = None
+                if vin_val is not None:
+                    observed.setdefault("diagnostics", {})["vin"] = vin_val
+            elif key == "boards[].mcuTemp.current":
+                res = data.get("result")
+                try:
+                    mcu = float(res[0]) if isinstance(res, list) and res else None
+                except Exception:
+                    mcu = None
+                if mcu is not None:
+                    observed.setdefault("diagnostics", {})["mcu_temp_c"] = mcu
+        return observed
+
     async def _refresh_homed(self) -> None:
         if not self._transport or not self._transport.is_connected():
             return
         try:
             from semantic_gcode.dict.gcode_commands.M409.M409 import M409_QueryObjectModel
             cmd = M409_QueryObjectModel.create(path='move.axes[].homed', s=2)
-            resp = await asyncio.wait_for(asyncio.to_thread(self._transport.query, str(cmd)), timeout=0.8)
+            resp = await asyncio.wait_for(self._query(str(cmd)), timeout=0.8)
             if not resp:
                 return
             import json
@@ -283,7 +393,7 @@ class ObjectModelAgent:
         # Prefer rr_model for HTTP
         if self._http_available():
             try:
-                data = await asyncio.to_thread(self._http_get_model, "move.axes[].machinePosition", "f")
+                data = await self._get_model("move.axes[].machinePosition", "f")
                 if not isinstance(data, dict):
                     return
                 res = data.get("result")
@@ -301,7 +411,7 @@ class ObjectModelAgent:
         try:
             from semantic_gcode.dict.gcode_commands.M409.M409 import M409_QueryObjectModel
             cmd = M409_QueryObjectModel.create(path='move.axes[].machinePosition', s=2)
-            resp = await asyncio.wait_for(asyncio.to_thread(self._transport.query, str(cmd)), timeout=0.8)
+            resp = await asyncio.wait_for(self._query(str(cmd)), timeout=0.8)
             if not resp:
                 return
             if (time.time() - start_ts) > 1.0:
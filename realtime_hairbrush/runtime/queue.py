@@ -1,20 +1,52 @@
 import queue
-from typing import Optional
+from typing import List, Optional, Union
 from semantic_gcode.gcode.base import GCodeInstruction
 
 
+class InstructionGroup:
+    """Instructions queued as one unit; see Dispatcher.submit_group."""
+
+    def __init__(self, instructions: List[GCodeInstruction], batch: bool = True) -> None:
+        self.instructions = list(instructions)
+        self.batch = batch
+
+    def __len__(self) -> int:
+        return len(self.instructions)
+
+
 class InstructionQueue:
     def __init__(self, maxsize: int = 0) -> None:
-        self._q: "queue.Queue[GCodeInstruction]" = queue.Queue(maxsize=maxsize)
+        self._q: "queue.Queue[Optional[Union[GCodeInstruction, InstructionGroup]]]" = queue.Queue(maxsize=maxsize)
 
-    def put(self, instruction: GCodeInstruction) -> None:
-        self._q.put(instruction)
+    def put(self, instruction: Union[GCodeInstruction, InstructionGroup], timeout: Optional[float] = None) -> None:
+        # Blocks while a bounded queue is full; raises queue.Full after timeout
+        self._q.put(instruction, timeout=timeout)
 
-    def get(self, timeout: Optional[float] = None) -> GCodeInstruction:
+    def get(self, timeout: Optional[float] = None) -> Optional[Union[GCodeInstruction, InstructionGroup]]:
+        # Returns None when woken by wake() rather than by an instruction
         return self._q.get(timeout=timeout)
 
+    def wake(self) -> None:
+        """Release a consumer blocked in get() (e.g. so it can notice a stop request)."""
+        try:
+            self._q.put_nowait(None)
+        except queue.Full:
+            # A full queue never has a consumer blocked in get()
+            pass
+
+    def drain(self) -> List[Union[GCodeInstruction, InstructionGroup]]:
+        """Remove and return everything queued, without blocking."""
+        items = []
+        while True:
+            try:
+                item = self._q.get_nowait()
+            except queue.Empty:
+                return items
+            if item is not None:
+                items.append(item)
+
     def empty(self) -> bool:
         return self._q.empty()
 
     def qsize(self) -> int:
-        return self._q.qsize() 
\ No newline at end of file
+        return self._q.qsize()
@@ -2,14 +2,19 @@ import threading
 import time
 from typing import Optional, Callable, List
 
-from .state import MachineState
+from .state import MachineState, _merge
 from ..transport.airbrush_transport import AirbrushTransport
 from .events import StateUpdatedEvent
+from .object_model import ObjectModelMirror, SECTION_KEYS
 from .sequencer import RequestSequencer, Request, Priority, RequestKind
 from .sequencer import HttpQuerySpec, SerialQuerySpec
 
 
 class StatusPoller:
+    # Live values change without bumping seqs, so they are still polled by key
+    _LIVE_MOTION_KEYS = ("move.axes[].userPosition", "sensors.endstops[].triggered")
+    _LIVE_MEDIUM_KEYS = ("boards[].vIn.current", "boards[].mcuTemp.current", "sensors.endstops[].triggered")
+
     def __init__(
         self,
         sequencer: RequestSequencer,
@@ -33,6 +38,12 @@ class StatusPoller:
         self._last_medium: float = 0.0
         self._last_slow: float = 0.0
         self._last_full: float = 0.0
+        # Object model mirror: seqs tell which sections changed, so an idle machine only
+        # costs the seqs and live-value requests. None until the first seqs reply.
+        self.mirror = ObjectModelMirror()
+        self._use_mirror: Optional[bool] = None
+        self._mirror_lock = threading.Lock()
+        self._mirror_in_flight: set = set()
 
     def start(self) -> None:
         if self._thread and self._thread.is_alive():
@@ -46,103 +57,163 @@ class StatusPoller:
         if self._thread:
             self._thread.join(timeout=1.0)
 
-    def _submit_query(self, spec, priority: Priority, coalesce_key: str) -> None:
+    @staticmethod
+    def _result_of(data) -> object:
+        import json
+        raw = None
+        if isinstance(data, str):
+            txt = data.strip()
+            if "{" in txt and "}" in txt:
+                txt = txt[txt.find("{") : txt.rfind("}") + 1]
+            try:
+                raw = json.loads(txt)
+            except Exception:
+                raw = {}
+        elif isinstance(data, dict):
+            raw = data
+        return raw.get("result") if isinstance(raw, dict) else None
+
+    @staticmethod
+    def _patch_for(key: Optional[str], result) -> dict:
+        patch = {"raw_status": {"raw": {}}}
+        if key == "move.axes[].userPosition" and isinstance(result, list):
+            # Store logical/user coordinates and also mirror to coords.machine for UI compatibility
+            patch.setdefault("coords", {})["user_position"] = result
+            patch["raw_status"]["raw"].setdefault("coords", {})["userPosition"] = result
+            # Mirror to legacy keys so UI shows logical coords
+            patch["raw_status"]["raw"].setdefault("coords", {})["machine"] = result
+        elif key == "move.axes[].machinePosition" and isinstance(result, list):
+            patch.setdefault("coords", {})["machine_position"] = result
+            patch["raw_status"]["raw"].setdefault("coords", {})["machine"] = result
+        elif key == "move.queue[].gcodeLength" and isinstance(result, list) and result:
+            # Size of the main movement queue; Dispatcher flow control is clipped to it
+            patch["planner"] = {"gcode_length": result[0]}
+        elif key == "state.status" and (isinstance(result, str) or result is None):
+            patch.setdefault("firmware", {})["status"] = result
+        elif key == "move.axes[].homed" and isinstance(result, list):
+            patch.setdefault("homed", {})["axes"] = result
+            patch["raw_status"]["raw"].setdefault("coords", {})["axesHomed"] = result
+        elif key == "state.currentTool" and (isinstance(result, int) or result is None):
+            patch["raw_status"]["raw"]["currentTool"] = result
+        elif key == "sensors.endstops[].triggered" and isinstance(result, list):
+            ends = {}
+            for idx, val in enumerate(result):
+                try:
+                    axis = ["X","Y","Z","U","V"][idx]
+                except Exception:
+                    axis = str(idx)
+                ends[axis] = 1 if val else 0
+            patch.setdefault("endstops", {}).update(ends)
+        elif key == "boards[].vIn.current" and (isinstance(result, (int, float, list))):
+            vin = None
+            if isinstance(result, list) and result:
+                vin = result[0]
+            elif isinstance(result, (int, float)):
+                vin = result
+            if vin is not None:
+                patch.setdefault("diagnostics", {})["vin"] = float(vin)
+        elif key == "boards[].mcuTemp.current" and (isinstance(result, (int, float, list))):
+            mcu = None
+            if isinstance(result, list) and result:
+                mcu = result[0]
+            elif isinstance(result, (int, float)):
+                mcu = result
+            if mcu is not None:
+                patch.setdefault("diagnostics", {})["mcu_temp_c"] = float(mcu)
+        return patch
+
+    def _apply_patch(self, patch: dict) -> None:
+        self.state.apply_patch(patch)
+        self.emit(StateUpdatedEvent(state=self.state.snapshot()))
+
+    @staticmethod
+    def _model_key(spec) -> Optional[str]:
+        # Object model key a query spec reads: rr_model's key param, or M409's K"..." / K'...'
+        if isinstance(spec, HttpQuerySpec):
+            return spec.params.get("key")
+        if isinstance(spec, SerialQuerySpec):
+            cmd = spec.command
+            for quote in ('"', "'"):
+                if f"K{quote}" in cmd:
+                    return cmd.split(f"K{quote}", 1)[1].split(quote, 1)[0]
+        return None
+
+    @classmethod
+    def _coalesce_key(cls, tier: str, spec) -> str:
+        # One key per spec: polls of the same value replace each other, different values never do
+        key = cls._model_key(spec)
+        if key is None:
+            key = spec.command.strip() if isinstance(spec, SerialQuerySpec) else repr(spec)
+        return f"{tier}:{key}"
+
+    def _submit_query(self, spec, priority: Priority, coalesce_key: str, on_result: Optional[Callable] = None) -> None:
         def on_complete(res):
             if not res or not res.ok or res.data is None:
+                if on_result:
+                    on_result(False, None)
                 return
             try:
-                data = res.data
-                if isinstance(spec, HttpQuerySpec):
-                    key = spec.params.get("key")
-                elif isinstance(spec, SerialQuerySpec):
-                    cmd = spec.command
-                    key = None
-                    if 'K"' in cmd or "K'" in cmd:
-                        try:
-                            # Extract key after K"..." or K'...'
-                            if 'K"' in cmd:
-                                key = cmd.split('K"', 1)[1].split('"', 1)[0]
-                            else:
-                                key = cmd.split("K'", 1)[1].split("'", 1)[0]
-                        except Exception:
-                            key = None
-                else:
-                    key = None
-                import json
-                raw = None
-                if isinstance(data, str):
-                    txt = data.strip()
-                    if "{" in txt and "}" in txt:
-                        txt = txt[txt.find("{") : txt.rfind("}") + 1]
-                    try:
-                        raw = json.loads(txt)
-                    except Exception:
-                        raw = {}
-                elif isinstance(data, dict):
-                    raw = data
-                result = raw.get("result") if isinstance(raw, dict) else None
-                patch = {"raw_status": {"raw": {}}}
-                if key == "move.axes[].userPosition" and isinstance(result, list):
-                    # Store logical/user coordinates and also mirror to coords.machine for UI compatibility
-                    patch.setdefault("coords", {})["user_position"] = result
-                    patch["raw_status"]["raw"].setdefault("coords", {})["userPosition"] = result
-                    # Mirror to legacy keys so UI shows logical coords
-                    patch["raw_status"]["raw"].setdefault("coords", {})["machine"] = result
-                elif key == "move.axes[].machinePosition" and isinstance(result, list):
-                    patch.setdefault("coords", {})["machine_position"] = result
-                    patch["raw_status"]["raw"].setdefault("coords", {})["machine"] = result
-                elif key == "state.status" and (isinstance(result, str) or result is None):
-                    patch.setdefault("firmware", {})["status"] = result
-                elif key == "move.axes[].homed" and isinstance(result, list):
-                    patch.setdefault("homed", {})["axes"] = result
-                    patch["raw_status"]["raw"].setdefault("coords", {})["axesHomed"] = result
-                elif key == "state.currentTool" and (isinstance(result, int) or result is None):
-                    patch["raw_status"]["raw"]["currentTool"] = result
-                elif key == "sensors.endstops[].triggered" and isinstance(result, list):
-                    ends = {}
-                    for idx, val in enumerate(result):
-                        try:
-                            axis = ["X","Y","Z","U","V"][idx]
-                        except Exception:
-                            axis = str(idx)
-                        ends[axis] = 1 if val else 0
-                    patch.setdefault("endstops", {}).update(ends)
-                elif key == "boards[].vIn.current" and (isinstance(result, (int, float, list))):
-                    vin = None
-                    if isinstance(result, list) and result:
-                        vin = result[0]
-                    elif isinstance(result, (int, float)):
-                        vin = result
-                    if vin is not None:
-                        patch.setdefault("diagnostics", {})["vin"] = float(vin)
-                elif key == "boards[].mcuTemp.current" and (isinstance(result, (int, float, list))):
-                    mcu = None
-                    if isinstance(result, list) and result:
-                        mcu = result[0]
-                    elif isinstance(result, (int, float)):
-                        mcu = result
-                    if mcu is not None:
-                        patch.setdefault("diagnostics", {})["mcu_temp_c"] = float(mcu)
-                if patch:
-                    snap = self.state.snapshot().get("observed", {})
-                    merged = dict(snap)
-                    def deep_merge(a, b):
-                        if not isinstance(a, dict) or not isinstance(b, dict):
-                            return b
-                        out = dict(a)
-                        for k, v in b.items():
-                            out[k] = deep_merge(out.get(k, {}), v) if isinstance(v, dict) else v
-                        return out
-                    merged = deep_merge(merged, patch)
-                    self.state.update_observed(merged)
-                    self.emit(StateUpdatedEvent(state=self.state.snapshot()))
+                result = self._result_of(res.data)
+                if on_result:
+                    on_result(True, result)
+                    return
+                key = self._model_key(spec)
+                if key and self._use_mirror:
+                    self.mirror.set(key, result)
+                self._apply_patch(self._patch_for(key, result))
             except Exception:
                 return
 
-        req = Request(kind=RequestKind.QUERY, priority=priority, payload=spec, timeout_s=2.0, on_complete=on_complete)
+        # A reply older than the next poll of the same key is of no use, so the learned
+        # timeout is not cut below the fast interval
+        timeout_s = max(self.interval_fast, self.sequencer.timeout_for(spec, 2.0))
+        req = Request(kind=RequestKind.QUERY, priority=priority, payload=spec, timeout_s=timeout_s, on_complete=on_complete)
         req.coalesce_key = coalesce_key
         self.sequencer.submit(req)
 
+    def _submit_model(self, key: str, flags: Optional[str], on_result: Callable) -> None:
+        # Mirror requests are tracked so a slow link never has the same fetch queued twice
+        with self._mirror_lock:
+            if key in self._mirror_in_flight:
+                return
+            self._mirror_in_flight.add(key)
+
+        def done(ok, result):
+            with self._mirror_lock:
+                self._mirror_in_flight.discard(key)
+            if ok:
+                on_result(result)
+
+        params = {"key": key}
+        if flags:
+            params["flags"] = flags
+        self._submit_query(HttpQuerySpec(endpoint="rr_model", params=params), Priority.MEDIUM, f"mirror:{key}", on_result=done)
+
+    def _poll_seqs(self) -> None:
+        def on_seqs(result):
+            if not isinstance(result, dict):
+                # Firmware without seqs (RRF 2): stay on tiered key polling
+                self._use_mirror = False
+                return
+            self._use_mirror = True
+            for section in self.mirror.stale_sections(result):
+                self._submit_model(section, "d99v", lambda res, s=section, n=result.get(section): self._on_section(s, n, res))
+
+        self._submit_model("seqs", None, on_seqs)
+
+    def _on_section(self, section: str, seq, result) -> None:
+        if result is None:
+            return
+        self.mirror.apply_section(section, result, seq)
+        patch: dict = {}
+        for key in SECTION_KEYS.get(section, ()):
+            patch = _merge(patch, self._patch_for(key, self.mirror.get(key)))
+        if patch:
+            self._apply_patch(patch)
+
+    def _machine_idle(self) -> bool:
+        return self.mirror.get("state.status") in ("idle", "I")
+
     def _run(self) -> None:
         # Build tiered sets of queries
         http_fast = [
@@ -163,6 +234,7 @@ class StatusPoller:
             HttpQuerySpec(endpoint="rr_model", params={"key": "move.axes[].userPosition", "flags": "f"}),
             HttpQuerySpec(endpoint="rr_model", params={"key": "move.axes[].homed"}),
             HttpQuerySpec(endpoint="rr_model", params={"key": "sensors.endstops[].triggered", "flags": "f"}),
+            HttpQuerySpec(endpoint="rr_model", params={"key": "move.queue[].gcodeLength"}),
         ]
         serial_fast = [
             SerialQuerySpec('M409 K"move.axes[].userPosition" F"f"'),
@@ -181,10 +253,14 @@ class StatusPoller:
             SerialQuerySpec('M409 K"move.axes[].userPosition" F"f"'),
             SerialQuerySpec('M409 K"move.axes[].homed"'),
             SerialQuerySpec('M409 K"sensors.endstops[].triggered" F"f"'),
+            SerialQuerySpec('M409 K"move.queue[].gcodeLength"'),
         ]
         # Detect if HTTP rr_model is available; if not, use serial specs directly
         def http_available() -> bool:
             try:
+                if self.sequencer.query_lane is not None:
+                    # Dual link: rr_model reads go over HTTP while commands use serial
+                    return True
                 inner = getattr(self.sequencer.transport, 'transport', self.sequencer.transport)
                 inner2 = getattr(inner, 'transport', inner)
                 return callable(getattr(inner2, 'get_model', None))
@@ -194,10 +270,20 @@ class StatusPoller:
             now = time.time()
             # Fast tier (250ms)
             if now - self._last_fast >= self.interval_fast:
-                specs = http_fast if http_available() else serial_fast
+                use_http = http_available()
+                if use_http and self._use_mirror is not False:
+                    self._poll_seqs()
+                if use_http and self._use_mirror:
+                    # Sections come from the mirror; only live values are polled, and
+                    # positions/endstops only while the machine is doing something
+                    specs = [spec for spec in http_fast if spec.params.get("key") == "state.status"]
+                    if not self._machine_idle():
+                        specs += [spec for spec in http_fast if spec.params.get("key") in self._LIVE_MOTION_KEYS]
+                else:
+                    specs = http_fast if use_http else serial_fast
                 for spec in specs:
                     # Promote critical keys to MEDIUM priority so they run even during paused low-tier
-                    key = spec.params.get("key") if isinstance(spec, HttpQuerySpec) else None
+                    key = self._model_key(spec)
                     critical = {
                         "move.axes[].userPosition",
                         "state.status",
@@ -205,22 +291,23 @@ class StatusPoller:
                         "sensors.endstops[].triggered",
                     }
                     prio = Priority.MEDIUM if key in critical else Priority.LOW
-                    co_key = key if key else "fast"
-                    self._submit_query(spec, prio, coalesce_key=f"fast:{co_key}")
+                    self._submit_query(spec, prio, coalesce_key=self._coalesce_key("fast", spec))
                 self._last_fast = now
             # Medium tier (2.5s)
             if now - self._last_medium >= self.interval_medium:
-                specs = http_medium if http_available() else serial_medium
+                if http_available() and self._use_mirror:
+                    specs = [spec for spec in http_medium + http_fast if spec.params.get("key") in self._LIVE_MEDIUM_KEYS]
+                else:
+                    specs = http_medium if http_available() else serial_medium
                 for spec in specs:
-                    key = spec.params.get("key") if isinstance(spec, HttpQuerySpec) else "medium"
-                    self._submit_query(spec, Priority.MEDIUM, coalesce_key=f"medium:{key}")
+                    self._submit_query(spec, Priority.MEDIUM, coalesce_key=self._coalesce_key("medium", spec))
                 self._last_medium = now
             # Full refresh (5s)
             if now - self._last_full >= self.interval_full:
-                specs = http_full if http_available() else serial_full
+                # The mirror already tracks every section, so the full refresh is redundant
+                specs = [] if self._use_mirror else (http_full if http_available() else serial_full)
                 for spec in specs:
-                    key = spec.params.get("key") if isinstance(spec, HttpQuerySpec) else "full"
                     # Ensure these run even if low/background paused
-                    self._submit_query(spec, Priority.MEDIUM, coalesce_key=f"full:{key}")
+                    self._submit_query(spec, Priority.MEDIUM, coalesce_key=self._coalesce_key("full", spec))
                 self._last_full = now
             time.sleep(0.01) 
\ No newline at end of file
@@ -1,3 +1,4 @@
-from .request import Request, Result, Priority, RequestKind
+from .request import Request, Result, Priority, RequestKind, CommandGroup
 from .sequencer import RequestSequencer
+from .latency import LatencyTracker
 from .transport_strategy import HttpQuerySpec, SerialQuerySpec, TransportStrategy 
\ No newline at end of file
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import math
+import threading
+from collections import deque
+from typing import Deque, Dict, Hashable, Optional
+
+
+class LatencyTracker:
+    """
+    Rolling latency samples per command class, used to derive timeouts.
+
+    Each key (for example ``("serial", "G1")``) keeps its last ``window``
+    latencies. Once a key has ``min_samples`` of them its timeout is
+    ``percentile`` of the samples times ``margin``, never below ``floor_s`` and
+    never above the caller's default; until then the default is used as is.
+    A request that times out should be recorded with its timeout, so a class
+    that got slower widens its own timeout instead of failing repeatedly.
+    """
+
+    def __init__(self, window: int = 200, percentile: float = 0.99, margin: float = 3.0,
+                 floor_s: float = 0.05, min_samples: int = 20) -> None:
+        self.window = max(1, int(window))
+        self.percentile = float(percentile)
+        self.margin = float(margin)
+        self.floor_s = float(floor_s)
+        self.min_samples = max(1, int(min_samples))
+        self._samples: Dict[Hashable, Deque[float]] = {}
+        # Percentile per key, recomputed on the next read after a new sample
+        self._cached: Dict[Hashable, float] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: Hashable, latency_s: float) -> None:
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self.window)
+            samples.append(max(0.0, float(latency_s)))
+            self._cached.pop(key, None)
+
+    def quantile(self, key: Hashable, q: Optional[float] = None) -> Optional[float]:
+        """Latency at quantile q (default: the tracker's percentile), or None below min_samples."""
+        with self._lock:
+            samples = self._samples.get(key)
+            if not samples or len(samples) < self.min_samples:
+                return None
+            if q is None and key in self._cached:
+                return self._cached[key]
+            ordered = sorted(samples)
+            value = ordered[min(len(ordered) - 1, max(0, math.ceil((self.percentile if q is None else q) * len(ordered)) - 1))]
+            if q is None:
+                self._cached[key] = value
+            return value
+
+    def timeout_for(self, key: Hashable, default_s: float, extra_s: float = 0.0) -> float:
+        """
+        Timeout for the next request of a class.
+
+        Args:
+            key: Command class key
+            default_s: Timeout used until enough samples exist; also the upper bound
+            extra_s: Added on top, e.g. the predicted duration of a move
+
+        Returns:
+            float: Timeout in seconds
+        """
+        learned = self.quantile(key)
+        if learned is None:
+            return default_s + extra_s
+        return min(default_s, max(self.floor_s, learned * self.margin)) + extra_s
+
+    def stats(self) -> Dict[Hashable, Dict[str, float]]:
+        """Sample count, median and timeout percentile per key."""
+        with self._lock:
+            keys = list(self._samples)
+        out = {}
+        for key in keys:
+            with self._lock:
+                n = len(self._samples[key])
+            out[key] = {"n": n, "p50": self.quantile(key, 0.5), "p": self.quantile(key)}
+        return out
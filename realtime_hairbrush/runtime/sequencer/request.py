@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Callable, Optional, Set
+from typing import Any, Callable, List, Optional, Set
 import time
 import uuid
 
@@ -29,6 +29,10 @@ class Result:
     started_at_s: float = field(default_factory=time.time)
     finished_at_s: float = field(default=0.0)
 
+    @property
+    def latency_s(self) -> float:
+        return max(0.0, self.finished_at_s - self.started_at_s) if self.finished_at_s else 0.0
+
 
 @dataclass
 class Request:
@@ -49,4 +53,22 @@ class Request:
 
     def with_coalesce_key(self, key: str) -> "Request":
         self.coalesce_key = key
-        return self 
\ No newline at end of file
+        return self 
+
+
+@dataclass
+class CommandGroup:
+    """
+    Payload for a COMMAND request that runs several commands back to back.
+
+    The sequencer executes the whole group as one scheduled unit, so nothing
+    else is sent between its commands. With ``batch`` set, consecutive commands
+    that neither block nor run long are written with the transport's
+    stream_lines instead of one round-trip each. The group's Result carries one
+    Result per command in ``data``.
+    """
+    requests: List[Request]
+    batch: bool = True
+
+    def __str__(self) -> str:
+        return "\n".join(str(r.payload) for r in self.requests)
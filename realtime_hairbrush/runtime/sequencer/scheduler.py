@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from .request import Request, Priority, RequestKind
+
+
+# Lower rank runs first
+PRIORITY_RANK = {Priority.HIGH: 0, Priority.MEDIUM: 1, Priority.LOW: 2, Priority.BACKGROUND: 3}
+
+# Status-update priorities; these are held back while updates are paused
+UPDATE_PRIORITIES = (Priority.LOW, Priority.BACKGROUND)
+
+# Default bound on queued queries per priority
+DEFAULT_MAX_DEPTH = 64
+
+
+class RequestScheduler:
+    """
+    Heap of pending requests ordered by priority, age and deadline.
+
+    Each request is keyed on ``created_at_s + rank * aging_s``, so requests of one
+    priority stay FIFO while a request that has waited ``aging_s`` seconds runs
+    ahead of newer work one level above it; nothing starves under load. Ties
+    are broken by deadline (``created_at_s + timeout_s``).
+
+    Queries with a ``coalesce_key`` replace the pending query with the same key
+    at any priority (latest wins). Queries are bounded to ``max_depth`` per
+    priority; past that the oldest query at that priority is evicted and counted
+    in ``overflow``. Queries whose deadline has passed are dropped when they
+    reach the front instead of being sent. Commands are never coalesced, dropped
+    or evicted: skipping one would change what the machine does.
+
+    Not thread-safe; RequestSequencer calls it under its own lock.
+    """
+
+    def __init__(self, aging_s: float = 1.0, max_depth: Optional[int] = DEFAULT_MAX_DEPTH) -> None:
+        self.aging_s = float(aging_s)
+        self.max_depth = max_depth
+        # Separate heaps so status updates can be skipped while paused
+        self._heaps: Dict[bool, list] = {False: [], True: []}
+        self._coalesced: Dict[str, list] = {}
+        self._depth: Dict[Priority, int] = {p: 0 for p in PRIORITY_RANK}
+        # Queued queries per priority in arrival order, for evicting the oldest
+        self._queries: Dict[Priority, deque] = {p: deque() for p in PRIORITY_RANK}
+        self._query_depth: Dict[Priority, int] = {p: 0 for p in PRIORITY_RANK}
+        self._counter = itertools.count()
+        self.dropped_expired = 0
+        self.coalesced = 0
+        self.overflow: Dict[Priority, int] = {p: 0 for p in PRIORITY_RANK}
+
+    def __len__(self) -> int:
+        return sum(self._depth.values())
+
+    def depths(self) -> Dict[Priority, int]:
+        return dict(self._depth)
+
+    def push(self, req: Request) -> Tuple[List[Request], Optional[Request]]:
+        """
+        Queue a request.
+
+        Returns:
+            (queries evicted because their priority was full, the pending query
+            this one replaced by coalescing or None)
+        """
+        replaced: Optional[Request] = None
+        base = req.created_at_s
+        key = req.coalesce_key if req.kind != RequestKind.COMMAND else None
+        if key:
+            old = self._coalesced.get(key)
+            if old is not None and old[3] is not None:
+                # Replace the pending request but keep its place in line
+                base = old[0] - PRIORITY_RANK[old[3].priority] * self.aging_s
+                replaced = old[3]
+                self._remove(old)
+                self.coalesced += 1
+        entry = [base + PRIORITY_RANK[req.priority] * self.aging_s, req.created_at_s + req.timeout_s, next(self._counter), req]
+        heapq.heappush(self._heaps[req.priority in UPDATE_PRIORITIES], entry)
+        self._depth[req.priority] += 1
+        if key:
+            self._coalesced[key] = entry
+
+        evicted: List[Request] = []
+        if req.kind == RequestKind.QUERY:
+            queries = self._queries[req.priority]
+            queries.append(entry)
+            self._query_depth[req.priority] += 1
+            while self.max_depth is not None and self._query_depth[req.priority] > self.max_depth:
+                oldest = queries.popleft()
+                if oldest[3] is None:
+                    continue
+                evicted.append(oldest[3])
+                self.overflow[req.priority] += 1
+                self._remove(oldest)
+        return evicted, replaced
+
+    def _remove(self, entry: list) -> None:
+        # Lazy removal: the heap and arrival-order entries are skipped once cleared
+        req = entry[3]
+        self._depth[req.priority] -= 1
+        if req.kind == RequestKind.QUERY:
+            self._query_depth[req.priority] -= 1
+            queries = self._queries[req.priority]
+            while queries and (queries[0] is entry or queries[0][3] is None):
+                queries.popleft()
+        if req.coalesce_key and self._coalesced.get(req.coalesce_key) is entry:
+            del self._coalesced[req.coalesce_key]
+        entry[3] = None
+
+    def clear(self) -> List[Request]:
+        """Remove every queued request and return them in scheduling order."""
+        entries = sorted(e for heap in self._heaps.values() for e in heap if e[3] is not None)
+        self._heaps = {False: [], True: []}
+        self._coalesced.clear()
+        self._depth = {p: 0 for p in PRIORITY_RANK}
+        self._queries = {p: deque() for p in PRIORITY_RANK}
+        self._query_depth = {p: 0 for p in PRIORITY_RANK}
+        return [e[3] for e in entries]
+
+    def pop(self, include_updates: bool = True, now: Optional[float] = None) -> Tuple[Optional[Request], List[Request]]:
+        """
+        Remove the next request to run.
+
+        Returns:
+            (request or None, expired queries dropped on the way)
+        """
+        now = time.time() if now is None else now
+        expired: List[Request] = []
+        while True:
+            heap = self._front(include_updates)
+            if heap is None:
+                return None, expired
+            entry = heapq.heappop(heap)
+            req = entry[3]
+            self._remove(entry)
+            if req.kind == RequestKind.QUERY and entry[1] < now:
+                self.dropped_expired += 1
+                expired.append(req)
+                continue
+            return req, expired
+
+    def _front(self, include_updates: bool) -> Optional[list]:
+        best = None
+        for is_update, heap in self._heaps.items():
+            if is_update and not include_updates:
+                continue
+            # Discard entries replaced by coalescing
+            while heap and heap[0][3] is None:
+                heapq.heappop(heap)
+            if heap and (best is None or heap[0][:3] < best[0][:3]):
+                best = heap
+        return best
@@ -1,14 +1,17 @@
 from __future__ import annotations
 
-import queue
+import asyncio
 import threading
 import time
-from typing import Callable, Dict, Optional
-import uuid
+from concurrent.futures import Future, wait as _wait_futures
+from typing import Callable, Dict, Iterable, List, Optional
 
-from .request import Request, Result, Priority, RequestKind
+from semantic_gcode.transport.framing import RRF_FRAMER
+from .request import Request, Result, Priority, RequestKind, CommandGroup
+from .scheduler import RequestScheduler, DEFAULT_MAX_DEPTH, PRIORITY_RANK
+from .latency import LatencyTracker
 from .transport_strategy import HttpQuerySpec, SerialQuerySpec
-from ..events import SentEvent, ReceivedEvent, AckEvent, UpdatesPausedEvent, UpdatesResumedEvent
+from ..events import SentEvent, ReceivedEvent, AckEvent, UpdatesPausedEvent, UpdatesResumedEvent, QueueOverflowEvent
 try:
     from ..transport.logging_wrapper import log_note as _log_note
 except Exception:
@@ -17,38 +20,255 @@ except Exception:
 
 
 class RequestSequencer:
-    def __init__(self, transport, on_event: Optional[Callable[[object], None]] = None) -> None:
+    def __init__(self, transport, on_event: Optional[Callable[[object], None]] = None, aging_s: float = 1.0,
+                 max_queue_depth: Optional[int] = DEFAULT_MAX_DEPTH, cache_ttl_s: float = 0.1,
+                 latency: Optional[LatencyTracker] = None) -> None:
         self.transport = transport
         self.on_event = on_event or (lambda e: None)
-        self._queues: Dict[Priority, "queue.Queue[Request]"] = {
-            Priority.HIGH: queue.Queue(),
-            Priority.MEDIUM: queue.Queue(),
-            Priority.LOW: queue.Queue(),
-            Priority.BACKGROUND: queue.Queue(),
-        }
-        self._coalesce: Dict[str, Request] = {}
+        self._scheduler = RequestScheduler(aging_s=aging_s, max_depth=max_queue_depth)
+        # Guards the scheduler; the worker waits on it while there is nothing to run
+        self._cond = threading.Condition()
         self._stop = threading.Event()
         self._worker: Optional[threading.Thread] = None
         self._paused_updates: bool = False
         self._pause_depth: int = 0
+        # Queries dropped by the scheduler as (request, reason), completed by the worker outside the lock
+        self._dropped: list = []
+        # Requests replaced by coalescing, keyed by the id of the request that replaced them
+        self._followers: Dict[str, list] = {}
+        # Futures returned by submit(), keyed by request id
+        self._futures: Dict[str, Future] = {}
+        # Single-flight: identical queries share the queued/running request, and a
+        # result younger than cache_ttl_s is served without touching the link
+        self.cache_ttl_s = float(cache_ttl_s)
+        self._inflight: Dict[tuple, Request] = {}
+        self._cache: Dict[tuple, Result] = {}
+        self._running: Optional[Request] = None
+        self._shared = 0
+        self._cache_hits = 0
+        # Bumped by cancel_pending() so a running command group stops early
+        self._epoch = 0
+        self._cancel_reason = "cancelled"
+        # Observed latency per (link, command class); timeout_for() derives timeouts from it
+        self.latency = latency or LatencyTracker()
+        # Split plane: with a separate query link (AirbrushTransport.query_transport) object
+        # model queries get their own sequencer and worker, so they neither wait behind
+        # commands nor are paused by them
+        self._aging_s = aging_s
+        self._max_queue_depth = max_queue_depth
+        self.query_lane: Optional["RequestSequencer"] = None
 
     def start(self) -> None:
         if self._worker and self._worker.is_alive():
             return
         self._stop.clear()
+        query_link = getattr(self.transport, 'query_transport', None)
+        if query_link is not None and self.query_lane is None:
+            self.query_lane = RequestSequencer(transport=query_link, on_event=self.on_event, aging_s=self._aging_s,
+                                               max_queue_depth=self._max_queue_depth, cache_ttl_s=self.cache_ttl_s,
+                                               latency=self.latency)
+        if self.query_lane is not None:
+            self.query_lane.start()
         self._worker = threading.Thread(target=self._run, daemon=True)
         self._worker.start()
 
     def stop(self) -> None:
         self._stop.set()
+        self._wake()
+        if self.query_lane is not None:
+            self.query_lane.stop()
         if self._worker:
             self._worker.join(timeout=1.0)
+        # Nothing will complete what is still queued; release anyone waiting on it
+        with self._cond:
+            pending, self._futures = self._futures, {}
+        for fut in pending.values():
+            self._resolve(fut, Result(ok=False, error="sequencer stopped", finished_at_s=time.time()))
 
-    def submit(self, req: Request) -> None:
-        if req.priority in (Priority.LOW, Priority.BACKGROUND) and req.coalesce_key:
-            self._coalesce[req.coalesce_key] = req
+    def submit(self, req: Request) -> "Future[Result]":
+        """
+        Queue a request.
+
+        Returns:
+            Future[Result]: Resolves with the request's Result once it has run, been
+            answered from a shared or cached query, or been dropped
+        """
+        if self._on_query_lane(req):
+            return self.query_lane.submit(req)
+        fut: "Future[Result]" = Future()
+        with self._cond:
+            self._futures[req.id] = fut
+        self._enqueue(req)
+        return fut
+
+    def _on_query_lane(self, req: Request) -> bool:
+        return self.query_lane is not None and req.kind == RequestKind.QUERY and isinstance(req.payload, HttpQuerySpec)
+
+    def submit_async(self, req: Request) -> "asyncio.Future[Result]":
+        """Queue a request and return an awaitable for its Result (call from a running loop)."""
+        return asyncio.wrap_future(self.submit(req))
+
+    @staticmethod
+    def wait_all(futures: Iterable["Future[Result]"], timeout: Optional[float] = None) -> List[Result]:
+        """
+        Wait for a batch of submitted requests.
+
+        Args:
+            futures: Futures returned by submit()
+            timeout: Seconds to wait for the whole batch; None waits indefinitely
+
+        Returns:
+            List[Result]: Results in the order given; requests still pending at the
+            timeout are reported as failed Results
+        """
+        futures = list(futures)
+        _wait_futures(futures, timeout=timeout)
+        results = []
+        for fut in futures:
+            if fut.done() and not fut.cancelled():
+                results.append(fut.result())
+            else:
+                results.append(Result(ok=False, error="timed out waiting for result", finished_at_s=time.time()))
+        return results
+
+    def _enqueue(self, req: Request) -> None:
+        key = self._flight_key(req)
+        cached: Optional[Result] = None
+        with self._cond:
+            if key is not None:
+                cached = self._cache.get(key)
+                if cached is not None and time.time() - cached.finished_at_s <= self.cache_ttl_s:
+                    self._cache_hits += 1
+                else:
+                    cached = None
+                    leader = self._inflight.get(key)
+                    # Attach unless the pending leader would make this caller wait behind lower priority work
+                    if leader is not None and (leader is self._running or PRIORITY_RANK[leader.priority] <= PRIORITY_RANK[req.priority]):
+                        self._followers.setdefault(leader.id, []).append(req)
+                        self._shared += 1
+                        return
+            if cached is None:
+                evicted, replaced = self._scheduler.push(req)
+                if replaced is not None:
+                    # Whoever waited on the replaced query gets this one's result
+                    self._followers.setdefault(req.id, []).extend([replaced] + self._followers.pop(replaced.id, []))
+                    replaced_key = self._flight_key(replaced)
+                    if self._inflight.get(replaced_key) is replaced:
+                        del self._inflight[replaced_key]
+                if key is not None:
+                    self._inflight[key] = req
+                self._dropped.extend((old, "dropped: queue full") for old in evicted)
+                self._cond.notify()
+        if cached is not None:
+            self._complete(req, cached)
             return
-        self._queues[req.priority].put(req)
+        for old in evicted:
+            self._emit(QueueOverflowEvent(priority=old.priority.value, payload=str(old.payload), total=self._scheduler.overflow[old.priority]))
+
+    def cancel_pending(self, reason: str = "cancelled") -> int:
+        """
+        Fail every queued request without sending it.
+
+        A running command group stops before its next command. The request
+        currently on the wire is left to the transport (see emergency_stop).
+
+        Returns:
+            int: Number of queued requests cancelled
+        """
+        with self._cond:
+            self._epoch += 1
+            self._cancel_reason = reason
+            cancelled = self._scheduler.clear()
+            cancelled.extend(req for req, _ in self._dropped)
+            self._dropped = []
+            self._inflight = {k: r for k, r in self._inflight.items() if r is self._running}
+        now = time.time()
+        for req in cancelled:
+            self._complete(req, Result(ok=False, error=reason, finished_at_s=now))
+        if self.query_lane is not None:
+            return len(cancelled) + self.query_lane.cancel_pending(reason)
+        return len(cancelled)
+
+    def _link(self) -> str:
+        return "http" if callable(getattr(self._base_transport(), 'get_model', None)) else "serial"
+
+    @staticmethod
+    def command_class(payload) -> str:
+        """Class a payload's latency is tracked under: the command word, or the object model key."""
+        if isinstance(payload, HttpQuerySpec):
+            return f"{payload.endpoint}:{(payload.params or {}).get('key', '')}"
+        if isinstance(payload, SerialQuerySpec):
+            return payload.command.strip()
+        word = str(payload).split(';', 1)[0].strip().split(' ', 1)[0].upper()
+        # T0/T1/... behave alike
+        return "T" if word.startswith("T") else word
+
+    def timeout_for(self, payload, default_s: float, extra_s: float = 0.0) -> float:
+        """
+        Timeout for a request, from the latencies observed for its class on the current link.
+
+        Args:
+            payload: The request payload (G-code line or query spec)
+            default_s: Timeout used until enough samples exist, and the upper bound
+            extra_s: Added on top, e.g. the predicted duration of a move
+
+        Returns:
+            float: Timeout in seconds
+        """
+        if self.query_lane is not None and isinstance(payload, HttpQuerySpec):
+            return self.query_lane.timeout_for(payload, default_s, extra_s)
+        return self.latency.timeout_for((self._link(), self.command_class(payload)), default_s, extra_s)
+
+    def _observe(self, req: Request, res: Result) -> None:
+        if isinstance(req.payload, CommandGroup) or not res.started_at_s or not res.finished_at_s:
+            return
+        key = (self._link(), self.command_class(req.payload))
+        if res.ok:
+            self.latency.record(key, res.latency_s)
+        elif res.latency_s >= 0.9 * req.timeout_s:
+            # Timed out: count it at the timeout so the class's timeout widens
+            self.latency.record(key, req.timeout_s)
+
+    def queue_depths(self) -> Dict[Priority, int]:
+        with self._cond:
+            return self._scheduler.depths()
+
+    @property
+    def dropped_expired(self) -> int:
+        return self._scheduler.dropped_expired
+
+    def stats(self) -> Dict[str, object]:
+        """Queue depth per priority plus coalescing, overflow and expiry counters."""
+        with self._cond:
+            stats: Dict[str, object] = {
+                "depth": {p.value: n for p, n in self._scheduler.depths().items()},
+                "overflow": {p.value: n for p, n in self._scheduler.overflow.items()},
+                "coalesced": self._scheduler.coalesced,
+                "dropped_expired": self._scheduler.dropped_expired,
+                "shared": self._shared,
+                "cache_hits": self._cache_hits,
+            }
+        if self.query_lane is not None:
+            stats["query_lane"] = self.query_lane.stats()
+        return stats
+
+    @staticmethod
+    def _flight_key(req: Request) -> Optional[tuple]:
+        # Queries are shared only when every caller would get the same data back
+        if req.kind != RequestKind.QUERY or req.parse_response is not None:
+            return None
+        payload = req.payload
+        if isinstance(payload, HttpQuerySpec):
+            return ("http", payload.endpoint, tuple(sorted((payload.params or {}).items())))
+        if isinstance(payload, SerialQuerySpec):
+            return ("gcode", payload.command.strip())
+        if isinstance(payload, str) and payload.strip():
+            return ("gcode", payload.strip())
+        return None
+
+    def _wake(self) -> None:
+        with self._cond:
+            self._cond.notify_all()
 
     def pause_updates(self, reason: str = "") -> None:
         self._pause_depth += 1
@@ -62,6 +282,8 @@ class RequestSequencer:
         if self._pause_depth == 0 and self._paused_updates:
             self._paused_updates = False
             self._emit(UpdatesResumedEvent())
+            # Low/background work held back while paused is runnable again
+            self._wake()
 
     def _emit(self, e: object) -> None:
         try:
@@ -70,25 +292,20 @@ class RequestSequencer:
             pass
 
     def _next(self) -> Optional[Request]:
-        for prio in (Priority.HIGH, Priority.MEDIUM, Priority.LOW, Priority.BACKGROUND):
-            if prio in (Priority.LOW, Priority.BACKGROUND) and self._paused_updates:
-                continue
-            # drain coalesced first for low/background
-            if prio in (Priority.LOW, Priority.BACKGROUND) and self._coalesce:
-                _, req = self._coalesce.popitem()
-                return req
-            q = self._queues[prio]
-            try:
-                return q.get_nowait()
-            except queue.Empty:
-                continue
-        return None
+        req, expired = self._scheduler.pop(include_updates=not self._paused_updates)
+        self._dropped.extend((req, "expired before it was sent") for req in expired)
+        return req
+
+    def _base_transport(self):
+        # Unwrap AirbrushTransport (.transport) and LoggingTransport (.inner)
+        inner = getattr(self.transport, 'transport', self.transport)
+        return getattr(inner, 'inner', inner)
 
     def _execute(self, req: Request) -> Result:
+        if isinstance(req.payload, CommandGroup):
+            return self._execute_group(req)
         # Determine transport capabilities
-        inner = getattr(self.transport, 'transport', self.transport)
-        inner2 = getattr(inner, 'transport', inner)
-        is_http = callable(getattr(inner2, 'get_model', None))
+        is_http = callable(getattr(self._base_transport(), 'get_model', None))
         is_serial = not is_http
         # Pause background polling for long running commands, and for ANY serial command to avoid interleaving
         if req.kind == RequestKind.COMMAND and (("LongRunning" in (req.side_effects or set())) or is_serial):
@@ -101,38 +318,28 @@ class RequestSequencer:
                 self._emit(SentEvent(line=req.payload))
             if req.kind == RequestKind.COMMAND:
                 if req.expects_ack and is_serial:
-                    # Tagged ack using M118 to disambiguate 'ok'
-                    tag = f"AB#{uuid.uuid4().hex[:8]}"
-                    deadline = start + max(2.0, min(45.0, req.timeout_s or 10.0))
+                    # Single round-trip ack: the command's own 'ok', matched by line
+                    # number and checksum when the link supports it
+                    _log_note(f"SEND {req.payload}")
                     try:
-                        # Send main command (logged by transport)
-                        _log_note(f"SEND {req.payload}")
-                        _ = self.transport.query(req.payload)
-                        # Send tag marker
-                        tok_line = f'M118 S"{tag}"'
-                        _log_note(f"TAG EMIT {tag}")
-                        _ = self.transport.query(tok_line)
+                        numbered = getattr(self.transport, 'send_numbered', None)
+                        supported = getattr(self.transport, 'supports_numbered_ack', None)
+                        if callable(numbered) and (not callable(supported) or supported()):
+                            data = numbered(req.payload, timeout=req.timeout_s)
+                        else:
+                            data = self.transport.query(req.payload)
+                            if data is None:
+                                raise RuntimeError(getattr(self.transport, "_last_error", None) or "No response")
                     except Exception as e:
                         return Result(ok=False, error=str(e), started_at_s=start, finished_at_s=time.time())
-                    # Poll using a light probe until we see the tag
-                    interval = 0.08
-                    saw_tag = False
-                    last_err = None
-                    while time.time() < deadline:
-                        try:
-                            resp = self.transport.query("M408 S0")
-                            if isinstance(resp, str) and resp:
-                                if tag in resp:
-                                    _log_note(f"TAG SEEN {tag}")
-                                    saw_tag = True
-                                    break
-                        except Exception as e:
-                            last_err = str(e)
-                        time.sleep(interval)
-                        interval = min(0.5, interval * 1.5)
-                    if not saw_tag:
-                        return Result(ok=False, error=last_err or "Ack timeout", started_at_s=start, finished_at_s=time.time())
-                    return Result(ok=True, data=None, error=None, started_at_s=start, finished_at_s=time.time())
+                    finished = time.time()
+                    _log_note(f"ACK {req.payload} {int((finished - start) * 1000)}ms")
+                    if isinstance(data, str) and data:
+                        self._emit(ReceivedEvent(line=data))
+                    error = self._error_line(data)
+                    if error:
+                        return Result(ok=False, data=data, error=error, started_at_s=start, finished_at_s=finished)
+                    return Result(ok=True, data=data, error=None, started_at_s=start, finished_at_s=finished)
                 elif req.expects_ack:
                     # HTTP or non-serial path: rely on transport query response
                     data = self.transport.query(req.payload)
@@ -144,9 +351,7 @@ class RequestSequencer:
             elif req.kind == RequestKind.QUERY:
                 if isinstance(req.payload, HttpQuerySpec):
                     # Prefer HTTP rr_model when available; otherwise fall back to serial M409
-                    inner = getattr(self.transport, 'transport', self.transport)
-                    inner2 = getattr(inner, 'transport', inner)
-                    getter = getattr(inner2, 'get_model', None)
+                    getter = getattr(self._base_transport(), 'get_model', None)
                     used_http = False
                     if callable(getter):
                         try:
@@ -179,18 +384,142 @@ class RequestSequencer:
             if req.kind == RequestKind.COMMAND and (("LongRunning" in (req.side_effects or set())) or is_serial):
                 self.resume_updates()
 
+    @staticmethod
+    def _batchable(req: Request) -> bool:
+        # Lines whose ack may take longer than the link timeout are sent on their own
+        return req.kind == RequestKind.COMMAND and isinstance(req.payload, str) and not ({"LongRunning", "Blocking"} & (req.side_effects or set()))
+
+    def _execute_group(self, req: Request) -> Result:
+        group: CommandGroup = req.payload
+        subs = group.requests
+        streamer = getattr(self.transport, 'stream_lines', None)
+        start = time.time()
+        epoch = self._epoch
+        results: List[Result] = []
+        # Status updates wait until the whole group is on the wire
+        self.pause_updates("Group")
+        try:
+            i = 0
+            while i < len(subs) and all(r.ok for r in results) and self._epoch == epoch:
+                run = 1
+                if group.batch and callable(streamer):
+                    run = 0
+                    while i + run < len(subs) and self._batchable(subs[i + run]):
+                        run += 1
+                if run > 1:
+                    batch = self._stream(subs[i:i + run])
+                else:
+                    run = 1
+                    batch = [self._execute(subs[i])]
+                    self._observe(subs[i], batch[0])
+                for sub, res in zip(subs[i:i + run], batch):
+                    if sub.expects_ack:
+                        self._emit(AckEvent(instruction=str(sub.payload), ok=res.ok, message=None if res.ok else res.error, latency_s=res.latency_s))
+                    if sub.on_complete:
+                        try:
+                            sub.on_complete(res)
+                        except Exception:
+                            pass
+                results.extend(batch)
+                i += run
+        finally:
+            self.resume_updates()
+        # Commands after a failure are not sent; the machine state is no longer what they assume
+        skipped = "skipped: group cancelled" if self._epoch != epoch else "skipped: an earlier command in the group failed"
+        for sub in subs[len(results):]:
+            res = Result(ok=False, error=skipped, finished_at_s=time.time())
+            results.append(res)
+            if sub.on_complete:
+                try:
+                    sub.on_complete(res)
+                except Exception:
+                    pass
+        error = next((r.error for r in results if not r.ok), None)
+        return Result(ok=error is None, data=results, error=error, started_at_s=start, finished_at_s=time.time())
+
+    def _stream(self, subs: List[Request]) -> List[Result]:
+        lines = [str(r.payload) for r in subs]
+        for line in lines:
+            self._emit(SentEvent(line=line))
+        _log_note(f"STREAM {len(lines)} lines")
+        start = time.time()
+        try:
+            responses = self.transport.stream_lines(lines)
+            if responses is None or len(responses) != len(lines):
+                raise RuntimeError(getattr(self.transport, "_last_error", None) or "stream failed")
+        except Exception as e:
+            # Unknown how far the stream got; report every line as failed
+            return [Result(ok=False, error=str(e), started_at_s=start, finished_at_s=time.time()) for _ in lines]
+        finished = time.time()
+        results = []
+        for data in responses:
+            if isinstance(data, str) and data:
+                self._emit(ReceivedEvent(line=data))
+            error = self._error_line(data)
+            results.append(Result(ok=error is None, data=data, error=error, started_at_s=start, finished_at_s=finished))
+        return results
+
+    def _error_line(self, data) -> Optional[str]:
+        # The link's framer knows its firmware's error lines (Error:, error:N, !!, ALARM:N);
+        # links without one (HTTP) talk to RepRapFirmware
+        framer = getattr(self.transport, "framer", None) or RRF_FRAMER
+        if not isinstance(data, str):
+            return None
+        return next((ln for ln in (ln.strip() for ln in data.splitlines()) if framer.is_error(ln)), None)
+
     def _run(self) -> None:
         while not self._stop.is_set():
-            req = self._next()
-            if not req:
-                time.sleep(0.01)
+            # Block until submit() (or resume/stop) signals work instead of polling
+            with self._cond:
+                req = self._next()
+                while req is None and not self._dropped and not self._stop.is_set():
+                    self._cond.wait()
+                    req = self._next()
+                dropped, self._dropped = self._dropped, []
+                epoch = self._epoch
+            for stale, reason in dropped:
+                self._complete(stale, Result(ok=False, error=reason, finished_at_s=time.time()))
+            if req is None:
+                continue
+            if req.kind == RequestKind.COMMAND and self._epoch != epoch:
+                # cancel_pending() ran between taking the command and sending it
+                self._complete(req, Result(ok=False, error=self._cancel_reason, finished_at_s=time.time()))
                 continue
+            self._running = req
             res = self._execute(req)
+            self._running = None
+            self._observe(req, res)
             if req.kind == RequestKind.COMMAND and req.expects_ack:
-                self._emit(AckEvent(instruction=str(req.payload), ok=res.ok, message=None if res.ok else res.error))
-            if req.on_complete:
+                self._emit(AckEvent(instruction=str(req.payload), ok=res.ok, message=None if res.ok else res.error, latency_s=res.latency_s))
+            self._complete(req, res)
+
+    def _complete(self, req: Request, res: Result) -> None:
+        with self._cond:
+            followers = self._followers.pop(req.id, [])
+            key = self._flight_key(req)
+            if key is not None and self._inflight.get(key) is req:
+                del self._inflight[key]
+                if res.ok:
+                    self._cache[key] = res
+                    if len(self._cache) > 64:
+                        now = time.time()
+                        self._cache = {k: r for k, r in self._cache.items() if now - r.finished_at_s <= self.cache_ttl_s}
+            futures = [self._futures.pop(r.id, None) for r in [req] + followers]
+        for r in [req] + followers:
+            if r.on_complete:
                 try:
-                    req.on_complete(res)
+                    r.on_complete(res)
                 except Exception:
                     pass
-            time.sleep(0.01) 
\ No newline at end of file
+        for fut in futures:
+            if fut is not None:
+                self._resolve(fut, res)
+
+    @staticmethod
+    def _resolve(fut: Future, res: Result) -> None:
+        try:
+            if not fut.done():
+                fut.set_result(res)
+        except Exception:
+            # Cancelled by the caller in the meantime
+            pass 
\ No newline at end of file
@@ -1,37 +1,284 @@
-from typing import Dict, Any, Optional
+from contextlib import contextmanager
+from fnmatch import fnmatchcase
+from typing import Callable, Dict, Any, Iterator, List, Optional, Sequence, Tuple, Union
+import copy
 import threading
 
+from semantic_gcode.gcode.base import GCodeInstruction
+
+from .interpreter import ModalInterpreter
+
+
+Path = Union[str, Sequence[str]]
+
+
+def _path_keys(path: Optional[Path]) -> tuple:
+    if not path:
+        return ()
+    if isinstance(path, str):
+        return tuple(p for p in path.split(".") if p)
+    return tuple(path)
+
+
+def _merge(base: Any, patch: Dict[str, Any], changes: Optional[list] = None, prefix: tuple = ()) -> Dict[str, Any]:
+    # Copy only the dicts along the patched paths; untouched subtrees are shared.
+    # With a changes list, every value that differs is recorded as (path, old, new).
+    out = dict(base) if isinstance(base, dict) else {}
+    for k, v in patch.items():
+        old = out.get(k)
+        if isinstance(v, dict):
+            out[k] = _merge(old, v, changes, prefix + (k,))
+            if changes is not None and old is not None and not isinstance(old, dict):
+                changes.append((prefix + (k,), old, out[k]))
+        else:
+            out[k] = v
+            if changes is not None and old != v:
+                changes.append((prefix + (k,), old, v))
+    return out
+
+
+class _Subscription:
+    __slots__ = ("globs", "callback")
+
+    def __init__(self, globs: Tuple[str, ...], callback: Callable[[Dict[str, Tuple[Any, Any]]], None]) -> None:
+        self.globs = globs
+        self.callback = callback
+
+    def matches(self, path: tuple) -> bool:
+        # A glob matches the changed path or any path above it
+        prefixes = [".".join(path[:i]) for i in range(1, len(path) + 1)]
+        return any(fnmatchcase(p, g) for g in self.globs for p in prefixes)
+
 
 class MachineState:
+    """
+    Predicted and observed machine state.
+
+    The predicted state is kept by a ModalInterpreter (``interpreter``), which
+    applies each instruction in place; its tree is rebuilt only when it is read
+    after a change. The observed tree is copy-on-write: an update builds new
+    dicts only along the paths it touches and shares every other subtree with
+    the previous version, so applying a patch costs time proportional to the
+    patch, not to the state. snapshot() hands out the current trees without
+    copying; they are never modified afterwards and must be treated as
+    read-only. ``version`` increases with every update.
+
+    subscribe() registers a callback for changes under a path. Changes are
+    collected per dispatch cycle and each subscription is called at most once
+    per cycle with the net change of every matching value. By default a cycle
+    ends with each update (or with the outermost batch()); with a scheduler set,
+    the first change schedules the cycle on it, e.g. a UI event loop, and
+    everything that changes before it runs is delivered together.
+
+    on_patch() registers a callback that is handed every observed patch as it
+    is applied, on the applying thread, whether or not anything changed; it is
+    meant for recorders such as TelemetryBuffer that need every sample.
+    """
+
     def __init__(self) -> None:
         self._lock = threading.Lock()
-        self._predictive: Dict[str, Any] = {}
+        self.interpreter = ModalInterpreter()
+        # Interpreter version the cached predictive tree was built at
+        self._predictive_at = -1
+        self._predictive_tree: Dict[str, Any] = {}
+        # State set by the apply() of instructions the interpreter does not model
+        self._extra: Dict[str, Any] = {}
         self._observed: Dict[str, Any] = {}
+        self._version = 0
+        self._subs: List[_Subscription] = []
+        self._patch_hooks: List[Callable[[Dict[str, Any]], None]] = []
+        # Net change per path since the last dispatch, as [old, new]
+        self._pending: Dict[tuple, list] = {}
+        self._dispatch_scheduled = False
+        self._batch_depth = 0
+        self._scheduler: Optional[Callable[[Callable[[], None]], None]] = None
 
-    def apply_predictive(self, instruction: Any) -> None:
-        if not hasattr(instruction, "apply"):
-            return
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def apply_predictive(self, instruction: Any) -> float:
+        """
+        Apply an instruction to the predicted state.
+
+        Returns:
+            float: Predicted motion or dwell time of the instruction in seconds
+        """
         with self._lock:
-            self._predictive = instruction.apply(dict(self._predictive))
+            seconds = self.interpreter.apply(instruction)
+            if seconds is None:
+                if not hasattr(instruction, "apply") or type(instruction).apply is GCodeInstruction.apply:
+                    return 0.0
+                # Commands with their own apply() (e.g. M552 network state) edit a copy of the small extra tree
+                self._extra = instruction.apply(copy.deepcopy(self._extra))
+                self._predictive_at = -1
+            self._version += 1
+            return seconds or 0.0
+
+    def _predictive(self) -> Dict[str, Any]:
+        # Caller holds the lock
+        if self._predictive_at != self.interpreter.version:
+            tree = dict(self._extra)
+            tree.update(self.interpreter.to_dict())
+            self._predictive_tree = tree
+            self._predictive_at = self.interpreter.version
+        return self._predictive_tree
 
     def _deep_merge(self, base: Dict[str, Any], patch: Dict[str, Any]) -> Dict[str, Any]:
-        out = dict(base)
-        for k, v in (patch or {}).items():
-            if isinstance(v, dict) and isinstance(out.get(k), dict):
-                out[k] = self._deep_merge(out.get(k, {}), v)
-            else:
-                out[k] = v
-        return out
+        return _merge(base, patch or {})
 
-    def update_observed(self, observed: Dict[str, Any]) -> None:
+    def apply_patch(self, patch: Any, path: Optional[Path] = None) -> int:
+        """
+        Merge a patch into the observed tree.
+
+        Dict values are merged key by key; any other value replaces what was there.
+
+        Args:
+            patch: Values to merge; with a path, any value to store there
+            path: Where the patch applies, as "a.b.c" or a sequence of keys;
+                the root if omitted
+
+        Returns:
+            int: The new version
+        """
+        for key in reversed(_path_keys(path)):
+            patch = {key: patch}
+        with self._lock:
+            # Diffing is skipped entirely while nobody is subscribed
+            changes: Optional[list] = [] if self._subs else None
+            self._observed = _merge(self._observed, patch or {}, changes)
+            self._version += 1
+            version = self._version
+            for changed, old, new in changes or ():
+                entry = self._pending.get(changed)
+                if entry is None:
+                    self._pending[changed] = [old, new]
+                else:
+                    entry[1] = new
+            hooks = self._patch_hooks
+        for hook in hooks:
+            try:
+                hook(patch or {})
+            except Exception:
+                pass
+        if changes:
+            self._schedule_dispatch()
+        return version
+
+    def on_patch(self, callback: Callable[[Dict[str, Any]], None]) -> Callable[[], None]:
+        """
+        Call back with every patch applied to the observed tree.
+
+        Args:
+            callback: Called as callback(patch) right after each apply_patch(),
+                with the patch rooted at the top of the observed tree
+
+        Returns:
+            Callable[[], None]: Removes the callback
+        """
+        with self._lock:
+            self._patch_hooks = self._patch_hooks + [callback]
+
+        def remove() -> None:
+            with self._lock:
+                self._patch_hooks = [h for h in self._patch_hooks if h is not callback]
+        return remove
+
+    def subscribe(self, path_glob: Union[str, Sequence[str]],
+                  callback: Callable[[Dict[str, Tuple[Any, Any]]], None]) -> Callable[[], None]:
+        """
+        Call back when observed values under a path change.
+
+        Args:
+            path_glob: Dotted path or fnmatch pattern ("coords", "raw_status.raw.*"),
+                or several of them; changes at or below a matching path count
+            callback: Called once per dispatch cycle as callback({path: (old, new)})
+                for the changed values that match
+
+        Returns:
+            Callable[[], None]: Removes the subscription
+        """
+        sub = _Subscription((path_glob,) if isinstance(path_glob, str) else tuple(path_glob), callback)
         with self._lock:
-            # Merge incrementally so previously known values persist
-            self._observed = self._deep_merge(self._observed, observed or {})
+            self._subs.append(sub)
+
+        def unsubscribe() -> None:
+            with self._lock:
+                if sub in self._subs:
+                    self._subs.remove(sub)
+        return unsubscribe
+
+    def set_scheduler(self, scheduler: Optional[Callable[[Callable[[], None]], None]]) -> None:
+        """Run dispatch cycles through scheduler(fn) (e.g. loop.call_soon_threadsafe); None dispatches inline."""
+        self._scheduler = scheduler
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Deliver all changes made inside the block in one dispatch cycle."""
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+            self._schedule_dispatch()
+
+    def _schedule_dispatch(self) -> None:
+        with self._lock:
+            if self._batch_depth or self._dispatch_scheduled or not self._pending:
+                return
+            self._dispatch_scheduled = True
+        scheduler = self._scheduler
+        if scheduler is None:
+            self.dispatch()
+            return
+        try:
+            scheduler(self.dispatch)
+        except Exception:
+            # The loop is gone; deliver here rather than stall every later change
+            self.dispatch()
+
+    def dispatch(self) -> None:
+        """Deliver the changes collected since the last cycle."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._dispatch_scheduled = False
+            subs = list(self._subs)
+        # A value changed and changed back within the cycle is no change
+        changed = [(path, old, new) for path, (old, new) in pending.items() if old != new]
+        if not changed:
+            return
+        for sub in subs:
+            matched = {".".join(path): (old, new) for path, old, new in changed if sub.matches(path)}
+            if not matched:
+                continue
+            try:
+                sub.callback(matched)
+            except Exception:
+                pass
+
+    def update_observed(self, observed: Dict[str, Any]) -> None:
+        # Merge incrementally so previously known values persist
+        self.apply_patch(observed or {})
+
+    def get(self, path: Path, default: Any = None, tree: str = "observed") -> Any:
+        """Read one value from the observed (or predictive) tree by path."""
+        if tree == "observed":
+            node: Any = self._observed
+        else:
+            with self._lock:
+                node = self._predictive()
+        for key in _path_keys(path):
+            if not isinstance(node, dict) or key not in node:
+                return default
+            node = node[key]
+        return node
 
     def snapshot(self) -> Dict[str, Any]:
         with self._lock:
-            snap = {
-                "predictive": dict(self._predictive),
-                "observed": dict(self._observed),
+            return {
+                "predictive": self._predictive(),
+                "observed": self._observed,
+                "version": self._version,
             }
-            return snap 
\ No newline at end of file
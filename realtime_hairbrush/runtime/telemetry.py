@@ -0,0 +1,264 @@
+import os
+import struct
+import sys
+import threading
+import time
+from array import array
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+from .state import MachineState
+
+
+Value = Union[float, Tuple[float, ...]]
+
+# Telemetry channel name -> observed path it is filled from
+DEFAULT_CHANNELS: Dict[str, str] = {
+    "user_position": "coords.user_position",
+    "machine_position": "coords.machine_position",
+    "vin": "diagnostics.vin",
+    "mcu_temp_c": "diagnostics.mcu_temp_c",
+}
+
+
+class TelemetrySeries:
+    """
+    Fixed-size time series of one telemetry channel.
+
+    Samples are timestamps plus ``width`` float values (e.g. one per axis),
+    stored in preallocated ``array('d')`` rings; once full, the oldest sample is
+    overwritten. A running sum is stored with every sample, so latest(), mean()
+    and rate() over the whole buffer or the last N seconds cost O(1) plus a
+    binary search for the window start, however many samples are kept.
+    """
+
+    def __init__(self, capacity: int = 1024, width: int = 1) -> None:
+        self.capacity = max(2, int(capacity))
+        self.width = max(1, int(width))
+        self._t = array("d", bytes(8 * self.capacity))
+        self._v = array("d", bytes(8 * self.capacity * self.width))
+        # Sum of all earlier samples, per column, at each slot
+        self._before = array("d", bytes(8 * self.capacity * self.width))
+        self._total = [0.0] * self.width
+        self._count = 0  # samples ever appended
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return min(self._count, self.capacity)
+
+    def append(self, value: Union[float, Sequence[float]], t: Optional[float] = None) -> None:
+        """Add a sample; sequences are padded with 0.0 or truncated to ``width``."""
+        values = [float(v) for v in value] if isinstance(value, (list, tuple)) else [float(value)]
+        values = (values + [0.0] * self.width)[: self.width]
+        with self._lock:
+            slot = self._count % self.capacity
+            base = slot * self.width
+            self._t[slot] = time.time() if t is None else float(t)
+            for j, v in enumerate(values):
+                self._before[base + j] = self._total[j]
+                self._v[base + j] = v
+                self._total[j] += v
+            self._count += 1
+
+    def _value(self, k: int) -> Value:
+        base = (k % self.capacity) * self.width
+        if self.width == 1:
+            return self._v[base]
+        return tuple(self._v[base: base + self.width])
+
+    def _time(self, k: int) -> float:
+        return self._t[k % self.capacity]
+
+    def _span(self, seconds: Optional[float]) -> Optional[Tuple[int, int]]:
+        # Absolute indices of the first and last sample in the window
+        if self._count == 0:
+            return None
+        last = self._count - 1
+        lo = max(0, self._count - self.capacity)
+        if seconds is None:
+            return lo, last
+        cutoff = self._time(last) - float(seconds)
+        hi = last
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._time(mid) < cutoff:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo, last
+
+    def latest(self) -> Optional[Tuple[float, Value]]:
+        """(timestamp, value) of the newest sample, or None when empty."""
+        with self._lock:
+            if self._count == 0:
+                return None
+            k = self._count - 1
+            return self._time(k), self._value(k)
+
+    def window(self, seconds: Optional[float] = None) -> List[Tuple[float, Value]]:
+        """Samples of the last ``seconds`` (all kept samples if None), oldest first."""
+        with self._lock:
+            span = self._span(seconds)
+            if span is None:
+                return []
+            return [(self._time(k), self._value(k)) for k in range(span[0], span[1] + 1)]
+
+    def mean(self, seconds: Optional[float] = None) -> Optional[Value]:
+        """Mean over the last ``seconds`` (all kept samples if None)."""
+        with self._lock:
+            span = self._span(seconds)
+            if span is None:
+                return None
+            first, last = span
+            n = last - first + 1
+            fb = (first % self.capacity) * self.width
+            lb = (last % self.capacity) * self.width
+            means = [(self._before[lb + j] + self._v[lb + j] - self._before[fb + j]) / n for j in range(self.width)]
+        return means[0] if self.width == 1 else tuple(means)
+
+    def rate(self, seconds: Optional[float] = None) -> Optional[Value]:
+        """
+        Rate of change per second between the first and last sample of the window.
+
+        Returns:
+            Optional[Value]: None with fewer than two samples or no elapsed time
+        """
+        with self._lock:
+            span = self._span(seconds)
+            if span is None:
+                return None
+            first, last = span
+            dt = self._time(last) - self._time(first)
+            if last == first or dt <= 0:
+                return None
+            fb = (first % self.capacity) * self.width
+            lb = (last % self.capacity) * self.width
+            rates = [(self._v[lb + j] - self._v[fb + j]) / dt for j in range(self.width)]
+        return rates[0] if self.width == 1 else tuple(rates)
+
+    def _rows(self) -> array:
+        # Kept samples, oldest first, as a flat (n, 1 + width) row-major array
+        out = array("d")
+        with self._lock:
+            span = self._span(None)
+            if span is None:
+                return out
+            for k in range(span[0], span[1] + 1):
+                base = (k % self.capacity) * self.width
+                out.append(self._t[k % self.capacity])
+                out.extend(self._v[base: base + self.width])
+        return out
+
+    def to_array(self) -> Any:
+        """Kept samples as a numpy array of shape (n, 1 + width): time, then values."""
+        if not NUMPY_AVAILABLE:
+            raise ImportError("numpy is required for TelemetrySeries.to_array(); use save_npy() without it")
+        return np.frombuffer(self._rows().tobytes(), dtype=np.float64).reshape(-1, 1 + self.width)
+
+    def save_npy(self, path: str) -> str:
+        """
+        Write the kept samples to a .npy file (float64, shape (n, 1 + width)).
+
+        The file is written directly in the .npy format, so numpy is not needed
+        to produce it; ``numpy.load`` reads it back.
+
+        Returns:
+            str: The path written
+        """
+        rows = self._rows()
+        if sys.byteorder != "little":
+            rows.byteswap()
+        shape = (len(rows) // (1 + self.width), 1 + self.width)
+        header = "{'descr': '<f8', 'fortran_order': False, 'shape': (%d, %d), }" % shape
+        # Magic, version and header length take 10 bytes; the whole header is padded to 64
+        header += " " * (63 - (10 + len(header)) % 64) + "\n"
+        with open(path, "wb") as f:
+            f.write(b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) + header.encode("latin1"))
+            f.write(rows.tobytes())
+        return path
+
+
+class TelemetryBuffer:
+    """
+    Telemetry history of the observed values pollers write into MachineState.
+
+    attach() hooks ingest() into a MachineState, so every observed patch is
+    recorded whichever poller or agent applied it, and one sample is appended
+    to the series of each channel the patch contains; history accumulates
+    without any extra device queries. Series are created on their first
+    sample, with the width of that sample.
+    """
+
+    def __init__(self, capacity: int = 1024, channels: Optional[Dict[str, str]] = None) -> None:
+        self.capacity = int(capacity)
+        self.channels = dict(DEFAULT_CHANNELS if channels is None else channels)
+        self._paths = {name: tuple(path.split(".")) for name, path in self.channels.items()}
+        self._series: Dict[str, TelemetrySeries] = {}
+        self._lock = threading.Lock()
+
+    def attach(self, state: MachineState) -> Callable[[], None]:
+        """
+        Record every patch applied to a MachineState's observed tree.
+
+        Returns:
+            Callable[[], None]: Detaches the buffer again
+        """
+        return state.on_patch(self.ingest)
+
+    def series(self, name: str) -> Optional[TelemetrySeries]:
+        return self._series.get(name)
+
+    def names(self) -> List[str]:
+        return list(self._series)
+
+    def record(self, name: str, value: Any, t: Optional[float] = None) -> bool:
+        """
+        Append one sample to a channel.
+
+        Returns:
+            bool: False if the value is not numeric (or a list of numbers)
+        """
+        if isinstance(value, bool) or not isinstance(value, (int, float, list, tuple)):
+            return False
+        if isinstance(value, (list, tuple)) and (not value or not all(isinstance(v, (int, float)) for v in value)):
+            return False
+        series = self._series.get(name)
+        if series is None:
+            with self._lock:
+                series = self._series.get(name)
+                if series is None:
+                    width = len(value) if isinstance(value, (list, tuple)) else 1
+                    series = self._series[name] = TelemetrySeries(self.capacity, width)
+        series.append(value, t)
+        return True
+
+    def ingest(self, patch: Dict[str, Any], t: Optional[float] = None) -> int:
+        """
+        Record every channel present in an observed patch.
+
+        Returns:
+            int: Number of samples recorded
+        """
+        if not isinstance(patch, dict):
+            return 0
+        t = time.time() if t is None else t
+        recorded = 0
+        for name, keys in self._paths.items():
+            node: Any = patch
+            for key in keys:
+                if not isinstance(node, dict) or key not in node:
+                    break
+                node = node[key]
+            else:
+                recorded += self.record(name, node, t)
+        return recorded
+
+    def save(self, directory: str) -> List[str]:
+        """Write each series to ``<directory>/<channel>.npy``; returns the paths written."""
+        os.makedirs(directory, exist_ok=True)
+        return [self._series[name].save_npy(os.path.join(directory, f"{name}.npy")) for name in self.names()]
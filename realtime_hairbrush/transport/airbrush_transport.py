@@ -14,6 +14,8 @@ import threading
 from semantic_gcode.transport.base import Transport
 from semantic_gcode.transport.serial import SerialTransport
 from semantic_gcode.transport.http import HttpTransport
+from semantic_gcode.transport.framing import ResponseFramer
+from semantic_gcode.utils.exceptions import TransportError
 
 from realtime_hairbrush.transport.config import ConnectionConfig
 
@@ -26,6 +28,11 @@ class AirbrushTransport:
     """
     Airbrush-specific transport implementation that provides a unified interface
     for both serial and HTTP connections to the Duet board.
+
+    With ``transport_type="dual"`` both links are opened: commands go over USB
+    serial (``transport``) and object model reads over HTTP (``query_transport``),
+    so status can be read while motion streams. The HTTP link is used directly by
+    the RequestSequencer's query worker and does not take this class's I/O lock.
     """
     
     def __init__(self, config: ConnectionConfig):
@@ -40,6 +47,8 @@ class AirbrushTransport:
         self._connected = False
         self._last_error = None
         self._io_lock = threading.Lock()
+        # HTTP link for object model queries in the dual-link configuration
+        self.query_transport: Optional[Transport] = None
         
         # Use the global transport if available
         global _global_transport
@@ -59,35 +68,25 @@ class AirbrushTransport:
             if self.transport and self.transport.is_connected():
                 return True
                 
-            if self.config.transport_type == "serial":
-                base = SerialTransport(
-                    port=self.config.serial_port,
-                    baud_rate=self.config.serial_baudrate,
-                    timeout=self.config.timeout
-                )
+            extra = self.config.additional_settings or {}
+            if self.config.transport_type in ("serial", "dual"):
+                base = self._serial_link(extra)
             elif self.config.transport_type == "http":
-                url = f"http://{self.config.http_host}"
-                base = HttpTransport(
-                    url=url,
-                    password=self.config.http_password,
-                    timeout=self.config.timeout
-                )
+                base = self._http_link(extra)
             else:
                 self._last_error = f"Unsupported transport type: {self.config.transport_type}"
                 return False
 
-            # Wrap with logging decorator if enabled (default on)
-            try:
-                from .logging_wrapper import LoggingTransport
-                # Always enable logging in this branch unless explicitly disabled
-                if os.getenv("AIRBRUSH_LOG", "1") in ("0", "false", "False"):
-                    self.transport = base
-                else:
-                    self.transport = LoggingTransport(base)
-            except Exception:
-                self.transport = base
-
+            self.transport = self._wrap(base)
             self._connected = self.transport.connect()
+            if self._connected and self.config.transport_type == "dual":
+                # Queries fall back to the serial link if HTTP is unreachable
+                query_link = self._wrap(self._http_link(extra))
+                try:
+                    if query_link.connect():
+                        self.query_transport = query_link
+                except Exception as e:
+                    self._last_error = f"HTTP query link unavailable: {e}"
             if self._connected:
                 # Store the transport globally for persistence between CLI commands
                 global _global_transport
@@ -106,10 +105,45 @@ class AirbrushTransport:
             self._connected = False
             return False
 
+    def _serial_link(self, extra: Dict[str, Any]) -> Transport:
+        return SerialTransport(
+            port=self.config.serial_port,
+            baud_rate=self.config.serial_baudrate,
+            timeout=self.config.timeout,
+            stream_window=int(extra.get("stream_window", 4)),
+            stream_buffer_bytes=int(extra.get("stream_buffer_bytes", 256)),
+            firmware=extra.get("firmware")
+        )
+
+    def _http_link(self, extra: Dict[str, Any]) -> Transport:
+        return HttpTransport(
+            url=f"http://{self.config.http_host}",
+            password=self.config.http_password,
+            timeout=self.config.timeout,
+            max_batch_bytes=int(extra.get("http_max_batch_bytes", 512))
+        )
+
+    @staticmethod
+    def _wrap(base: Transport) -> Transport:
+        # Wrap with logging decorator if enabled (default on)
+        try:
+            from .logging_wrapper import LoggingTransport
+            if os.getenv("AIRBRUSH_LOG", "1") in ("0", "false", "False"):
+                return base
+            return LoggingTransport(base)
+        except Exception:
+            return base
+
     def disconnect(self) -> None:
         """
         Disconnect from the Duet board.
         """
+        if self.query_transport is not None:
+            try:
+                self.query_transport.disconnect()
+            except Exception:
+                pass
+            self.query_transport = None
         if self.transport and self._connected:
             self.transport.disconnect()
             self._connected = False
@@ -174,6 +208,133 @@ class AirbrushTransport:
             self._last_error = str(e)
             return None
 
+    @property
+    def framer(self) -> Optional[ResponseFramer]:
+        """
+        The reply framer of the underlying link.
+
+        Returns:
+            Optional[ResponseFramer]: The framer, or None if the link does not frame replies (HTTP)
+        """
+        inner = getattr(self.transport, "inner", self.transport)
+        return getattr(inner, "framer", None)
+
+    def supports_numbered_ack(self) -> bool:
+        """
+        Check whether the link can confirm commands with numbered lines.
+
+        Returns:
+            bool: True if the underlying transport implements send_numbered
+        """
+        inner = getattr(self.transport, "inner", self.transport)
+        return callable(getattr(inner, "send_numbered", None))
+
+    def send_numbered(self, line: str, timeout: Optional[float] = None) -> str:
+        """
+        Send a line with line number and checksum and wait for its acknowledgement.
+
+        Args:
+            line: The G-code command to send
+            timeout: Seconds to wait for the acknowledgement
+
+        Returns:
+            str: The response from the device
+
+        Raises:
+            TransportError: If the command could not be confirmed
+        """
+        if not self.is_connected():
+            self._last_error = "Not connected"
+            raise TransportError("Not connected")
+
+        try:
+            with self._io_lock:
+                return self.transport.send_numbered(line, timeout=timeout)
+        except Exception as e:
+            self._last_error = str(e)
+            raise
+
+    def stream_lines(self, lines: List[str], window: Optional[int] = None) -> Optional[List[str]]:
+        """
+        Stream several lines of G-code with multiple lines in flight.
+
+        Falls back to sending one line at a time when the underlying transport
+        has no streaming mode.
+
+        Args:
+            lines: The G-code lines to send, in order
+            window: Optional override for the number of lines kept in flight
+
+        Returns:
+            Optional[List[str]]: The per-line responses, or None on failure
+        """
+        if not self.is_connected():
+            self._last_error = "Not connected"
+            return None
+
+        try:
+            with self._io_lock:
+                streamer = getattr(self.transport, "stream_lines", None)
+                if callable(streamer):
+                    return streamer(lines, window=window)
+                responses = []
+                for line in lines:
+                    if not line or not line.strip():
+                        continue
+                    ok = self.transport.send_line(line)
+                    responses.append(ok if isinstance(ok, str) else ("ok" if ok else ""))
+                return responses
+        except Exception as e:
+            self._last_error = str(e)
+            return None
+
+    def emergency_stop(self, line: str = "M112") -> bool:
+        """
+        Send an emergency stop out of band.
+
+        Unlike every other send this does not take the I/O lock, so it is not
+        held up by a long-running command or an acknowledgement wait in another
+        thread; the underlying transport also releases those waits.
+
+        Args:
+            line: The stop command to send (M112, or M999 to reset)
+
+        Returns:
+            bool: True if the command was written, False otherwise
+        """
+        if not self.is_connected():
+            self._last_error = "Not connected"
+            return False
+
+        try:
+            stopper = getattr(self.transport, "emergency_stop", None)
+            if callable(stopper):
+                stopper(line)
+                return True
+            return bool(self.transport.send_line(line))
+        except Exception as e:
+            self._last_error = str(e)
+            return False
+
+    def read_message(self, timeout: Optional[float] = None) -> Optional[tuple]:
+        """
+        Get the next unsolicited message (warnings, M118 output) from a serial link.
+
+        Args:
+            timeout: Seconds to wait for a message; None returns immediately
+
+        Returns:
+            Optional[tuple]: (kind, line) or None if no message is available
+        """
+        reader = getattr(self.transport, "read_message", None)
+        if not callable(reader):
+            return None
+        try:
+            return reader(timeout=timeout)
+        except Exception as e:
+            self._last_error = str(e)
+            return None
+
     def read_reply(self) -> Optional[str]:
         """HTTP-only helper to fetch rr_reply without sending a new command."""
         try:
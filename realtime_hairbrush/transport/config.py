@@ -16,7 +16,8 @@ class ConnectionConfig:
     """
     Configuration for connecting to the Duet board.
     """
-    # Transport type: "serial" or "http"
+    # Transport type: "serial", "http", or "dual" (commands over serial,
+    # object model queries over HTTP; needs both serial and HTTP settings)
     transport_type: str = "serial"
     
     # Serial connection settings
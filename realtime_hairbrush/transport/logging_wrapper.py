@@ -3,7 +3,7 @@ from __future__ import annotations
 import os
 import threading
 import time
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 from semantic_gcode.transport.base import Transport
 
@@ -202,6 +202,55 @@ class LoggingTransport(Transport):
                 self._log("Q-ERR", str(e))
             raise
 
+    def send_numbered(self, line: str, timeout: Optional[float] = None) -> str:
+        if FULL_GCODE_TRACE or _is_mutation(line):
+            tag = "ACTUAL-TX" if FULL_GCODE_TRACE else "TX"
+            self._log(tag, line.replace("\n", "\\n"))
+        try:
+            resp = self.inner.send_numbered(line, timeout=timeout)
+            if FULL_GCODE_TRACE or _is_mutation(line):
+                txt = (resp or "").replace("\n", " ").strip()
+                self._log("ACTUAL-RX" if FULL_GCODE_TRACE else "R", txt if txt else "<none>")
+            return resp
+        except Exception as e:
+            if FULL_GCODE_TRACE or _is_mutation(line):
+                self._log("TX-ERR", str(e))
+            raise
+
+    def stream_lines(self, lines: List[str], window: Optional[int] = None) -> List[str]:
+        lines = [ln for ln in lines if ln and ln.strip()]
+        trace = FULL_GCODE_TRACE or any(_is_mutation(ln) for ln in lines)
+        if trace:
+            tag = "ACTUAL-TX" if FULL_GCODE_TRACE else "TX"
+            for ln in lines:
+                self._log(tag, ln.replace("\n", "\\n"))
+        streamer = getattr(self.inner, "stream_lines", None)
+        try:
+            if callable(streamer):
+                responses = streamer(lines, window=window)
+            else:
+                responses = [self.inner.query(ln) or "" for ln in lines]
+            if trace:
+                self._log("TX-OK", f"{len(responses)} line(s) acknowledged")
+            return responses
+        except Exception as e:
+            if trace:
+                self._log("TX-ERR", str(e))
+            raise
+
+    def emergency_stop(self, line: str = "M112") -> None:
+        # Send first; logging must not add latency to the stop
+        stopper = getattr(self.inner, "emergency_stop", None)
+        try:
+            if callable(stopper):
+                stopper(line)
+            else:
+                self.inner.send_line(line)
+            self._log("ESTOP", line)
+        except Exception as e:
+            self._log("ESTOP-ERR", str(e))
+            raise
+
     def get_status(self) -> Dict[str, Any]:
         try:
             st = self.inner.get_status()
@@ -230,4 +279,13 @@ class LoggingTransport(Transport):
             if STATUS_LOG_ENABLED:
                 self._log("RR_REPLY", str(data)[:300])
             return data
-        return None 
\ No newline at end of file
+        return None 
+
+    def read_message(self, timeout: Optional[float] = None):
+        reader = getattr(self.inner, "read_message", None)
+        if callable(reader):
+            msg = reader(timeout=timeout)
+            if msg is not None:
+                self._log("MSG", str(msg[1]))
+            return msg
+        return None
@@ -11,7 +11,7 @@ from textual.containers import Vertical, Horizontal
 from textual.widgets import Static, Input, Footer, RichLog
 from rich.markup import escape
 
-from realtime_hairbrush.runtime import Dispatcher, MachineState, ObjectModelAgent
+from realtime_hairbrush.runtime import Dispatcher, MachineState, ObjectModelAgent, TelemetryBuffer, PositionEstimator
 from realtime_hairbrush.runtime.events import (
     SentEvent,
     ReceivedEvent,
@@ -62,10 +62,16 @@ class AirbrushTextualApp(App):
         self._ip_wait_result: Optional[str] = None
         # Track last time we saw a status update to detect stale connection
         self._last_status_ts: float = 0.0
+        self._unsubscribe_status = None
+        self._unsubscribe_estimate = None
         # Temporary motion refresh timer (Textual timer) to boost status during moves (legacy path)
         self._motion_refresh_timer = None
         self._motion_refresh_inflight: bool = False
         self._last_machine_pos = None
+        # Dead-reckoned position shown during moves; position polls only correct its drift
+        self.estimator = PositionEstimator()
+        if self.dispatcher:
+            self.dispatcher.estimator = self.estimator
         self._move_timeout_prev: Optional[float] = None
         # Command history
         self._history: list[str] = []
@@ -85,6 +91,9 @@ class AirbrushTextualApp(App):
         # Enable async agent by default in this branch; allow opt-out via AIRBRUSH_ASYNC=0
         self._use_async_agent = os.getenv("AIRBRUSH_ASYNC", "1") not in ("0", "false", "False")
         self._agent: Optional[ObjectModelAgent] = ObjectModelAgent() if self._use_async_agent else None
+        # History of polled positions and diagnostics, recorded from every observed patch
+        self.telemetry = TelemetryBuffer()
+        self.telemetry.attach(self.state)
         # Tool manager middleware
         self.tool_manager: Optional[ToolManager] = None
 
@@ -103,9 +112,24 @@ class AirbrushTextualApp(App):
             Footer(),
         )
 
+    # Observed paths the status block renders from
+    _STATUS_PATHS = ("firmware", "coords", "homed", "diagnostics", "endstops", "raw_status")
+    # Position poll interval while moving; the estimator animates in between
+    _DRIFT_POLL_S = 1.0
+    _ESTIMATE_RENDER_S = 0.05
+
     def on_mount(self) -> None:
         if self.input_widget:
             self.input_widget.focus()
+        # Re-render only when a displayed value changes, at most once per loop turn
+        try:
+            import asyncio
+            loop = asyncio.get_event_loop()
+            self.state.set_scheduler(loop.call_soon_threadsafe)
+            self._unsubscribe_status = self.state.subscribe(self._STATUS_PATHS, lambda changes: self._update_status())
+            self._unsubscribe_estimate = self.state.subscribe(("coords", "raw_status.raw.coords", "raw_status.raw.position"), self._correct_estimate)
+        except Exception:
+            pass
         if self.dispatcher and not self._listener_attached:
             self.dispatcher.on_event(lambda ev: self.call_from_thread(self._handle_event, ev))
             self._listener_attached = True
@@ -117,6 +141,7 @@ class AirbrushTextualApp(App):
             try:
                 self._agent.set_transport(self.transport)
                 self._agent.set_verbose(self._verbose)
+                self._agent.set_coords_interval(self._DRIFT_POLL_S)
                 self._agent.on_change(lambda patch: self.call_from_thread(self._merge_observed_patch, patch))
                 import asyncio
                 asyncio.get_event_loop().create_task(self._agent.start())
@@ -132,8 +157,16 @@ class AirbrushTextualApp(App):
             except Exception:
                 pass
         self.set_interval(0.5, self._update_status)
+        self.set_interval(self._ESTIMATE_RENDER_S, self._render_estimate)
 
     def on_unmount(self) -> None:
+        if self._unsubscribe_estimate:
+            self._unsubscribe_estimate()
+            self._unsubscribe_estimate = None
+        if self._unsubscribe_status:
+            self._unsubscribe_status()
+            self.state.set_scheduler(None)
+        self._close_tool_manager()
         if self.poller:
             try:
                 self.poller.stop()
@@ -146,6 +179,15 @@ class AirbrushTextualApp(App):
             except Exception:
                 pass
 
+    def _close_tool_manager(self) -> None:
+        # Drop the manager's state subscription so reconnects do not pile them up
+        if self.tool_manager:
+            try:
+                self.tool_manager.close()
+            except Exception:
+                pass
+            self.tool_manager = None
+
     def on_key(self, event: events.Key) -> None:
         if not self.input_widget or not self.input_widget.has_focus:
             return
@@ -258,21 +300,22 @@ class AirbrushTextualApp(App):
         except Exception:
             pass
 
+    def _correct_estimate(self, changes: dict) -> None:
+        pos = self._observed_position(self.state.snapshot().get("observed", {}))
+        if isinstance(pos, (list, tuple)) and len(pos) >= 3:
+            try:
+                self.estimator.correct(pos)
+            except (TypeError, ValueError):
+                pass
+
+    def _render_estimate(self) -> None:
+        # Animate the position at display rate while a commanded move is in progress
+        if self.estimator.moving():
+            self._update_status()
+
     def _merge_observed_patch(self, patch: dict) -> None:
-        def deep_merge(a, b):
-            if not isinstance(a, dict) or not isinstance(b, dict):
-                return b
-            out = dict(a)
-            for key, val in b.items():
-                if isinstance(val, dict):
-                    out[key] = deep_merge(out.get(key, {}), val)
-                else:
-                    out[key] = val
-            return out
-        snap = self.state.snapshot().get("observed", {})
-        merged = deep_merge(snap, patch or {})
-        self.state.update_observed(merged)
-        self._update_status()
+        # The status subscription re-renders if anything displayed changed
+        self.state.apply_patch(patch or {})
 
     def _get_current_tool_index(self) -> int:
         obs_tool = self.state.snapshot().get("observed", {}).get("raw_status", {}).get("raw", {}).get("currentTool")
@@ -307,6 +350,18 @@ class AirbrushTextualApp(App):
             self.input_widget.value = ""
         threading.Thread(target=self._handle_command_sync, args=(text,), daemon=True).start()
 
+    @staticmethod
+    def _observed_position(obs: dict):
+        # Prefer work/user position for logical frame, fallback to live machine position
+        return (
+            obs.get("coords", {}).get("user_position")
+            or obs.get("coords", {}).get("machine_position")
+            or obs.get("raw_status", {}).get("raw", {}).get("coords", {}).get("userPosition")
+            or obs.get("raw_status", {}).get("raw", {}).get("coords", {}).get("machine")
+            or obs.get("raw_status", {}).get("raw", {}).get("coords", {}).get("xyz")
+            or obs.get("raw_status", {}).get("raw", {}).get("position")
+        )
+
     def _status_block_text(self) -> str:
         mode = None
         host = "-"
@@ -318,6 +373,8 @@ class AirbrushTextualApp(App):
                 host = self.transport.config.serial_port or "-"
             elif mode == "http":
                 host = self.transport.config.http_host or "-"
+            elif mode == "dual":
+                host = f"{self.transport.config.serial_port or '-'} + {self.transport.config.http_host or '-'}"
         obs = self.state.snapshot().get("observed", {})
         fw_status = obs.get("firmware", {}).get("status")
         label_map = {
@@ -339,15 +396,9 @@ class AirbrushTextualApp(App):
                 label = getattr(self, "_last_status_label", "?")
         else:
             self._last_status_label = label
-        # Prefer work/user position for logical frame, fallback to live machine position
-        pos = (
-            obs.get("coords", {}).get("user_position")
-            or obs.get("coords", {}).get("machine_position")
-            or obs.get("raw_status", {}).get("raw", {}).get("coords", {}).get("userPosition")
-            or obs.get("raw_status", {}).get("raw", {}).get("coords", {}).get("machine")
-            or obs.get("raw_status", {}).get("raw", {}).get("coords", {}).get("xyz")
-            or obs.get("raw_status", {}).get("raw", {}).get("position")
-        )
+        pos = self._observed_position(obs)
+        if self.estimator.moving():
+            pos = self.estimator.position() or pos
         # Homing info can be provided as coords.axesHomed (M408 S2) or homed (M408 S0)
         homed_list = (
             obs.get("homed", {}).get("axes")
@@ -620,6 +671,7 @@ class AirbrushTextualApp(App):
                     except Exception:
                         pass
                     self.poller = None
+                self._close_tool_manager()
                 self._listener_attached = False
                 if self.dispatcher:
                     try:
@@ -638,6 +690,7 @@ class AirbrushTextualApp(App):
                     return
                 # Create fresh dispatcher (no periodic poller; status is on-demand)
                 self.dispatcher = Dispatcher(self.transport, self.state)
+                self.dispatcher.estimator = self.estimator
                 self.dispatcher.on_event(lambda ev: self.call_from_thread(self._handle_event, ev))
                 self.dispatcher.start()
                 self._listener_attached = True
@@ -645,6 +698,8 @@ class AirbrushTextualApp(App):
                 if self._agent:
                     try:
                         self._agent.set_transport(self.transport)
+                        # Share rr_model reads with the poller and UI through the sequencer
+                        self._agent.set_sequencer(self.dispatcher.sequencer)
                     except Exception:
                         pass
                 # Initialize ToolManager
@@ -1095,8 +1150,7 @@ class AirbrushTextualApp(App):
                         M106_FanControl.create(p=fan_on, s=0.0),
                         M400_WaitForMoves.create(),
                     ]
-                    for instr in seq:
-                        self.dispatcher.enqueue(instr)
+                    self.dispatcher.submit_group(seq)
                 return
             if cmd == "draw":
                 # draw [params per commands.yaml]
@@ -1204,8 +1258,7 @@ class AirbrushTextualApp(App):
                     seq.append(G1_LinearMove.create(**{axis: 0.0}))
                     seq.append(M106_FanControl.create(p=fan_on, s=0.0))
                     seq.append(M400_WaitForMoves.create())
-                    for instr in seq:
-                        self.dispatcher.enqueue(instr)
+                    self.dispatcher.submit_group(seq)
                 return
             if cmd == "ip":
                 # Auto-connect to serial and query IP (M552)
@@ -1384,8 +1437,13 @@ class AirbrushTextualApp(App):
                 if self.gcode_log:
                     self.gcode_log.write(escape(f"→ {line}"))
                 try:
-                    # Use send_line instead of query; firmware may reset immediately
-                    self.transport.send_line(line)
+                    # Out-of-band lane: skips queued work and any ack wait in progress
+                    if self.dispatcher:
+                        res = self.dispatcher.emergency_stop(line)
+                        if not res.ok:
+                            raise RuntimeError(res.error)
+                    else:
+                        self.transport.emergency_stop(line)
                 except Exception as e:
                     if self.high_log:
                         self.high_log.write(f"[error] estop: {e}")
@@ -1453,7 +1511,7 @@ class AirbrushTextualApp(App):
                                 self._motion_refresh_timer.cancel()
                             except Exception:
                                 pass
-                        self._motion_refresh_timer = self.set_interval(0.25, self._refresh_coords_machine)
+                        self._motion_refresh_timer = self.set_interval(self._DRIFT_POLL_S, self._refresh_coords_machine)
             except Exception:
                 pass
             return
@@ -1554,16 +1612,31 @@ class AirbrushTextualApp(App):
                 self.high_log.write(f"[error] {ev.message}")
             return
         if isinstance(ev, StateUpdatedEvent):
-            self._update_status()
             self._last_status_ts = time.time()
             return 
 
     def _refresh_coords_machine(self) -> None:
-        # Latest-only, non-overlapping M409 K"coords.machine" refresh for live positions during motion
+        # Latest-only, non-overlapping machinePosition refresh for live positions during motion
         if self._motion_refresh_inflight:
             return
         if not self.transport or not self.transport.is_connected():
             return
+        seq = getattr(self.dispatcher, "sequencer", None) if self.dispatcher else None
+        if seq:
+            # Through the sequencer the read is shared with identical poller/agent reads
+            self._motion_refresh_inflight = True
+            start_ts = time.time()
+
+            def on_complete(res):
+                self._motion_refresh_inflight = False
+                # Drop failed or stale responses (arrived too late)
+                if not res or not res.ok or res.data is None or (time.time() - start_ts) > 1.0:
+                    return
+                self._apply_machine_coords(res.data)
+
+            spec = HttpQuerySpec(endpoint="rr_model", params={"key": "move.axes[].machinePosition", "flags": "f"})
+            seq.submit(Request(kind=RequestKind.QUERY, priority=Priority.MEDIUM, payload=spec, timeout_s=0.8, on_complete=on_complete))
+            return
         self._motion_refresh_inflight = True
         try:
             start_ts = time.time()
@@ -1593,7 +1666,15 @@ class AirbrushTextualApp(App):
             # Drop stale responses (arrived too late)
             if (time.time() - start_ts) > 1.0:
                 return
-            # Parse JSON and update only the coords.machine part of observed
+            self._apply_machine_coords(resp)
+        finally:
+            self._motion_refresh_inflight = False
+
+    def _apply_machine_coords(self, resp) -> None:
+        # Parse JSON (M409 text or rr_model dict) and update only the coords.machine part of observed
+        if isinstance(resp, dict):
+            obj = resp
+        else:
             try:
                 import json
                 txt = resp.strip()
@@ -1602,24 +1683,22 @@ class AirbrushTextualApp(App):
                 obj = json.loads(txt)
             except Exception:
                 obj = {}
-            result = obj.get('result') if isinstance(obj, dict) else None
-            machine = result if isinstance(result, (list, tuple)) else None
-            if isinstance(machine, (list, tuple)):
-                # Debounce unchanged values (within a small epsilon)
-                try:
-                    if isinstance(self._last_machine_pos, (list, tuple)) and len(self._last_machine_pos) >= 3 and len(machine) >= 3:
-                        eps = 1e-3
-                        if (abs(float(machine[0]) - float(self._last_machine_pos[0])) < eps and
-                            abs(float(machine[1]) - float(self._last_machine_pos[1])) < eps and
-                            abs(float(machine[2]) - float(self._last_machine_pos[2])) < eps):
-                            return
-                except Exception:
-                    pass
-                # Merge minimally to the raw_status branch used by status bar
-                self._merge_observed_patch({
-                    'raw_status': {'raw': {'coords': {'machine': machine}}}
-                })
-                self._last_machine_pos = list(machine)
-                self._last_status_ts = time.time()
-        finally:
-            self._motion_refresh_inflight = False 
\ No newline at end of file
+        result = obj.get('result') if isinstance(obj, dict) else None
+        machine = result if isinstance(result, (list, tuple)) else None
+        if isinstance(machine, (list, tuple)):
+            # Debounce unchanged values (within a small epsilon)
+            try:
+                if isinstance(self._last_machine_pos, (list, tuple)) and len(self._last_machine_pos) >= 3 and len(machine) >= 3:
+                    eps = 1e-3
+                    if (abs(float(machine[0]) - float(self._last_machine_pos[0])) < eps and
+                        abs(float(machine[1]) - float(self._last_machine_pos[1])) < eps and
+                        abs(float(machine[2]) - float(self._last_machine_pos[2])) < eps):
+                        return
+            except Exception:
+                pass
+            # Merge minimally to the raw_status branch used by status bar
+            self._merge_observed_patch({
+                'raw_status': {'raw': {'coords': {'machine': machine}}}
+            })
+            self._last_machine_pos = list(machine)
+            self._last_status_ts = time.time() 
\ No newline at end of file
@@ -116,10 +116,15 @@ class G1_LinearMove(GCodeInstruction, ModalInstruction):
         if "position" not in state:
             state["position"] = {}
         
-        # Update position for each specified axis
+        # Update position for each specified axis; in relative mode (G91) values are distances
+        relative = state.get("positioning", {}).get("mode") == "relative"
         for axis, value in self.parameters.items():
             if axis != 'F':  # Skip feedrate parameter
-                state["position"][axis.lower()] = value
+                current = state["position"].get(axis.lower())
+                if relative and isinstance(current, (int, float)) and isinstance(value, (int, float)):
+                    state["position"][axis.lower()] = current + value
+                else:
+                    state["position"][axis.lower()] = value
         
         # Update feedrate if specified
         if 'F' in self.parameters:
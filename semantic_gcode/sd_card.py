@@ -5,6 +5,7 @@ This module provides a high-level interface for SD card operations,
 including file management, print control, and configuration handling.
 """
 from typing import Dict, Any, List, Optional, Union, BinaryIO, Callable
+import io
 import os
 import re
 import time
@@ -12,6 +13,7 @@ from dataclasses import dataclass
 from datetime import datetime
 
 from .transport.base import Transport
+from .transport.http import HttpTransport
 from .utils.exceptions import TransportError, OperationError
 
 
@@ -54,6 +56,9 @@ class SDCard:
     
     This class provides methods for file management, print control,
     and configuration handling on the SD card of a G-code controlled machine.
+    
+    Over an HttpTransport, files are uploaded with a single rr_upload request
+    instead of line by line between M28 and M29.
     """
     
     def __init__(self, transport: Transport):
@@ -68,6 +73,40 @@ class SDCard:
         self._writing_file: Optional[str] = None
         self._print_status: PrintStatus = PrintStatus()
     
+    def _uses_http_upload(self) -> bool:
+        """
+        Check whether files can be uploaded with rr_upload instead of M28/M29.
+        
+        Returns:
+            bool: True if the transport is an HttpTransport
+        """
+        return isinstance(self._transport, HttpTransport)
+    
+    def _http_upload(
+        self,
+        filename: str,
+        source: Union[str, bytes, BinaryIO],
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> bool:
+        """
+        Upload a file in one rr_upload request.
+        
+        Args:
+            filename: The name of the file on the SD card; bare names are placed in
+                0:/gcodes, where M28 would have written them
+            source: The content as text or bytes, or a file object
+            progress_callback: Optional callback for progress updates
+            
+        Returns:
+            bool: True if successful
+        """
+        remote_path = filename if (":" in filename or filename.startswith("/")) else f"0:/gcodes/{filename}"
+        if isinstance(source, str):
+            source = source.encode("utf-8")
+        elif isinstance(source, io.TextIOBase):
+            source = source.read().encode("utf-8")
+        return self._transport.upload_file(remote_path, source, progress_callback=progress_callback)
+    
     def list_files(self, directory: str = "") -> List[FileInfo]:
         """
         List files on the SD card.
@@ -247,6 +286,9 @@ class SDCard:
             TransportError: If communication fails
             OperationError: If the operation fails
         """
+        if self._uses_http_upload():
+            return self._http_upload(filename, content)
+        
         try:
             # Start file write
             response = self._transport.query(f"M28 \"{filename}\"")
@@ -664,6 +706,12 @@ class SDCard:
             TransportError: If communication fails
             OperationError: If the operation fails
         """
+        if self._uses_http_upload():
+            if isinstance(local_file, str):
+                with open(local_file, "rb") as f:
+                    return self._http_upload(remote_filename, f, progress_callback)
+            return self._http_upload(remote_filename, local_file, progress_callback)
+        
         try:
             # Open the local file if a path was provided
             file_obj = None
@@ -744,6 +792,9 @@ class SDCard:
             TransportError: If communication fails
             OperationError: If the operation fails
         """
+        if self._uses_http_upload():
+            return self._http_upload(filename, content)
+        
         try:
             # Start file write with M564 S0 (disable print simulation)
             response = self._transport.query(f"M564 S0")
@@ -807,6 +858,9 @@ class SDCard:
             TransportError: If communication fails
             OperationError: If the operation fails
         """
+        if self._uses_http_upload():
+            return self._http_upload(filename, content)
+        
         try:
             # Start file write
             response = self._transport.query(f"M28 \"{filename}\"")
@@ -861,6 +915,10 @@ class SDCard:
             TransportError: If communication fails
             OperationError: If the operation fails
         """
+        if self._uses_http_upload():
+            with open(local_file_path, "rb") as f:
+                return self._http_upload(filename, f, progress_callback)
+        
         try:
             with open(local_file_path, 'r') as f:
                 # Get file size for progress reporting
@@ -4,8 +4,9 @@ Transport layer for G-code communication.
 This package provides transport implementations for communicating with G-code devices
 using different protocols (HTTP, Serial, Telnet).
 """
-from .base import Transport
+from .base import Transport, AsyncTransport
 from .http import HttpTransport
+from .framing import ResponseFramer, get_framer
 
 # Import SerialTransport conditionally
 try:
@@ -13,8 +14,24 @@ try:
 except ImportError:
     SERIAL_AVAILABLE = False
 
-__all__ = ['Transport', 'HttpTransport']
+# Import AsyncSerialTransport conditionally (requires pyserial-asyncio)
+try:
+    from .async_serial import AsyncSerialTransport, SERIAL_ASYNCIO_AVAILABLE
+except ImportError:
+    SERIAL_ASYNCIO_AVAILABLE = False
+
+# Import AsyncHttpTransport conditionally (requires aiohttp)
+try:
+    from .async_http import AsyncHttpTransport, AIOHTTP_AVAILABLE
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+__all__ = ['Transport', 'AsyncTransport', 'HttpTransport', 'ResponseFramer', 'get_framer']
 
 # Add SerialTransport to __all__ if available
 if SERIAL_AVAILABLE:
     __all__.append('SerialTransport')
+if SERIAL_ASYNCIO_AVAILABLE:
+    __all__.append('AsyncSerialTransport')
+if AIOHTTP_AVAILABLE:
+    __all__.append('AsyncHttpTransport')
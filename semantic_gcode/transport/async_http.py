@@ -0,0 +1,380 @@
+"""
+Asyncio HTTP transport for Duet Web Control.
+
+This module provides an aiohttp-based counterpart to HttpTransport. Requests
+share a bounded pool of keep-alive connections, so independent rr_model and
+rr_reply requests can run concurrently instead of one after another.
+"""
+import asyncio
+import json
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+from .base import AsyncTransport
+from .framing import produces_no_reply
+from ..utils.exceptions import ConnectionError, TimeoutError, AuthenticationError, TransportError
+
+
+class AsyncHttpTransport(AsyncTransport):
+    """
+    Asyncio HTTP transport for communicating with Duet Web Control.
+
+    The connection pool is capped at ``max_connections`` because the network
+    stack on Duet boards only serves a handful of sessions at once; requests
+    beyond the cap wait for a free connection instead of being refused.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        password: Optional[str] = None,
+        timeout: float = 10.0,
+        retry_attempts: int = 3,
+        retry_delay: float = 0.5,
+        max_connections: int = 4
+    ):
+        """
+        Initialize an asyncio HTTP transport for Duet Web Control.
+
+        Args:
+            url: The base URL of the Duet Web Control interface
+            password: Optional password for authentication
+            timeout: Timeout for HTTP requests in seconds
+            retry_attempts: Number of retry attempts for failed requests
+            retry_delay: Delay between retry attempts in seconds
+            max_connections: Maximum number of pooled keep-alive connections
+        """
+        self.base_url = url.rstrip('/')
+        self.password = password
+        self.timeout = timeout
+        self.retry_attempts = retry_attempts
+        self.retry_delay = retry_delay
+        self.max_connections = max(1, int(max_connections))
+        self.session: Optional["aiohttp.ClientSession"] = None
+        self._connected = False
+
+        # Reply tracking via the object model's seqs.reply counter. rr_reply is a
+        # single shared buffer, so queries run one at a time while other requests
+        # (rr_model fetches) still share the pool concurrently.
+        self.reply_grace = 0.1
+        self._query_lock = asyncio.Lock()
+        self._seen_reply_seq: Optional[int] = None
+        self._buffer_space: Optional[int] = None
+        self._buffer_capacity: Optional[int] = None
+
+    async def connect(self) -> bool:
+        """
+        Open the connection pool and verify the Duet controller responds.
+
+        Returns:
+            bool: True if connection was successful
+
+        Raises:
+            ConnectionError: If aiohttp is missing or connection fails
+            AuthenticationError: If authentication fails
+        """
+        if not AIOHTTP_AVAILABLE:
+            raise ConnectionError("aiohttp is not installed")
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=30.0)
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        try:
+            status, _ = await self._request('GET', "/rr_model", params={"key": "boards"})
+            if status == 401:
+                if not self.password:
+                    raise AuthenticationError("Authentication required but no password provided")
+                auth_status, _ = await self._request('POST', "/rr_connect", data={'password': self.password})
+                if auth_status != 200:
+                    raise AuthenticationError("Authentication failed")
+                status, _ = await self._request('GET', "/rr_model", params={"key": "boards"})
+            if status != 200:
+                raise ConnectionError(f"Failed to connect to Duet Web Control: {status}")
+            self._connected = True
+            return True
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise ConnectionError(f"Failed to connect to Duet Web Control: {str(e)}")
+
+    async def disconnect(self) -> None:
+        """
+        Close the session with the Duet controller and release pooled connections.
+        """
+        if self._connected:
+            try:
+                await self._request('POST', "/rr_disconnect")
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                # Ignore errors during disconnect
+                pass
+        self._connected = False
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def is_connected(self) -> bool:
+        """
+        Check if the transport is currently connected.
+
+        Returns:
+            bool: True if connected, False otherwise
+        """
+        return self._connected
+
+    async def _request(self, method: str, path: str, **kwargs) -> Tuple[int, str]:
+        """
+        Make one HTTP request on a pooled connection.
+
+        Args:
+            method: The HTTP method (GET, POST, etc.)
+            path: The path below the base URL (e.g. "/rr_model")
+            **kwargs: Additional arguments to pass to aiohttp
+
+        Returns:
+            Tuple[int, str]: The status code and response body
+        """
+        async with self.session.request(method, f"{self.base_url}{path}", **kwargs) as response:
+            return response.status, await response.text()
+
+    async def _request_with_retry(self, method: str, path: str, **kwargs) -> Tuple[int, str]:
+        """
+        Make an HTTP request, retrying on server errors and connection failures.
+
+        Args:
+            method: The HTTP method (GET, POST, etc.)
+            path: The path below the base URL
+            **kwargs: Additional arguments to pass to aiohttp
+
+        Returns:
+            Tuple[int, str]: The status code and response body
+
+        Raises:
+            aiohttp.ClientError: If all retry attempts fail
+            asyncio.TimeoutError: If the last attempt timed out
+        """
+        last_error: Optional[BaseException] = None
+        for attempt in range(self.retry_attempts):
+            try:
+                status, text = await self._request(method, path, **kwargs)
+                if status < 500:
+                    return status, text
+                last_error = aiohttp.ClientError(f"Server error: {status}")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                last_error = e
+            if attempt < self.retry_attempts - 1:
+                await asyncio.sleep(self.retry_delay)
+        if last_error:
+            raise last_error
+        raise aiohttp.ClientError("All retry attempts failed")
+
+    async def send_line(self, line: str) -> bool:
+        """
+        Send a single line of G-code to the device.
+
+        Args:
+            line: The G-code command to send
+
+        Returns:
+            bool: True if the command was sent successfully
+
+        Raises:
+            ConnectionError: If not connected
+            TimeoutError: If the request times out
+            TransportError: For other transport-related errors
+        """
+        if not self.is_connected():
+            raise ConnectionError("Not connected to Duet Web Control")
+        try:
+            status, text = await self._request_with_retry('GET', "/rr_gcode", params={"gcode": line})
+            self._record_buffer_space(status, text)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Request timed out when sending: {line}")
+        except aiohttp.ClientError as e:
+            raise TransportError(f"Failed to send G-code: {str(e)}", {"command": line})
+        if status != 200:
+            raise TransportError(f"Failed to send G-code: {status}")
+        return True
+
+    async def query(self, query_cmd: str) -> Optional[str]:
+        """
+        Send a query command and get the response.
+
+        Args:
+            query_cmd: The query command to send
+
+        Returns:
+            Optional[str]: The response from the device, or None if no response
+
+        Raises:
+            ConnectionError: If not connected
+            TimeoutError: If the request times out
+            TransportError: For other transport-related errors
+        """
+        if not self.is_connected():
+            raise ConnectionError("Not connected to Duet Web Control")
+        if not query_cmd or not str(query_cmd).strip():
+            return None
+        async with self._query_lock:
+            # Note the reply counter before sending so the reply can be tied to this
+            # command; firmware without seqs (RRF 2) gets the fixed delay
+            before = await self._reply_seq()
+            if before is None:
+                await self.send_line(query_cmd)
+                await asyncio.sleep(0.1)
+                return await self.read_reply()
+
+            # Claim replies left behind by earlier commands so they are not mixed in
+            if self._seen_reply_seq is not None and before != self._seen_reply_seq:
+                await self.read_reply()
+            self._seen_reply_seq = before
+
+            await self.send_line(query_cmd)
+
+            # Return as soon as the counter advances. Only commands known to
+            # produce no reply may finish early, once the firmware has consumed
+            # them from its input buffer; anything else waits for its reply
+            silent = produces_no_reply(query_cmd)
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            interval = 0.005
+            while True:
+                seq = await self._reply_seq()
+                if seq is not None and seq != before:
+                    self._seen_reply_seq = seq
+                    return await self.read_reply()
+                elapsed = loop.time() - start
+                if silent and elapsed >= self.reply_grace and await self._input_drained():
+                    return ""
+                if elapsed >= self.timeout:
+                    raise TimeoutError(f"No reply received for: {query_cmd}")
+                await asyncio.sleep(interval)
+                interval = min(0.05, interval * 2)
+
+    async def _reply_seq(self) -> Optional[int]:
+        """
+        Read the object model reply sequence number (seqs.reply).
+
+        Returns:
+            Optional[int]: The counter, or None if the firmware does not report it
+        """
+        try:
+            data = await self.get_model(key="seqs.reply", flags="f")
+            result = data.get("result") if isinstance(data, dict) else None
+            return int(result) if result is not None else None
+        except (TransportError, ValueError, TypeError):
+            return None
+
+    async def _input_drained(self) -> bool:
+        """
+        Check whether the firmware has consumed everything sent through rr_gcode.
+
+        Returns:
+            bool: True if the input buffer is back at its largest observed free space;
+                False if the space is unknown (rr_gcode failed or did not report it)
+        """
+        status, text = await self._request_with_retry('GET', "/rr_gcode", params={"gcode": ""})
+        if status != 200:
+            return False
+        self._record_buffer_space(status, text)
+        space = self._buffer_space
+        return space is not None and self._buffer_capacity is not None and space >= self._buffer_capacity
+
+    def _record_buffer_space(self, status: int, text: str) -> None:
+        if status != 200:
+            return
+        try:
+            buff = json.loads(text).get("buff")
+            self._buffer_space = int(buff) if buff is not None else None
+        except (json.JSONDecodeError, ValueError, AttributeError, TypeError):
+            self._buffer_space = None
+        if self._buffer_space is not None:
+            self._buffer_capacity = max(self._buffer_capacity or 0, self._buffer_space)
+
+    async def read_reply(self) -> Optional[str]:
+        """Fetch the current rr_reply buffer without sending a new command."""
+        if not self.is_connected():
+            raise ConnectionError("Not connected to Duet Web Control")
+        try:
+            status, text = await self._request_with_retry('GET', "/rr_reply")
+        except asyncio.TimeoutError:
+            raise TimeoutError("Request timed out when reading rr_reply")
+        except aiohttp.ClientError as e:
+            raise TransportError(f"Failed to read reply: {str(e)}")
+        if status != 200:
+            return None
+        try:
+            reply_data = json.loads(text)
+            if isinstance(reply_data, dict) and "buff" in reply_data:
+                return reply_data["buff"]
+        except (json.JSONDecodeError, ValueError):
+            pass
+        return text
+
+    async def get_model(self, key: Optional[str] = None, flags: Optional[str] = None) -> Dict[str, Any]:
+        """Query rr_model with optional key and flags and return parsed JSON.
+
+        Args:
+            key: Optional object model path (e.g., "sensors.endstops[0:2].triggered")
+            flags: Optional flags string (e.g., "f" or "v")
+
+        Returns:
+            Dict[str, Any]: Parsed JSON response from rr_model
+        """
+        if not self.is_connected():
+            raise ConnectionError("Not connected to Duet Web Control")
+        params = {}
+        if key:
+            params["key"] = key
+        if flags:
+            params["flags"] = flags
+        try:
+            status, text = await self._request_with_retry('GET', "/rr_model", params=params)
+        except asyncio.TimeoutError:
+            raise TimeoutError("Request timed out when getting rr_model")
+        except aiohttp.ClientError as e:
+            raise TransportError(f"Failed to get rr_model: {str(e)}")
+        if status != 200:
+            raise TransportError(f"Failed to get rr_model: {status}")
+        try:
+            return json.loads(text)
+        except (json.JSONDecodeError, ValueError) as e:
+            raise TransportError(f"Failed to parse rr_model response: {str(e)}")
+
+    async def get_models(self, keys: Iterable[Tuple[Optional[str], Optional[str]]]) -> List[Any]:
+        """Fetch several rr_model keys concurrently over the connection pool.
+
+        Args:
+            keys: (key, flags) pairs to fetch
+
+        Returns:
+            List[Any]: One entry per pair, in order; either the parsed JSON or the
+                exception raised while fetching it
+        """
+        return await asyncio.gather(
+            *(self.get_model(key=key, flags=flags) for key, flags in keys),
+            return_exceptions=True,
+        )
+
+    async def get_status(self) -> Dict[str, Any]:
+        """
+        Get the current status of the device.
+
+        Returns:
+            Dict[str, Any]: A dictionary containing the device status
+        """
+        state, axes = await self.get_models([("state", "f"), ("move.axes", "f")])
+        status: Dict[str, Any] = {"status": "unknown", "position": {}, "moving": False}
+        if isinstance(state, dict):
+            result = state.get("result") or {}
+            status["status"] = result.get("status", "unknown")
+            status["moving"] = result.get("status") in ("busy", "processing", "simulating")
+        if isinstance(axes, dict):
+            for axis in axes.get("result") or []:
+                if isinstance(axis, dict) and "letter" in axis:
+                    status["position"][axis["letter"]] = axis.get("userPosition", 0.0)
+        return status
@@ -0,0 +1,372 @@
+"""
+Asyncio-native serial transport for G-code devices.
+
+This module provides a transport built on pyserial-asyncio. Commands are written
+as soon as they are issued and their replies are matched to them in order by a
+reader task, so many coroutines can have requests in flight on one event loop
+without blocking it or handing work to a thread pool.
+"""
+import asyncio
+import json
+import re
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import serial_asyncio
+    SERIAL_ASYNCIO_AVAILABLE = True
+except ImportError:
+    SERIAL_ASYNCIO_AVAILABLE = False
+
+from .base import AsyncTransport
+from .framing import ResponseFramer, get_framer, GRBL_FRAMER, RRF_FRAMER
+from .serial import LINE_JSON, LINE_MESSAGE, LINE_REPLY
+from ..utils.exceptions import ConnectionError, TimeoutError, TransportError
+
+
+class AsyncSerialTransport(AsyncTransport):
+    """
+    Asyncio serial transport for communicating with G-code devices.
+
+    Every awaitable send_line/query call writes its line immediately (up to
+    ``max_in_flight`` unacknowledged lines) and awaits a future that the reader
+    task resolves when the reply terminator for that line arrives. Output that
+    arrives while nothing is pending is delivered as unsolicited messages.
+    """
+
+    def __init__(self, port: str, baud_rate: int = 115200, timeout: float = 5.0,
+                 auto_detect_board: bool = True, max_in_flight: int = 4,
+                 firmware: Optional[str] = None):
+        """
+        Initialize an asyncio serial transport.
+
+        Args:
+            port: Serial port to connect to
+            baud_rate: Baud rate for serial communication
+            timeout: Timeout for each reply in seconds
+            auto_detect_board: Whether to detect the board type with M115 on connect
+            max_in_flight: Maximum number of unacknowledged lines written to the device
+            firmware: Firmware family used to frame replies; chosen on detection if None
+        """
+        self._port = port
+        self._baud_rate = baud_rate
+        self._timeout = timeout
+        self._auto_detect_board = auto_detect_board
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._connected = False
+
+        self._framer: ResponseFramer = get_framer(firmware)
+        self._framer_fixed = firmware is not None
+        self._max_in_flight = max(1, int(max_in_flight))
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._write_lock: Optional[asyncio.Lock] = None
+        # (future, reply lines, command); a cancelled future marks a request abandoned after its
+        # timeout, whose entry stays queued to absorb the late reply
+        self._pending: deque = deque()
+        self._messages: Optional[asyncio.Queue] = None
+        self._message_listeners: List[Callable[[str, str], None]] = []
+
+        # Board-specific information
+        self.is_duet = False
+        self.firmware_name = None
+        self.firmware_version = None
+        self.board_type = None
+
+        # Response tracking
+        self._last_response = ""
+
+    async def connect(self) -> bool:
+        """
+        Open the serial port and start the reader task.
+
+        Returns:
+            bool: True if connection was successful
+
+        Raises:
+            ConnectionError: If pyserial-asyncio is missing or the port cannot be opened
+        """
+        if not SERIAL_ASYNCIO_AVAILABLE:
+            raise ConnectionError("pyserial-asyncio is not installed")
+        try:
+            self._reader, self._writer = await serial_asyncio.open_serial_connection(
+                url=self._port, baudrate=self._baud_rate
+            )
+        except Exception as e:
+            self._connected = False
+            raise ConnectionError(f"Serial connection error: {str(e)}")
+
+        self._slots = asyncio.Semaphore(self._max_in_flight)
+        self._write_lock = asyncio.Lock()
+        self._messages = asyncio.Queue(maxsize=256)
+        self._connected = True
+        self._reader_task = asyncio.create_task(self._read_loop())
+
+        if self._auto_detect_board:
+            await self._detect_board_type()
+        return True
+
+    async def disconnect(self) -> None:
+        """
+        Close the connection and fail any request still waiting for a reply.
+        """
+        self._connected = False
+        if self._reader_task:
+            self._reader_task.cancel()
+            try:
+                await self._reader_task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._reader_task = None
+        if self._writer:
+            try:
+                self._writer.close()
+            except Exception:
+                pass
+            self._writer = None
+        self._fail_pending(TransportError("Disconnected"))
+
+    def is_connected(self) -> bool:
+        """
+        Check if the transport is connected.
+
+        Returns:
+            bool: True if connected, False otherwise
+        """
+        return self._connected and self._writer is not None
+
+    async def _detect_board_type(self) -> bool:
+        """
+        Detect the board type by sending M115 and choose the reply framer.
+
+        Returns:
+            bool: True if a Duet board was detected, False otherwise
+        """
+        try:
+            firmware_info = (await self.send_line("M115")).strip()
+        except Exception:
+            return False
+        if not self._framer_fixed:
+            if re.match(r'error:\d+', firmware_info):
+                self._framer = GRBL_FRAMER
+            else:
+                self._framer = get_framer(firmware_info)
+        if "RepRapFirmware" not in firmware_info:
+            return False
+        self.is_duet = True
+        if not self._framer_fixed:
+            self._framer = RRF_FRAMER
+        firmware_match = re.search(r'FIRMWARE_NAME:\s*(RepRapFirmware[^,\n]*)', firmware_info)
+        self.firmware_name = firmware_match.group(1) if firmware_match else "RepRapFirmware"
+        version_match = re.search(r'FIRMWARE_VERSION:\s*([0-9.]+)', firmware_info)
+        if version_match:
+            self.firmware_version = version_match.group(1)
+        board_match = re.search(r'ELECTRONICS:\s*([^,\n]+)', firmware_info)
+        if board_match:
+            self.board_type = board_match.group(1).strip()
+        return True
+
+    async def _read_loop(self) -> None:
+        """
+        Read lines until cancelled and route them to pending requests or messages.
+        """
+        try:
+            while True:
+                raw = await self._reader.readline()
+                if not raw:
+                    # EOF: the device went away
+                    break
+                ln = raw.decode('utf-8', errors='replace').strip()
+                if ln:
+                    self._dispatch_line(ln)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._fail_pending(TransportError(f"Serial read error: {str(e)}"))
+            return
+        self._connected = False
+        self._fail_pending(ConnectionError("Serial port closed"))
+
+    def _dispatch_line(self, ln: str) -> None:
+        kind = LINE_JSON if ln.startswith("{") else LINE_REPLY
+        head = self._pending[0] if self._pending else None
+        if head is not None and not self._framer.is_terminal(ln) and not self._framer.is_reply(ln, head[2]):
+            # Status reports and JSON the command did not ask for are messages
+            head = None
+        if head is not None:
+            future, lines, _ = head
+            lines.append(ln)
+            if self._framer.is_terminal(ln):
+                self._pending.popleft()
+                if not future.done():
+                    future.set_result(lines)
+        else:
+            if kind == LINE_REPLY:
+                kind = LINE_MESSAGE
+            if self._messages.full():
+                self._messages.get_nowait()
+            self._messages.put_nowait((kind, ln))
+        for cb in list(self._message_listeners):
+            try:
+                cb(kind, ln)
+            except Exception:
+                pass
+
+    def _fail_pending(self, error: Exception) -> None:
+        while self._pending:
+            future, _, _ = self._pending.popleft()
+            if not future.done():
+                future.set_exception(error)
+
+    async def _exchange(self, line: str, timeout: Optional[float] = None) -> str:
+        """
+        Write a line and await its complete reply.
+
+        Args:
+            line: The G-code line to send
+            timeout: Seconds to wait for the reply (defaults to the transport timeout)
+
+        Returns:
+            str: The reply, one line per received line
+        """
+        if not self.is_connected():
+            raise TransportError("Not connected")
+        async with self._slots:
+            future = asyncio.get_running_loop().create_future()
+            entry: Tuple[asyncio.Future, List[str], str] = (future, [], line)
+            async with self._write_lock:
+                self._pending.append(entry)
+                self._writer.write((line.rstrip('\r\n') + '\n').encode())
+                await self._writer.drain()
+            try:
+                lines = await asyncio.wait_for(asyncio.shield(future), timeout or self._timeout)
+            except asyncio.TimeoutError:
+                # Removing the entry would hand its late reply to the next request;
+                # it stays queued and is dropped once its own terminator arrives
+                future.cancel()
+                raise TimeoutError("No complete response received", {"command": line, "partial": list(entry[1])})
+        response = "\n".join(lines)
+        self._last_response = response
+        return response
+
+    async def send_line(self, line: str) -> str:
+        """
+        Send a line of G-code to the device.
+
+        Args:
+            line: The G-code line to send
+
+        Returns:
+            str: The response from the device
+
+        Raises:
+            TransportError: If the transport is not connected or an error occurs
+        """
+        try:
+            return await self._exchange(line)
+        except TransportError:
+            raise
+        except Exception as e:
+            raise TransportError(f"Error sending command: {str(e)}")
+
+    async def query(self, query_cmd: str) -> Optional[str]:
+        """
+        Send a query and get the response.
+
+        Args:
+            query_cmd: The G-code query to send
+
+        Returns:
+            Optional[str]: The response from the device
+
+        Raises:
+            TransportError: If the transport is not connected or an error occurs
+        """
+        if not query_cmd or not str(query_cmd).strip():
+            return ""
+        try:
+            return await self._exchange(query_cmd)
+        except TransportError:
+            raise
+        except Exception as e:
+            raise TransportError(f"Error querying: {str(e)}")
+
+    async def read_message(self, timeout: Optional[float] = None) -> Optional[Tuple[str, str]]:
+        """
+        Get the next unsolicited message received from the device.
+
+        Args:
+            timeout: Seconds to wait for a message; None returns immediately
+
+        Returns:
+            Optional[Tuple[str, str]]: (kind, line) or None if no message is available
+        """
+        if self._messages is None:
+            return None
+        try:
+            if timeout is None:
+                return self._messages.get_nowait()
+            return await asyncio.wait_for(self._messages.get(), timeout)
+        except (asyncio.QueueEmpty, asyncio.TimeoutError):
+            return None
+
+    def add_message_listener(self, callback: Callable[[str, str], None]) -> None:
+        """
+        Register a callback invoked for every received line.
+
+        Args:
+            callback: Called as (kind, line) from the event loop
+        """
+        self._message_listeners.append(callback)
+
+    async def get_status(self) -> Dict[str, Any]:
+        """
+        Get the current status of the device.
+
+        Status and position are requested concurrently.
+
+        Returns:
+            Dict[str, Any]: A dictionary containing the device status
+
+        Raises:
+            ConnectionError: If not connected
+        """
+        if not self.is_connected():
+            raise ConnectionError("Not connected to device")
+        status: Dict[str, Any] = {"status": "unknown", "position": {}, "firmware": {}}
+        if self.firmware_name:
+            status["firmware"]["name"] = self.firmware_name
+        if self.firmware_version:
+            status["firmware"]["version"] = self.firmware_version
+        if self.board_type:
+            status["firmware"]["board"] = self.board_type
+
+        state_cmd = 'M409 K"state.status" F"f"' if self.is_duet else ""
+        state_resp, pos_resp = await asyncio.gather(
+            self.query(state_cmd), self.query("M114"), return_exceptions=True
+        )
+        if isinstance(state_resp, str) and "{" in state_resp:
+            try:
+                txt = state_resp[state_resp.find("{"): state_resp.rfind("}") + 1]
+                status["status"] = json.loads(txt).get("result", "unknown")
+            except (json.JSONDecodeError, ValueError):
+                pass
+        if isinstance(pos_resp, str):
+            for axis in ["X", "Y", "Z", "E"]:
+                match = re.search(rf'{axis}:(-?\d+\.?\d*)', pos_resp)
+                if match:
+                    try:
+                        status["position"][axis.lower()] = float(match.group(1))
+                    except ValueError:
+                        pass
+        return status
+
+    def get_last_response(self) -> str:
+        """
+        Get the last response received from the board.
+
+        Returns:
+            str: The last response received
+        """
+        return self._last_response
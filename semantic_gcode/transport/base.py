@@ -76,3 +76,76 @@ class Transport(ABC):
             Dict[str, Any]: A dictionary containing the device status
         """
         pass
+
+
+class AsyncTransport(ABC):
+    """
+    Abstract base class for asyncio-native G-code transports.
+    
+    Mirrors the Transport interface with coroutine methods so many logical
+    requests can be in flight from a single event loop without blocking it.
+    is_connected stays synchronous since it only inspects local state.
+    """
+    
+    @abstractmethod
+    async def connect(self) -> bool:
+        """
+        Establish a connection to the device.
+        
+        Returns:
+            bool: True if connection was successful, False otherwise
+        """
+        pass
+    
+    @abstractmethod
+    async def disconnect(self) -> None:
+        """
+        Close the connection to the device.
+        """
+        pass
+    
+    @abstractmethod
+    def is_connected(self) -> bool:
+        """
+        Check if the transport is currently connected.
+        
+        Returns:
+            bool: True if connected, False otherwise
+        """
+        pass
+    
+    @abstractmethod
+    async def send_line(self, line: str) -> Any:
+        """
+        Send a single line of G-code to the device.
+        
+        Args:
+            line: The G-code command to send
+            
+        Returns:
+            Any: A truthy value (the response or True) if the command was sent successfully
+        """
+        pass
+    
+    @abstractmethod
+    async def query(self, query_cmd: str) -> Optional[str]:
+        """
+        Send a query command and get the response.
+        
+        Args:
+            query_cmd: The query command to send
+            
+        Returns:
+            Optional[str]: The response from the device, or None if no response
+        """
+        pass
+    
+    @abstractmethod
+    async def get_status(self) -> Dict[str, Any]:
+        """
+        Get the current status of the device.
+        
+        Returns:
+            Dict[str, Any]: A dictionary containing the device status
+        """
+        pass
@@ -0,0 +1,202 @@
+"""
+Response framing for line-based G-code firmwares.
+
+Each firmware family ends the reply to a command differently: RepRapFirmware
+and Marlin finish every reply with ``ok``, Grbl answers each line with either
+``ok`` or ``error:<n>``, and several firmwares emit a halt line instead of an
+``ok`` once they have shut down. A ResponseFramer captures those rules so the
+serial transport can tell the moment a reply is complete instead of waiting
+for the port to go quiet, and which lines received meanwhile are unsolicited
+(status reports, busy and temperature reports) rather than part of the reply.
+"""
+import re
+from typing import Iterable, Optional
+
+
+class ResponseFramer:
+    """
+    Terminator and error patterns for one firmware family.
+
+    Patterns are regular expressions matched against the start of each received
+    line (after stripping whitespace).
+    """
+
+    def __init__(self, name: str, terminators: Iterable[str], errors: Iterable[str] = (),
+                 messages: Iterable[str] = ()):
+        """
+        Initialize a response framer.
+
+        Args:
+            name: Firmware family name (e.g. "marlin")
+            terminators: Patterns for lines that complete a reply
+            errors: Patterns for lines that report a failed command
+            messages: Patterns for lines the firmware emits on its own, never as
+                part of a reply
+        """
+        self.name = name
+        self.terminators = tuple(terminators)
+        self.errors = tuple(errors)
+        self.messages = tuple(messages)
+        self._terminal_re = re.compile("|".join(f"(?:{p})" for p in self.terminators))
+        self._error_re = re.compile("|".join(f"(?:{p})" for p in self.errors)) if self.errors else None
+        self._message_re = re.compile("|".join(f"(?:{p})" for p in self.messages)) if self.messages else None
+
+    def is_terminal(self, line: str) -> bool:
+        """
+        Check whether a line completes the reply to the current command.
+
+        Args:
+            line: A received line, stripped of whitespace
+
+        Returns:
+            bool: True if the reply is complete
+        """
+        return bool(self._terminal_re.match(line))
+
+    def is_error(self, line: str) -> bool:
+        """
+        Check whether a line reports that the command failed.
+
+        Args:
+            line: A received line, stripped of whitespace
+
+        Returns:
+            bool: True if the line is an error report
+        """
+        return bool(self._error_re and self._error_re.match(line))
+
+    def is_reply(self, line: str, command: str) -> bool:
+        """
+        Check whether a non-terminal line received while a command is pending belongs to its reply.
+
+        Object-model JSON belongs only to the commands that ask for it; lines
+        matching the message patterns never belong to a reply. Error lines do,
+        so the caller can see why the command failed.
+
+        Args:
+            line: A received line, stripped of whitespace
+            command: The pending command as written (line numbers and checksums allowed)
+
+        Returns:
+            bool: True if the line is part of the command's reply
+        """
+        if line.startswith("{"):
+            return _command_word(command) in _JSON_COMMANDS
+        return not (self._message_re and self._message_re.match(line))
+
+    def __repr__(self) -> str:
+        return f"ResponseFramer({self.name!r})"
+
+
+# Commands whose reply is object-model or file-list JSON (RepRapFirmware)
+_JSON_COMMANDS = frozenset({"M20", "M36", "M39", "M408", "M409"})
+_COMMAND_WORD_RE = re.compile(r"\s*(?:N\d+\s*)?([A-Za-z]\d+)")
+
+
+def _command_word(command: str) -> str:
+    match = _COMMAND_WORD_RE.match(command)
+    return match.group(1).upper() if match else ""
+
+
+# Unsolicited Marlin output: busy keep-alives and temperature auto-reports
+_MARLIN_MESSAGES = [r"echo:busy", r"busy:", r"T:-?[\d.]+ /"]
+# Unsolicited Grbl output: real-time status reports, feedback messages, the reset banner
+_GRBL_MESSAGES = [r"<", r"\[MSG:", r"Grbl \d"]
+
+# RepRapFirmware (Marlin emulation on USB): every reply, including errors, ends with "ok"
+RRF_FRAMER = ResponseFramer("reprapfirmware", [r"ok$"], [r"Error:"])
+
+# Marlin: "ok" may carry data ("ok T:21.0 /0.0"); a halted printer never sends "ok" again
+MARLIN_FRAMER = ResponseFramer("marlin", [r"ok\b", r"!!", r"Error:Printer halted"], [r"Error:", r"!!"], _MARLIN_MESSAGES)
+
+# Grbl: each line is answered by exactly one "ok" or "error:<n>"; alarms end the exchange
+GRBL_FRAMER = ResponseFramer("grbl", [r"ok$", r"error:\d+", r"ALARM:\d+"], [r"error:", r"ALARM:"], _GRBL_MESSAGES)
+
+# Klipper: "ok" per command; "!!" lines report errors and shutdowns
+KLIPPER_FRAMER = ResponseFramer("klipper", [r"ok\b"], [r"!!", r"Error:"])
+
+# Smoothieware: "ok" per command, "!!" instead of "ok" while halted
+SMOOTHIE_FRAMER = ResponseFramer("smoothie", [r"ok\b", r"!!"], [r"error:", r"Error:", r"!!"])
+
+# Used until the firmware is known: accepts any of the terminators above
+GENERIC_FRAMER = ResponseFramer(
+    "generic",
+    [r"ok\b", r"error:\d+", r"ALARM:\d+", r"!!"],
+    [r"Error:", r"error:", r"ALARM:", r"!!"],
+    _MARLIN_MESSAGES + _GRBL_MESSAGES,
+)
+
+FRAMERS = {
+    framer.name: framer
+    for framer in (RRF_FRAMER, MARLIN_FRAMER, GRBL_FRAMER, KLIPPER_FRAMER, SMOOTHIE_FRAMER, GENERIC_FRAMER)
+}
+
+
+def get_framer(firmware: Optional[str]) -> ResponseFramer:
+    """
+    Choose the framer for a firmware name or identification string.
+
+    Args:
+        firmware: A preset name ("marlin", "grbl", ...) or any text identifying the
+            firmware, such as an M115 reply or a Grbl welcome banner
+
+    Returns:
+        ResponseFramer: The matching framer, or the generic framer if unknown
+    """
+    text = (firmware or "").lower()
+    if not text:
+        return GENERIC_FRAMER
+    if text in FRAMERS:
+        return FRAMERS[text]
+    if "reprapfirmware" in text or text in ("rrf", "duet"):
+        return RRF_FRAMER
+    if "klipper" in text:
+        return KLIPPER_FRAMER
+    if "smoothie" in text:
+        return SMOOTHIE_FRAMER
+    if "grbl" in text:
+        return GRBL_FRAMER
+    if "marlin" in text:
+        return MARLIN_FRAMER
+    return GENERIC_FRAMER
+
+
+# RepRapFirmware commands that never put anything in the reply buffer when they
+# succeed: moves, dwells, modal and offset settings, and waits. Over HTTP there
+# is no "ok", so these are the only commands whose completion can be inferred
+# from the input buffer draining rather than from a reply.
+_SILENT_CODES = frozenset(
+    [f"G{n}" for n in (0, 1, 2, 3, 4, 10, 17, 18, 19, 20, 21, 28, 53, 54, 55, 56, 57, 58, 59, 90, 91, 92)]
+    + ["G59.1", "G59.2", "G59.3"]
+    + [f"M{n}" for n in (3, 4, 5, 17, 18, 42, 82, 83, 84, 104, 106, 107, 140, 400)]
+)
+_CODE_RE = re.compile(r"\s*(?:N\d+\s*)?([GMT])\s*(\d+(?:\.\d+)?)?", re.IGNORECASE)
+
+
+def produces_no_reply(command: str) -> bool:
+    """
+    Check whether every line of a command is known to succeed without a reply.
+
+    Args:
+        command: One or more newline-separated G-code lines
+
+    Returns:
+        bool: True only if each line is a known silent command; unknown commands
+            and queries return False
+    """
+    lines = [line for line in str(command).splitlines() if line.split(";", 1)[0].strip()]
+    if not lines:
+        return False
+    for line in lines:
+        match = _CODE_RE.match(line)
+        if not match or match.group(2) is None:
+            return False
+        letter, number = match.group(1).upper(), match.group(2)
+        # "T" alone reports the current tool; "T<n>" selects one
+        if letter == "T":
+            continue
+        if "." not in number:
+            number = str(int(number))
+        if f"{letter}{number}" not in _SILENT_CODES:
+            return False
+    return True
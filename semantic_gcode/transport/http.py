@@ -4,15 +4,18 @@ HTTP transport implementation for Duet Web Control.
 This module provides a transport implementation that communicates with
 a Duet controller via its HTTP API (Duet Web Control).
 """
+import io
 import json
 import time
-from typing import Dict, Any, Optional, Union
+import zlib
+from typing import Dict, Any, Optional, Union, Iterable, List, Callable, BinaryIO
 import urllib.parse
 
 import requests
 from requests.exceptions import RequestException, Timeout
 
 from .base import Transport
+from .framing import produces_no_reply
 from ..utils.exceptions import ConnectionError, TimeoutError, AuthenticationError, TransportError
 
 
@@ -30,7 +33,8 @@ class HttpTransport(Transport):
         password: Optional[str] = None,
         timeout: float = 10.0,
         retry_attempts: int = 3,
-        retry_delay: float = 0.5
+        retry_delay: float = 0.5,
+        max_batch_bytes: int = 512
     ):
         """
         Initialize an HTTP transport for Duet Web Control.
@@ -41,6 +45,7 @@ class HttpTransport(Transport):
             timeout: Timeout for HTTP requests in seconds
             retry_attempts: Number of retry attempts for failed requests
             retry_delay: Delay between retry attempts in seconds
+            max_batch_bytes: Upper bound on the size of one batched rr_gcode request
         """
         self.base_url = url.rstrip('/')
         self.password = password
@@ -49,6 +54,15 @@ class HttpTransport(Transport):
         self.retry_delay = retry_delay
         self.session = requests.Session()
         self._connected = False
+        self.max_batch_bytes = max(1, int(max_batch_bytes))
+        # Free space in the firmware's G-code input buffer, as last reported by rr_gcode
+        self._buffer_space: Optional[int] = None
+        self._buffer_capacity: Optional[int] = None
+        # Reply tracking via the object model's seqs.reply counter
+        self.reply_grace = 0.1
+        self._seen_reply_seq: Optional[int] = None
+        # Bumped by emergency_stop() so waits in other threads give up
+        self._estops = 0
     
     def connect(self) -> bool:
         """
@@ -148,19 +162,13 @@ class HttpTransport(Transport):
             raise ConnectionError("Not connected to Duet Web Control")
         
         try:
-            # URL encode the G-code command
-            encoded_gcode = urllib.parse.quote(line)
-            
-            # Send the G-code command
-            response = self._make_request_with_retry(
-                'GET',
-                f"{self.base_url}/rr_gcode?gcode={encoded_gcode}",
-                timeout=self.timeout
-            )
-            
-            if response.status_code != 200:
-                raise TransportError(f"Failed to send G-code: {response.status_code}")
-            
+            # A full input buffer means the planner is full; hold the line until it
+            # drains rather than having rr_gcode reject it
+            needed = len(line) + 1
+            if self._buffer_space is not None and self._buffer_space < needed:
+                self._wait_for_buffer_space(min(needed, self._buffer_capacity or needed))
+            # Send the G-code command (also refreshes the known buffer space)
+            self._post_gcode(line)
             return True
             
         except Timeout:
@@ -168,6 +176,154 @@ class HttpTransport(Transport):
         except RequestException as e:
             raise TransportError(f"Failed to send G-code: {str(e)}", {"command": line})
     
+    def _post_gcode(self, text: str) -> Optional[int]:
+        """
+        Submit G-code text through rr_gcode and record the reported buffer space.
+        
+        Args:
+            text: One or more newline-separated G-code lines (may be empty)
+            
+        Returns:
+            Optional[int]: The free input buffer space reported by the firmware
+        """
+        # Quote manually so spaces and newlines are sent as %20/%0A, as DWC does
+        response = self._make_request_with_retry(
+            'GET',
+            f"{self.base_url}/rr_gcode?gcode={urllib.parse.quote(text)}",
+            timeout=self.timeout
+        )
+        if response.status_code != 200:
+            raise TransportError(f"Failed to send G-code: {response.status_code}")
+        try:
+            buff = response.json().get("buff")
+            self._buffer_space = int(buff) if buff is not None else None
+            if self._buffer_space is not None:
+                self._buffer_capacity = max(self._buffer_capacity or 0, self._buffer_space)
+        except (ValueError, AttributeError, TypeError):
+            self._buffer_space = None
+        return self._buffer_space
+    
+    def stream_lines(self, lines: Iterable[str], window: Optional[int] = None,
+                     max_batch_bytes: Optional[int] = None,
+                     on_batch: Optional[Callable[[int, int], None]] = None) -> List[str]:
+        """
+        Send many lines of G-code in as few rr_gcode requests as possible.
+        
+        Lines are packed newline-separated into each request, limited by the free
+        input buffer space the firmware reported in the previous reply (``buff``).
+        When the buffer is too full for the next line, sending pauses and the
+        buffer space is polled with an empty rr_gcode request until it drains.
+        
+        Args:
+            lines: The G-code lines to send, in order
+            window: Optional maximum number of lines per request
+            max_batch_bytes: Optional override for the maximum request size in bytes
+            on_batch: Optional callback invoked as (lines_sent_total, buffer_space)
+                after each request
+            
+        Returns:
+            List[str]: One entry per non-empty line. rr_gcode does not return
+                per-line replies (those are read through rr_reply), so entries
+                are empty strings.
+            
+        Raises:
+            ConnectionError: If not connected or connection fails
+            TimeoutError: If a request times out or the buffer never drains
+            TransportError: For other transport-related errors
+        """
+        if not self.is_connected():
+            raise ConnectionError("Not connected to Duet Web Control")
+        
+        pending = [ln.strip() for ln in lines if ln and ln.strip()]
+        limit = max(1, int(max_batch_bytes or self.max_batch_bytes))
+        per_request = max(1, int(window)) if window else len(pending) or 1
+        sent = 0
+        
+        try:
+            while sent < len(pending):
+                space = self._buffer_space if self._buffer_space is not None else limit
+                budget = min(limit, space)
+                batch: List[str] = []
+                size = 0
+                for line in pending[sent:sent + per_request]:
+                    needed = len(line.encode()) + (1 if batch else 0)
+                    if size + needed > budget:
+                        break
+                    batch.append(line)
+                    size += needed
+                
+                if not batch:
+                    if len(pending[sent].encode()) > limit:
+                        raise TransportError(f"Line exceeds the maximum batch size: {pending[sent]}")
+                    self._wait_for_buffer_space(len(pending[sent].encode()))
+                    continue
+                
+                self._post_gcode("\n".join(batch))
+                sent += len(batch)
+                if on_batch:
+                    on_batch(sent, self._buffer_space if self._buffer_space is not None else -1)
+            
+            return [""] * len(pending)
+            
+        except Timeout:
+            raise TimeoutError("Request timed out when streaming G-code", {"sent": sent})
+        except RequestException as e:
+            raise TransportError(f"Failed to stream G-code: {str(e)}", {"sent": sent})
+    
+    def emergency_stop(self, line: str = "M112") -> None:
+        """
+        Send an emergency stop without waiting for anything in progress.
+        
+        The command goes out in its own rr_gcode request (no retry, no reply
+        wait), and any query or buffer wait running in another thread gives up
+        with a TransportError instead of running to its timeout.
+        
+        Args:
+            line: The stop command to send (M112, or M999 to reset)
+            
+        Raises:
+            ConnectionError: If not connected
+            TransportError: If the request fails
+        """
+        if not self.is_connected():
+            raise ConnectionError("Not connected to Duet Web Control")
+        
+        self._estops += 1
+        try:
+            response = self._make_request(
+                'GET',
+                f"{self.base_url}/rr_gcode?gcode={urllib.parse.quote(line.strip())}",
+                timeout=self.timeout
+            )
+        except RequestException as e:
+            raise TransportError(f"Failed to send emergency stop: {str(e)}", {"command": line})
+        if response.status_code != 200:
+            raise TransportError(f"Failed to send emergency stop: {response.status_code}", {"command": line})
+    
+    def _wait_for_buffer_space(self, needed: int) -> None:
+        """
+        Poll the firmware until its input buffer has room for ``needed`` bytes.
+        
+        Args:
+            needed: Number of bytes required
+            
+        Raises:
+            TimeoutError: If the buffer does not drain within the transport timeout
+        """
+        deadline = time.time() + self.timeout
+        interval = 0.01
+        estops = self._estops
+        while True:
+            space = self._post_gcode("")
+            if space is None or space >= needed:
+                return
+            if self._estops != estops:
+                raise TransportError("Cancelled by emergency stop")
+            if time.time() >= deadline:
+                raise TimeoutError("Timed out waiting for G-code buffer space", {"buff": space})
+            time.sleep(interval)
+            interval = min(0.2, interval * 2)
+    
     def query(self, query_cmd: str) -> Optional[str]:
         """
         Send a query command and get the response.
@@ -191,35 +347,100 @@ class HttpTransport(Transport):
             return None
         
         try:
-            # Send the query command
-            self.send_line(query_cmd)
-            
-            # Wait a short time for the command to be processed
-            time.sleep(0.1)
+            # Note the reply counter before sending so the reply can be tied to
+            # this command; firmware without seqs (RRF 2) gets the fixed delay
+            before = self._reply_seq()
+            if before is None:
+                self.send_line(query_cmd)
+                time.sleep(0.1)
+                return self._fetch_reply()
+            
+            # Claim replies left behind by earlier commands so they are not mixed in
+            if self._seen_reply_seq is not None and before != self._seen_reply_seq:
+                self._fetch_reply()
+            self._seen_reply_seq = before
             
-            # Get the last response
-            response = self._make_request_with_retry(
-                'GET',
-                f"{self.base_url}/rr_reply",
-                timeout=self.timeout
-            )
+            self.send_line(query_cmd)
             
-            if response.status_code != 200:
-                raise TransportError(f"Failed to get query response: {response.status_code}")
-            
-            # Parse the response
-            try:
-                reply_data = response.json()
-                if isinstance(reply_data, dict) and "buff" in reply_data:
-                    return reply_data["buff"]
-                return response.text
-            except (json.JSONDecodeError, ValueError):
-                return response.text
+            # Return as soon as the counter advances. Only commands known to
+            # produce no reply may finish early, once the firmware has consumed
+            # them from its input buffer; anything else waits for its reply
+            silent = produces_no_reply(query_cmd)
+            start = time.time()
+            interval = 0.005
+            estops = self._estops
+            while True:
+                if self._estops != estops:
+                    raise TransportError("Cancelled by emergency stop", {"command": query_cmd})
+                seq = self._reply_seq()
+                if seq is not None and seq != before:
+                    self._seen_reply_seq = seq
+                    return self._fetch_reply()
+                elapsed = time.time() - start
+                if silent and elapsed >= self.reply_grace and self._input_drained():
+                    return ""
+                if elapsed >= self.timeout:
+                    raise TimeoutError(f"No reply received for: {query_cmd}")
+                time.sleep(interval)
+                interval = min(0.05, interval * 2)
             
         except Timeout:
             raise TimeoutError(f"Request timed out when querying: {query_cmd}")
         except RequestException as e:
             raise TransportError(f"Failed to query: {str(e)}", {"command": query_cmd})
+    
+    def _reply_seq(self) -> Optional[int]:
+        """
+        Read the object model reply sequence number (seqs.reply).
+        
+        Returns:
+            Optional[int]: The counter, or None if the firmware does not report it
+        """
+        try:
+            data = self.get_model(key="seqs.reply", flags="f")
+            result = data.get("result") if isinstance(data, dict) else None
+            return int(result) if result is not None else None
+        except (TransportError, ValueError, TypeError):
+            return None
+    
+    def _input_drained(self) -> bool:
+        """
+        Check whether the firmware has consumed everything sent through rr_gcode.
+        
+        Returns:
+            bool: True if the input buffer is back at its largest observed free space;
+                False if the space is unknown (rr_gcode failed or did not report it)
+        """
+        try:
+            space = self._post_gcode("")
+        except (TransportError, RequestException):
+            return False
+        return space is not None and self._buffer_capacity is not None and space >= self._buffer_capacity
+    
+    def _fetch_reply(self) -> str:
+        """
+        Fetch the rr_reply buffer.
+        
+        Returns:
+            str: The reply text
+        """
+        response = self._make_request_with_retry(
+            'GET',
+            f"{self.base_url}/rr_reply",
+            timeout=self.timeout
+        )
+        
+        if response.status_code != 200:
+            raise TransportError(f"Failed to get query response: {response.status_code}")
+        
+        # Parse the response
+        try:
+            reply_data = response.json()
+            if isinstance(reply_data, dict) and "buff" in reply_data:
+                return reply_data["buff"]
+            return response.text
+        except (json.JSONDecodeError, ValueError):
+            return response.text
 
     def read_reply(self) -> Optional[str]:
         """Fetch the current rr_reply buffer without sending a new command."""
@@ -271,6 +492,82 @@ class HttpTransport(Transport):
         except RequestException as e:
             raise TransportError(f"Failed to get rr_model: {str(e)}")
     
+    def upload_file(
+        self,
+        remote_path: str,
+        source: Union[bytes, BinaryIO],
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        chunk_size: int = 8192
+    ) -> bool:
+        """
+        Upload a file to the SD card with a single rr_upload request.
+        
+        The body is read from ``source`` in chunks as it is sent, so memory use does
+        not grow with the file size. The CRC32 of the content is sent along so the
+        firmware can reject a corrupted upload.
+        
+        Args:
+            remote_path: Destination path on the SD card (e.g. "0:/gcodes/part.gcode")
+            source: The file content, or a seekable binary file object
+            progress_callback: Optional callback invoked as (bytes_sent, total_bytes)
+            chunk_size: Number of bytes read from the source at a time
+            
+        Returns:
+            bool: True if the firmware accepted the file
+            
+        Raises:
+            ConnectionError: If not connected or connection fails
+            TimeoutError: If the request times out
+            TransportError: If the upload is rejected or fails
+        """
+        if not self.is_connected():
+            raise ConnectionError("Not connected to Duet Web Control")
+        
+        file_obj = io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+        
+        # First pass: size and checksum, without holding the content in memory
+        start = file_obj.tell()
+        crc = 0
+        total = 0
+        while True:
+            chunk = file_obj.read(chunk_size)
+            if not chunk:
+                break
+            crc = zlib.crc32(chunk, crc)
+            total += len(chunk)
+        file_obj.seek(start)
+        
+        params = {
+            "name": remote_path,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "crc32": f"{crc & 0xFFFFFFFF:08x}",
+        }
+        body = _UploadBody(file_obj, total, chunk_size, progress_callback)
+        try:
+            # Not retried: the body has been consumed once sent
+            response = self._make_request(
+                'POST',
+                f"{self.base_url}/rr_upload",
+                params=params,
+                data=body,
+                headers={"Content-Type": "application/octet-stream"},
+                timeout=self.timeout
+            )
+        except Timeout:
+            raise TimeoutError(f"Request timed out when uploading: {remote_path}")
+        except RequestException as e:
+            raise TransportError(f"Failed to upload file: {str(e)}", {"path": remote_path})
+        
+        if response.status_code != 200:
+            raise TransportError(f"Failed to upload file: {response.status_code}", {"path": remote_path})
+        try:
+            err = response.json().get("err", 0)
+        except (ValueError, AttributeError):
+            err = 0
+        if err:
+            raise TransportError(f"Upload rejected by firmware: {remote_path}", {"path": remote_path, "err": err})
+        return True
+    
     def get_status(self) -> Dict[str, Any]:
         """
         Get the current status of the device.
@@ -484,3 +781,31 @@ class HttpTransport(Transport):
             return model.get("move", {}).get("live", False)
         except (AttributeError, KeyError):
             return False
+
+
+class _UploadBody:
+    """
+    File-like request body that reports upload progress.
+    
+    requests sends objects with ``read`` in blocks and takes the Content-Length
+    from ``__len__``, so the upload is streamed rather than loaded into memory.
+    """
+    
+    def __init__(self, file_obj: BinaryIO, total: int, chunk_size: int,
+                 progress_callback: Optional[Callable[[int, int], None]] = None):
+        self._file = file_obj
+        self._total = total
+        self._chunk_size = chunk_size
+        self._progress = progress_callback
+        self._sent = 0
+    
+    def __len__(self) -> int:
+        return self._total
+    
+    def read(self, size: int = -1) -> bytes:
+        chunk = self._file.read(self._chunk_size if size is None or size < 0 else size)
+        if chunk:
+            self._sent += len(chunk)
+            if self._progress:
+                self._progress(self._sent, self._total)
+        return chunk
@@ -8,7 +8,11 @@ import os
 import time
 import re
 import json
-from typing import Dict, Any, Optional, List, Union, Tuple
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Dict, Any, Optional, List, Union, Tuple, Iterable, Callable
 
 try:
     import serial
@@ -21,10 +25,37 @@ except ImportError:
         pass
 
 from .base import Transport
+from .framing import ResponseFramer, get_framer, GRBL_FRAMER, RRF_FRAMER
 from ..utils.exceptions import ConnectionError, TimeoutError, TransportError
 from ..utils.platform import get_platform, PlatformType, get_serial_port_for_wsl
 
 
+# Classification of lines received from the device
+LINE_REPLY = "reply"        # Part of the reply to a pending command
+LINE_JSON = "json"          # Object-model JSON (M408/M409) belonging to a pending command
+LINE_MESSAGE = "message"    # Unsolicited output (warnings, M118 messages, ...)
+
+# Resend request emitted on a line number or checksum error ("Resend: 12" or "rs 12")
+_RESEND_RE = re.compile(r'(?:Resend:|^rs)\s*N?(\d+)', re.IGNORECASE | re.MULTILINE)
+
+# Number of recently sent numbered lines kept for answering resend requests
+_RESEND_HISTORY = 64
+
+
+class _PendingReply:
+    """A command written to the port that is waiting for its terminating 'ok'."""
+
+    __slots__ = ("line", "lines", "future", "sent_at", "abandoned")
+
+    def __init__(self, line: str) -> None:
+        self.line = line
+        self.lines: List[str] = []
+        self.future: Future = Future()
+        self.sent_at = time.time()
+        # Set when the caller gave up; the entry still absorbs its own late reply
+        self.abandoned = False
+
+
 class SerialTransport(Transport):
     """
     Serial transport for communicating with G-code devices.
@@ -35,7 +66,9 @@ class SerialTransport(Transport):
     
     def __init__(self, port: Optional[str] = None, baud_rate: int = 115200, 
                  timeout: float = 5.0, auto_detect_board: bool = True,
-                 disable_wifi_on_connect: bool = False, debug: bool = False):
+                 disable_wifi_on_connect: bool = False, debug: bool = False,
+                 stream_window: int = 4, stream_buffer_bytes: int = 256,
+                 firmware: Optional[str] = None):
         """
         Initialize a serial transport.
         
@@ -46,6 +79,11 @@ class SerialTransport(Transport):
             auto_detect_board: Whether to automatically detect the board type on connect
             disable_wifi_on_connect: Whether to disable WiFi on connect (Duet boards only)
             debug: Whether to print debug information
+            stream_window: Maximum number of unacknowledged lines in flight when streaming
+            stream_buffer_bytes: Maximum number of unacknowledged bytes in flight when
+                streaming (size of the firmware receive buffer); 0 disables the byte limit
+            firmware: Firmware family used to frame replies ("reprapfirmware", "marlin",
+                "grbl", "klipper", "smoothie"). If None, it is chosen on board detection.
         """
         self._port = port
         self._baud_rate = baud_rate
@@ -55,6 +93,12 @@ class SerialTransport(Transport):
         self._auto_detect_board = auto_detect_board
         self._disable_wifi_on_connect = disable_wifi_on_connect
         self._debug = debug
+        self._stream_window = max(1, int(stream_window))
+        self._stream_buffer_bytes = max(0, int(stream_buffer_bytes))
+        
+        # Reply framing: fixed if a firmware was given, otherwise chosen on detection
+        self._framer: ResponseFramer = get_framer(firmware)
+        self._framer_fixed = firmware is not None
         
         # Board-specific information
         self.is_duet = False
@@ -64,6 +108,21 @@ class SerialTransport(Transport):
         
         # Response tracking
         self._last_response = ""
+        
+        # Background reader: owns the input side of the port and routes each line
+        # either to the oldest pending command or to the unsolicited message queue
+        self._reader: Optional[threading.Thread] = None
+        self._reader_stop = threading.Event()
+        self._write_lock = threading.Lock()
+        self._pending: deque = deque()
+        self._pending_lock = threading.Lock()
+        self._messages: "queue.Queue[Tuple[str, str]]" = queue.Queue(maxsize=256)
+        self._message_listeners: List[Callable[[str, str], None]] = []
+        
+        # Line numbering for acknowledged sends (N<n> ... *<checksum>)
+        self._numbered_lock = threading.Lock()
+        self._line_number: Optional[int] = None
+        self._sent_lines: Dict[int, str] = {}
     
     def connect(self) -> bool:
         """
@@ -118,6 +177,7 @@ class SerialTransport(Transport):
             self._serial.reset_output_buffer()
             
             self._connected = True
+            self._start_reader()
             
             # Auto-detect board type if requested
             if self._auto_detect_board:
@@ -136,6 +196,7 @@ class SerialTransport(Transport):
         """
         Close the connection to the device.
         """
+        self._reader_stop.set()
         if self._serial:
             try:
                 self._serial.close()
@@ -144,6 +205,21 @@ class SerialTransport(Transport):
             finally:
                 self._serial = None
                 self._connected = False
+        if self._reader and self._reader is not threading.current_thread():
+            self._reader.join(timeout=1.0)
+        self._reader = None
+        self._line_number = None
+        self._fail_pending(TransportError("Disconnected"))
+    
+    @property
+    def framer(self) -> ResponseFramer:
+        """
+        The response framer used to detect the end of each reply.
+        
+        Returns:
+            ResponseFramer: The active framer
+        """
+        return self._framer
     
     def is_connected(self) -> bool:
         """
@@ -168,9 +244,19 @@ class SerialTransport(Transport):
             # Parse the response
             firmware_info = response.strip()
             
+            # Frame subsequent replies the way this firmware terminates them; Grbl
+            # does not implement M115 and answers with a numbered error instead
+            if not self._framer_fixed:
+                if re.match(r'error:\d+', firmware_info):
+                    self._framer = GRBL_FRAMER
+                else:
+                    self._framer = get_framer(firmware_info)
+            
             # Check if it's a Duet board
             if "RepRapFirmware" in firmware_info:
                 self.is_duet = True
+                if not self._framer_fixed:
+                    self._framer = RRF_FRAMER
                 
                 # Extract firmware name
                 firmware_match = re.search(r'FIRMWARE_NAME:\s*(RepRapFirmware[^,\n]*)', firmware_info)
@@ -211,45 +297,290 @@ class SerialTransport(Transport):
                 print(f"DEBUG: Error detecting board type: {e}")
             return False
     
-    def _read_until_timeout(self, timeout: float) -> str:
+    def _start_reader(self) -> None:
+        """
+        Start the background reader thread if it is not already running.
+        """
+        if self._reader and self._reader.is_alive():
+            return
+        self._reader_stop.clear()
+        self._reader = threading.Thread(target=self._reader_loop, name="serial-reader", daemon=True)
+        self._reader.start()
+    
+    def _reader_loop(self) -> None:
+        """
+        Read lines from the port and dispatch them until stopped or disconnected.
+        
+        readline() blocks in the driver until a line or the port timeout arrives,
+        so the loop never sleeps or spins while the device is quiet.
+        """
+        while not self._reader_stop.is_set():
+            ser = self._serial
+            if ser is None:
+                break
+            try:
+                raw = ser.readline()
+            except Exception as e:
+                if not self._reader_stop.is_set():
+                    self._fail_pending(TransportError(f"Serial read error: {str(e)}"))
+                break
+            if not raw:
+                continue
+            ln = raw.decode('utf-8', errors='replace').strip()
+            if ln:
+                self._dispatch_line(ln)
+    
+    def _dispatch_line(self, ln: str) -> None:
+        """
+        Route one received line to the oldest pending command or the message queue.
+        
+        Lines the framer does not count as part of the pending command's reply
+        (status reports, JSON the command did not ask for) go to the message
+        queue even while a command is pending.
+        
+        Args:
+            ln: The received line, stripped of whitespace
+        """
+        kind = LINE_JSON if ln.startswith("{") else LINE_REPLY
+        with self._pending_lock:
+            head = self._pending[0] if self._pending else None
+            terminal = self._framer.is_terminal(ln)
+            if head is not None and not terminal and not self._framer.is_reply(ln, head.line):
+                head = None
+            if head is not None:
+                head.lines.append(ln)
+                if terminal:
+                    self._pending.popleft()
+        if head is None:
+            # Nothing is waiting for this output: it is an unsolicited message
+            if kind == LINE_REPLY:
+                kind = LINE_MESSAGE
+            self._put_message(kind, ln)
+        elif terminal and not head.future.done():
+            head.future.set_result(head.lines)
+        self._notify(kind, ln)
+    
+    def _put_message(self, kind: str, ln: str) -> None:
+        try:
+            self._messages.put_nowait((kind, ln))
+        except queue.Full:
+            # Drop the oldest message rather than blocking the reader
+            try:
+                self._messages.get_nowait()
+                self._messages.put_nowait((kind, ln))
+            except (queue.Empty, queue.Full):
+                pass
+    
+    def _notify(self, kind: str, ln: str) -> None:
+        for cb in list(self._message_listeners):
+            try:
+                cb(kind, ln)
+            except Exception:
+                pass
+    
+    def _fail_pending(self, error: Exception) -> None:
         """
-        Read from the serial port until a timeout occurs.
+        Fail every command still waiting for a reply.
         
         Args:
-            timeout: The timeout in seconds
+            error: The exception to deliver to waiting callers
+        """
+        with self._pending_lock:
+            pending = list(self._pending)
+            self._pending.clear()
+        for p in pending:
+            if not p.future.done():
+                p.future.set_exception(error)
+    
+    def _submit(self, line: str) -> _PendingReply:
+        """
+        Write a line and register it as waiting for a reply.
+        
+        Args:
+            line: The G-code line to send (without trailing newline)
             
         Returns:
-            str: The data read from the port
+            _PendingReply: The pending entry whose future resolves to the reply lines
         """
-        if not self._serial:
-            return ""
+        self._start_reader()
+        pending = _PendingReply(line)
+        with self._write_lock:
+            with self._pending_lock:
+                self._pending.append(pending)
+            try:
+                self._serial.write((line + '\n').encode())
+                self._serial.flush()
+            except Exception:
+                with self._pending_lock:
+                    try:
+                        self._pending.remove(pending)
+                    except ValueError:
+                        pass
+                raise
+        return pending
+    
+    def _abandon(self, pending: _PendingReply) -> List[str]:
+        """
+        Stop waiting for a command's reply and return whatever was received.
+        
+        The entry stays queued as a placeholder: the device still answers the
+        command eventually, and that late reply (up to its terminator) must be
+        consumed by this entry, not by the next command in line, or every later
+        reply would be attributed to the wrong command.
+        
+        Args:
+            pending: The pending entry to give up on
             
-        # Save the original timeout
-        original_timeout = self._serial.timeout
-        self._serial.timeout = timeout
+        Returns:
+            List[str]: The reply lines received so far
+        """
+        with self._pending_lock:
+            pending.abandoned = True
+            return list(pending.lines)
+    
+    def _exchange(self, line: str, timeout: Optional[float] = None) -> str:
+        """
+        Send a line and wait for its complete reply.
         
+        Args:
+            line: The G-code line to send
+            timeout: Seconds to wait for the reply (defaults to the port timeout)
+            
+        Returns:
+            str: The reply, one line per received line
+            
+        Raises:
+            TimeoutError: If the reply's terminator did not arrive within the timeout;
+                any lines received so far are in the error's details as "partial"
+        """
+        pending = self._submit(line.rstrip('\r\n'))
         try:
-            # Read until timeout
-            data = b""
-            start_time = time.time()
-            
-            while (time.time() - start_time) < timeout:
-                if self._serial.in_waiting > 0:
-                    chunk = self._serial.read(self._serial.in_waiting)
-                    data += chunk
-                    
-                    # If we got data, extend the timeout a bit to see if more is coming
-                    if chunk:
-                        start_time = time.time()
-                else:
-                    # Small sleep to avoid hammering the CPU
-                    time.sleep(0.01)
+            lines = pending.future.result(timeout=timeout or self._timeout)
+        except FutureTimeoutError:
+            # A reply without its terminator may be truncated, so it is never returned as one
+            partial = self._abandon(pending)
+            raise TimeoutError("No complete response received", {"command": line, "partial": partial})
+        response = "\n".join(lines) + "\n"
+        self._last_response = response
+        return response.strip()
+    
+    @staticmethod
+    def checksum(text: str) -> int:
+        """
+        Compute the RepRap line checksum (XOR of all bytes before the '*').
+        
+        Args:
+            text: The numbered line, e.g. "N12 G1 X10"
             
-            # Convert to string
-            return data.decode("utf-8", errors="replace")
-        finally:
-            # Restore the original timeout
-            self._serial.timeout = original_timeout
+        Returns:
+            int: The checksum value (0-255)
+        """
+        cs = 0
+        for b in text.encode():
+            cs ^= b
+        return cs
+    
+    def _numbered(self, number: int, line: str) -> str:
+        body = f"N{number} {line}"
+        return f"{body}*{self.checksum(body)}"
+    
+    def reset_line_numbers(self, timeout: Optional[float] = None) -> None:
+        """
+        Reset the firmware's expected line number with M110 N0.
+        
+        Args:
+            timeout: Seconds to wait for the reply (defaults to the port timeout)
+        """
+        with self._numbered_lock:
+            self._exchange("M110 N0", timeout=timeout)
+            self._line_number = 0
+            self._sent_lines.clear()
+    
+    def send_numbered(self, line: str, timeout: Optional[float] = None,
+                      max_resends: int = 3) -> str:
+        """
+        Send a line with a line number and checksum and wait for its 'ok'.
+        
+        The firmware verifies the number and checksum of each line and answers a
+        corrupted or out-of-sequence line with a resend request, which is honoured
+        by retransmitting from the requested line. A command is therefore confirmed
+        by its own 'ok', in a single round-trip.
+        
+        Args:
+            line: The G-code line to send (without line number or checksum)
+            timeout: Seconds to wait for the reply (defaults to the port timeout)
+            max_resends: Maximum number of resend requests honoured for this line
+            
+        Returns:
+            str: The response from the device
+            
+        Raises:
+            TransportError: If not connected, the resend limit is exceeded, or the
+                requested line is no longer available
+            TimeoutError: If no reply arrives within the timeout
+        """
+        if not self.is_connected():
+            raise TransportError("Not connected")
+        
+        line = line.split(';', 1)[0].strip()
+        with self._numbered_lock:
+            if self._line_number is None:
+                self._exchange("M110 N0", timeout=timeout)
+                self._line_number = 0
+                self._sent_lines.clear()
+            self._line_number += 1
+            number = self._line_number
+            self._sent_lines[number] = line
+            self._sent_lines.pop(number - _RESEND_HISTORY, None)
+            
+            to_send = [number]
+            resends = 0
+            response = ""
+            while to_send:
+                n = to_send.pop(0)
+                reply = self._exchange(self._numbered(n, self._sent_lines[n]), timeout=timeout)
+                match = _RESEND_RE.search(reply)
+                if match:
+                    resends += 1
+                    requested = int(match.group(1))
+                    if resends > max_resends:
+                        raise TransportError(f"Too many resend requests for line {number}",
+                                             {"command": line, "line_number": number})
+                    if requested not in self._sent_lines:
+                        raise TransportError(f"Firmware requested unknown line {requested}",
+                                             {"command": line, "line_number": number})
+                    to_send = list(range(requested, number + 1))
+                    continue
+                if n == number:
+                    response = reply
+            return response
+    
+    def read_message(self, timeout: Optional[float] = None) -> Optional[Tuple[str, str]]:
+        """
+        Get the next unsolicited message received from the device.
+        
+        Args:
+            timeout: Seconds to wait for a message; None returns immediately
+            
+        Returns:
+            Optional[Tuple[str, str]]: (kind, line) or None if no message is available
+        """
+        try:
+            if timeout is None:
+                return self._messages.get_nowait()
+            return self._messages.get(timeout=timeout)
+        except queue.Empty:
+            return None
+    
+    def add_message_listener(self, callback: Callable[[str, str], None]) -> None:
+        """
+        Register a callback invoked from the reader thread for every received line.
+        
+        Args:
+            callback: Called as (kind, line) where kind is LINE_REPLY, LINE_JSON or
+                LINE_MESSAGE
+        """
+        self._message_listeners.append(callback)
     
     def send_line(self, line: str) -> str:
         """
@@ -268,55 +599,9 @@ class SerialTransport(Transport):
             raise TransportError("Not connected")
             
         try:
-            # Add newline if not present
-            if not line.endswith('\n'):
-                line += '\n'
-                
-            # Send the command
-            try:
-                # Drain any stale input before sending
-                self._serial.reset_input_buffer()
-            except Exception:
-                pass
-            self._serial.write(line.encode())
-            self._serial.flush()
-            
-            # Read the response
-            response = ""
-            
-            # For Duet boards, wait for "ok" or "Error:"
-            if self.is_duet:
-                lines = []
-                deadline = time.time() + self._timeout
-                saw_terminal = False
-                while time.time() < deadline:
-                    ln = self._serial.readline().decode('utf-8', errors='replace').strip()
-                    if ln:
-                        lines.append(ln)
-                        if ln == "ok" or ln.startswith("Error:"):
-                            # small grace window to catch any stragglers
-                            grace = time.time() + 0.08
-                            while time.time() < grace and self._serial.in_waiting > 0:
-                                extra = self._serial.readline().decode('utf-8', errors='replace').strip()
-                                if extra:
-                                    lines.append(extra)
-                                    grace = time.time() + 0.04
-                            saw_terminal = True
-                            break
-                    else:
-                        time.sleep(0.005)
-                if not lines and not saw_terminal:
-                    raise TimeoutError("No response received")
-                response = "\n".join(lines) + "\n"
-            else:
-                # For other boards, read until timeout
-                response = self._read_until_timeout(timeout=self._timeout)
-                
-            # Store the last response
-            self._last_response = response
-            
-            return response.strip()
-            
+            return self._exchange(line)
+        except TimeoutError:
+            raise
         except Exception as e:
             raise TransportError(f"Error sending command: {str(e)}")
             
@@ -341,56 +626,119 @@ class SerialTransport(Transport):
             return ""
         
         try:
-            # Send the command
-            if not line.endswith('\n'):
-                line += '\n'
+            return self._exchange(line)
+        except TimeoutError:
+            raise
+        except Exception as e:
+            raise TransportError(f"Error querying: {str(e)}")
+    
+    def emergency_stop(self, line: str = "M112") -> None:
+        """
+        Write an emergency stop ahead of everything waiting for a reply.
+        
+        The line is written as soon as the port is free of the (short) write in
+        progress, without waiting for any outstanding reply, and every command
+        still waiting for its reply is then failed so callers blocked on an
+        acknowledgement return immediately. Line numbering restarts on the next
+        numbered send, since the firmware resets after an emergency stop.
+        
+        Args:
+            line: The stop command to send (M112, or M999 to reset)
             
-            try:
-                # Drain any stale input before sending
-                self._serial.reset_input_buffer()
-            except Exception:
-                pass
-            self._serial.write(line.encode())
-            self._serial.flush()
+        Raises:
+            TransportError: If the transport is not connected or the write fails
+        """
+        if not self.is_connected():
+            raise TransportError("Not connected")
+        
+        try:
+            with self._write_lock:
+                self._serial.write((line.strip() + '\n').encode())
+                self._serial.flush()
+        except Exception as e:
+            raise TransportError(f"Error sending emergency stop: {str(e)}")
+        finally:
+            self._line_number = None
+            self._fail_pending(TransportError("Cancelled by emergency stop"))
+    
+    def stream_lines(self, lines: Iterable[str], window: Optional[int] = None,
+                     buffer_bytes: Optional[int] = None,
+                     on_response: Optional[Callable[[int, str, str], None]] = None) -> List[str]:
+        """
+        Stream several lines of G-code, keeping multiple lines in flight.
+        
+        Unlike send_line, which waits for each reply before writing the next line,
+        this keeps up to ``window`` unacknowledged lines (and at most ``buffer_bytes``
+        bytes) queued in the firmware so the motion planner never runs dry. Each
+        reply terminator (``ok``, or ``error:<n>`` on Grbl) acknowledges the oldest
+        line still in flight; any other output received before it is attributed to
+        the same line.
+        
+        Args:
+            lines: The G-code lines to send, in order
+            window: Maximum lines in flight (defaults to the transport's stream_window)
+            buffer_bytes: Maximum bytes in flight (defaults to the transport's
+                stream_buffer_bytes); 0 disables the byte limit
+            on_response: Optional callback invoked as (index, line, response) each
+                time a line is acknowledged
             
-            # Read the response
-            response = ""
+        Returns:
+            List[str]: The response for each non-empty line, in send order
             
-            # For Duet boards, wait for "ok" or "Error:"
-            if self.is_duet:
-                lines = []
-                deadline = time.time() + self._timeout
-                saw_terminal = False
-                while time.time() < deadline:
-                    ln = self._serial.readline().decode('utf-8', errors='replace').strip()
-                    if ln:
-                        lines.append(ln)
-                        if ln == "ok" or ln.startswith("Error:"):
-                            # small grace window to catch any stragglers
-                            grace = time.time() + 0.08
-                            while time.time() < grace and self._serial.in_waiting > 0:
-                                extra = self._serial.readline().decode('utf-8', errors='replace').strip()
-                                if extra:
-                                    lines.append(extra)
-                                    grace = time.time() + 0.04
-                            saw_terminal = True
-                            break
-                    else:
-                        time.sleep(0.005)
-                if not lines and not saw_terminal:
-                    raise TimeoutError("No response received")
-                response = "\n".join(lines) + "\n"
-            else:
-                # For other boards, read until timeout
-                response = self._read_until_timeout(timeout=self._timeout)
+        Raises:
+            TransportError: If the transport is not connected or an error occurs
+            TimeoutError: If the device stops acknowledging lines
+        """
+        if not self.is_connected():
+            raise TransportError("Not connected")
+        
+        window = max(1, int(window if window is not None else self._stream_window))
+        budget = max(0, int(buffer_bytes if buffer_bytes is not None else self._stream_buffer_bytes))
+        
+        # Blank lines would never be acknowledged in order, so drop them up front
+        pending = deque(ln.strip() for ln in lines if ln and ln.strip())
+        responses: List[str] = []
+        in_flight: deque = deque()  # (index, _PendingReply, encoded length)
+        in_flight_bytes = 0
+        sent = 0
+        
+        try:
+            while pending or in_flight:
+                # Fill the window as far as the line and byte budgets allow
+                while pending and len(in_flight) < window:
+                    size = len(pending[0]) + 1
+                    if in_flight and budget and in_flight_bytes + size > budget:
+                        break
+                    entry = self._submit(pending.popleft())
+                    in_flight.append((sent, entry, size))
+                    in_flight_bytes += size
+                    sent += 1
                 
-            # Store the last response
-            self._last_response = response
+                # The reader resolves replies in order, so wait on the oldest line
+                index, entry, size = in_flight[0]
+                try:
+                    reply = entry.future.result(timeout=self._timeout)
+                except FutureTimeoutError:
+                    for _, stale, _ in in_flight:
+                        self._abandon(stale)
+                    raise TimeoutError(
+                        f"No acknowledgement for {len(in_flight)} in-flight line(s)"
+                    )
+                in_flight.popleft()
+                in_flight_bytes -= size
+                response = "\n".join(reply)
+                responses.append(response)
+                self._last_response = response
+                if on_response:
+                    on_response(index, entry.line, response)
             
-            return response.strip()
+            return responses
             
+        except TimeoutError:
+            raise
         except Exception as e:
-            raise TransportError(f"Error querying: {str(e)}")
+            raise TransportError(f"Error streaming commands: {str(e)}",
+                                 {"acknowledged": len(responses), "in_flight": len(in_flight)})
     
     def get_status(self) -> Dict[str, Any]:
         """
@@ -0,0 +1,126 @@
+import time
+
+from semantic_gcode.dict.gcode_commands.G1.G1 import G1_LinearMove
+from semantic_gcode.dict.gcode_commands.M106.M106 import M106_FanControl
+from semantic_gcode.dict.gcode_commands.M400.M400 import M400_WaitForMoves
+from semantic_gcode.transport.serial import SerialTransport
+from realtime_hairbrush.runtime import Dispatcher, MachineState
+from realtime_hairbrush.runtime.sequencer import LatencyTracker
+from realtime_hairbrush.transport import airbrush_transport
+from realtime_hairbrush.transport.airbrush_transport import AirbrushTransport
+from realtime_hairbrush.transport.config import ConnectionConfig
+
+from test_serial_streaming import FakeSerial
+
+
+class StallableSerial(FakeSerial):
+    def __init__(self):
+        super().__init__()
+        self.stall = False
+
+    def write(self, data: bytes) -> int:
+        if self.stall and "M106" in data.decode():
+            with self._ready:
+                self.written.append(data.decode().strip())
+            return len(data)
+        return super().write(data)
+
+
+def test_tracker_uses_default_until_enough_samples_then_a_high_percentile():
+    tracker = LatencyTracker(min_samples=5, margin=3.0, floor_s=0.05)
+    key = ("serial", "G1")
+    for _ in range(4):
+        tracker.record(key, 0.004)
+    assert tracker.timeout_for(key, 5.0) == 5.0
+    tracker.record(key, 0.004)
+    assert tracker.timeout_for(key, 5.0) == 0.05
+    assert tracker.timeout_for(key, 5.0, extra_s=1.0) == 1.05
+    for _ in range(5):
+        tracker.record(key, 0.1)
+    assert abs(tracker.timeout_for(key, 5.0) - 0.3) < 1e-9
+    # Never longer than the blanket default
+    for _ in range(10):
+        tracker.record(key, 10.0)
+    assert tracker.timeout_for(key, 5.0) == 5.0
+
+
+def test_stalled_ack_fails_fast_once_latency_is_learned():
+    airbrush_transport._global_transport = None
+    fake = StallableSerial()
+    serial = SerialTransport(port="/dev/null", auto_detect_board=False, timeout=10.0)
+    serial._serial = fake
+    serial._connected = True
+    transport = AirbrushTransport(ConnectionConfig(timeout=10.0))
+    transport.transport = serial
+    dispatcher = Dispatcher(transport, MachineState())
+    dispatcher.start()
+    try:
+        warmup = [dispatcher.submit(M106_FanControl.create(p=0, s=0.5)) for _ in range(25)]
+        assert all(r.ok for r in dispatcher.wait_all(warmup, timeout=5.0))
+
+        fake.stall = True
+        start = time.time()
+        res = dispatcher.submit(M106_FanControl.create(p=0, s=0.5)).result(timeout=5.0)
+        assert not res.ok
+        assert time.time() - start < 0.5
+    finally:
+        dispatcher.stop()
+        serial.disconnect()
+        airbrush_transport._global_transport = None
+
+
+def test_move_timeout_includes_predicted_motion_time():
+    class Transport:
+        class config:
+            timeout = 5.0
+
+    dispatcher = Dispatcher(Transport(), MachineState())
+    tracker = dispatcher.sequencer.latency
+    for _ in range(tracker.min_samples):
+        tracker.record((dispatcher.sequencer._link(), "G1"), 0.002)
+    dispatcher.state.apply_predictive(G1_LinearMove.create(x=0, y=0, feedrate=6000))
+    move = G1_LinearMove.create(x=100)
+    # 100 mm at 6000 mm/min takes one second
+    req = dispatcher._to_request(move, dispatcher._predict(move))
+    assert abs(req.timeout_s - (tracker.floor_s + 1.0)) < 1e-6
+
+
+def test_wait_keeps_blanket_timeout_extended_by_queued_motion():
+    class Transport:
+        class config:
+            timeout = 5.0
+
+    dispatcher = Dispatcher(Transport(), MachineState())
+    tracker = dispatcher.sequencer.latency
+    link = dispatcher.sequencer._link()
+    for _ in range(tracker.min_samples):
+        tracker.record((link, "M400"), 0.002)
+        tracker.record((link, "G1"), 0.002)
+    dispatcher.state.apply_predictive(G1_LinearMove.create(x=0, y=0, feedrate=600))
+    move = G1_LinearMove.create(x=100)
+    # 100 mm at 600 mm/min takes ten seconds
+    dispatcher._to_request(move, dispatcher._predict(move))
+
+    # Fast past M400s do not shrink the wait for a move still running
+    wait = M400_WaitForMoves.create()
+    req = dispatcher._to_request(wait, dispatcher._predict(wait))
+    assert 14.5 < req.timeout_s <= 15.0
+
+
+def test_short_move_behind_a_long_one_waits_for_the_queued_motion():
+    class Transport:
+        class config:
+            timeout = 5.0
+
+    dispatcher = Dispatcher(Transport(), MachineState())
+    tracker = dispatcher.sequencer.latency
+    for _ in range(tracker.min_samples):
+        tracker.record((dispatcher.sequencer._link(), "G1"), 0.002)
+    dispatcher.state.apply_predictive(G1_LinearMove.create(x=0, y=0, feedrate=600))
+    long_move = G1_LinearMove.create(x=100)
+    short_move = G1_LinearMove.create(x=100.1)
+    # With the planner full, the short move's ok only comes once the ten-second move drains
+    long_req = dispatcher._to_request(long_move, dispatcher._predict(long_move))
+    short_req = dispatcher._to_request(short_move, dispatcher._predict(short_move))
+    assert abs(long_req.timeout_s - (tracker.floor_s + 10.0)) < 1e-3
+    assert 9.9 < short_req.timeout_s - tracker.floor_s <= 10.01
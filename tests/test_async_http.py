@@ -0,0 +1,50 @@
+import asyncio
+import time
+
+import pytest
+
+aiohttp = pytest.importorskip("aiohttp")
+from aiohttp import web
+
+from semantic_gcode.transport.async_http import AsyncHttpTransport
+
+
+async def _start_fake_duet(delay_s: float):
+    async def rr_model(request):
+        await asyncio.sleep(delay_s)
+        return web.json_response({"key": request.query.get("key"), "result": request.query.get("key")})
+
+    async def rr_disconnect(request):
+        return web.json_response({"err": 0})
+
+    app = web.Application()
+    app.router.add_get("/rr_model", rr_model)
+    app.router.add_post("/rr_disconnect", rr_disconnect)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+def test_get_models_runs_concurrently_over_the_pool():
+    keys = [(f"key{i}", "f") for i in range(4)]
+
+    async def run():
+        runner, url = await _start_fake_duet(delay_s=0.2)
+        t = AsyncHttpTransport(url, max_connections=4)
+        try:
+            await t.connect()
+            start = time.monotonic()
+            results = await t.get_models(keys)
+            elapsed = time.monotonic() - start
+        finally:
+            await t.disconnect()
+            await runner.cleanup()
+        return results, elapsed
+
+    results, elapsed = asyncio.run(run())
+    assert [r["result"] for r in results] == [k for k, _ in keys]
+    # Sequential fetching would take at least 4 * 0.2 s
+    assert elapsed < 0.6
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+serial_asyncio = pytest.importorskip("serial_asyncio")
+
+from semantic_gcode.transport import async_serial
+from semantic_gcode.transport.async_serial import AsyncSerialTransport
+
+
+class FakeWriter:
+    """Answers each written line through the paired StreamReader."""
+
+    def __init__(self, reader: asyncio.StreamReader, replies):
+        self.reader = reader
+        self.replies = replies
+        self.written = []
+
+    def write(self, data: bytes) -> None:
+        line = data.decode().strip()
+        self.written.append(line)
+        reply = self.replies.get(line.split()[0], "")
+        # Reply asynchronously, as a device would
+        asyncio.get_running_loop().call_soon(self.reader.feed_data, (reply + "ok\n").encode())
+
+    async def drain(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+def test_concurrent_queries_are_matched_in_order(monkeypatch):
+    replies = {
+        "M115": "FIRMWARE_NAME: RepRapFirmware for Duet 3 Mini 5+ FIRMWARE_VERSION: 3.5.1\n",
+        "M409": '{"key":"state.status","flags":"f","result":"idle"}\n',
+        "M114": "X:10.000 Y:20.000 Z:5.000 E:0.000\n",
+    }
+
+    async def run():
+        reader = asyncio.StreamReader()
+        writer = FakeWriter(reader, replies)
+
+        async def fake_open(url, baudrate):
+            return reader, writer
+
+        monkeypatch.setattr(async_serial.serial_asyncio, "open_serial_connection", fake_open)
+        t = AsyncSerialTransport(port="/dev/ttyACM0", max_in_flight=4)
+        await t.connect()
+        try:
+            assert t.is_duet
+            status = await t.get_status()
+            results = await asyncio.gather(*(t.query(f"G1 X{i}") for i in range(8)))
+        finally:
+            await t.disconnect()
+        return status, results, writer.written
+
+    status, results, written = asyncio.run(run())
+    assert status["status"] == "idle"
+    assert status["position"] == {"x": 10.0, "y": 20.0, "z": 5.0, "e": 0.0}
+    assert results == ["ok"] * 8
+    assert written[-8:] == [f"G1 X{i}" for i in range(8)]
+
+
+def test_late_reply_to_a_timed_out_command_does_not_shift_replies(monkeypatch):
+    from semantic_gcode.utils.exceptions import TimeoutError
+
+    class HoldingWriter(FakeWriter):
+        def write(self, data: bytes) -> None:
+            if data.decode().startswith("M400"):
+                self.written.append("M400")
+                return
+            super().write(data)
+
+    async def run():
+        reader = asyncio.StreamReader()
+        writer = HoldingWriter(reader, {"M114": "X:1.000 Y:2.000 Z:0.000\n"})
+
+        async def fake_open(url, baudrate):
+            return reader, writer
+
+        monkeypatch.setattr(async_serial.serial_asyncio, "open_serial_connection", fake_open)
+        t = AsyncSerialTransport(port="/dev/ttyACM0", auto_detect_board=False, firmware="reprapfirmware")
+        await t.connect()
+        try:
+            with pytest.raises(TimeoutError):
+                await t._exchange("M400", timeout=0.05)
+            # The moves finish and the M400's reply arrives after its caller gave up
+            reader.feed_data(b"ok\n")
+            return await t.query("M114")
+        finally:
+            await t.disconnect()
+
+    assert asyncio.run(run()) == "X:1.000 Y:2.000 Z:0.000\nok"
@@ -0,0 +1,130 @@
+import threading
+import time
+
+from semantic_gcode.gcode.base import GCodeInstruction
+from semantic_gcode.dict.gcode_commands.M400.M400 import M400_WaitForMoves
+from semantic_gcode.transport.serial import SerialTransport
+from realtime_hairbrush.runtime import Dispatcher, MachineState
+from realtime_hairbrush.runtime.events import EmergencyStopEvent
+from realtime_hairbrush.transport import airbrush_transport
+from realtime_hairbrush.transport.airbrush_transport import AirbrushTransport
+from realtime_hairbrush.transport.config import ConnectionConfig
+
+from test_serial_streaming import FakeSerial
+
+
+class StalledSerial(FakeSerial):
+    """Acknowledges every line except M400, which waits for moves that never finish."""
+
+    def write(self, data: bytes) -> int:
+        line = data.decode().strip()
+        if "M400" in line:
+            with self._ready:
+                self.written.append(line)
+            return len(data)
+        return super().write(data)
+
+
+def _airbrush(fake):
+    airbrush_transport._global_transport = None
+    serial = SerialTransport(port="/dev/null", auto_detect_board=False, timeout=10.0)
+    serial._serial = fake
+    serial._connected = True
+    transport = AirbrushTransport(ConnectionConfig(timeout=10.0))
+    transport.transport = serial
+    return transport
+
+
+def test_emergency_stop_preempts_ack_wait_and_queued_work():
+    fake = StalledSerial()
+    transport = _airbrush(fake)
+    dispatcher = Dispatcher(transport, MachineState())
+    events = []
+    dispatcher.on_event(lambda e: events.append(e) if isinstance(e, EmergencyStopEvent) else None)
+    dispatcher.start()
+    try:
+        stalled = dispatcher.submit(M400_WaitForMoves.create())
+        # Wait until the M400 is on the wire and its ack wait holds the I/O lock
+        deadline = time.time() + 2.0
+        while not any("M400" in ln for ln in fake.written) and time.time() < deadline:
+            time.sleep(0.005)
+        queued = [dispatcher.submit(GCodeInstruction(code_type="G", code_number=1, parameters={"X": i})) for i in range(20)]
+
+        res = dispatcher.emergency_stop()
+        assert res.ok
+        assert res.latency_s < 0.05
+        assert "M112" in fake.written
+
+        # The 10 s ack wait is released and nothing queued reaches the wire
+        stopped = stalled.result(timeout=1.0)
+        assert not stopped.ok and "emergency stop" in stopped.error
+        results = dispatcher.wait_all(queued, timeout=1.0)
+        assert all(not r.ok for r in results)
+        assert not any(ln.startswith("G1") or " G1 " in ln for ln in fake.written)
+        assert events and events[0].cancelled >= 1
+    finally:
+        dispatcher.stop()
+        transport.transport.disconnect()
+        airbrush_transport._global_transport = None
+
+
+def test_serial_emergency_stop_releases_waiting_callers():
+    fake = StalledSerial()
+    t = SerialTransport(port="/dev/null", auto_detect_board=False, timeout=10.0)
+    t._serial = fake
+    t._connected = True
+    errors = []
+
+    def wait_for_moves():
+        try:
+            t.query("M400")
+        except Exception as e:
+            errors.append(e)
+
+    waiter = threading.Thread(target=wait_for_moves)
+    waiter.start()
+    try:
+        time.sleep(0.05)
+        t.emergency_stop()
+        waiter.join(timeout=1.0)
+        assert not waiter.is_alive()
+        assert errors and "emergency stop" in str(errors[0])
+        assert fake.written[-1] == "M112"
+    finally:
+        t.disconnect()
+
+
+def test_command_queued_behind_a_blocked_ack_is_not_sent_after_the_stop():
+    fake = StalledSerial()
+    transport = _airbrush(fake)
+    serial = transport.transport
+    stop_line = serial.emergency_stop
+
+    def slow_stop(line="M112"):
+        # Release the ack wait, then linger: the sequencer worker runs meanwhile
+        ok = stop_line(line)
+        time.sleep(0.2)
+        return ok
+
+    serial.emergency_stop = slow_stop
+    dispatcher = Dispatcher(transport, MachineState())
+    dispatcher.start()
+    try:
+        stalled = dispatcher.submit(M400_WaitForMoves.create())
+        deadline = time.time() + 2.0
+        while not any("M400" in ln for ln in fake.written) and time.time() < deadline:
+            time.sleep(0.005)
+        queued = dispatcher.submit(GCodeInstruction(code_type="G", code_number=1, parameters={"X": 5}))
+        # Let the dispatcher hand the G1 to the sequencer, where it waits behind the M400
+        time.sleep(0.1)
+
+        assert dispatcher.emergency_stop().ok
+        assert not stalled.result(timeout=1.0).ok
+        assert not queued.result(timeout=1.0).ok
+        time.sleep(0.1)
+        assert fake.written[fake.written.index("M112") + 1:] == []
+        assert not any("G1" in ln for ln in fake.written)
+    finally:
+        dispatcher.stop()
+        transport.transport.disconnect()
+        airbrush_transport._global_transport = None
@@ -0,0 +1,72 @@
+import threading
+import time
+
+from semantic_gcode.gcode.base import GCodeInstruction
+from realtime_hairbrush.runtime import Dispatcher, MachineState
+from realtime_hairbrush.runtime.flow import FlowControl
+
+
+class SlowTransport:
+    class config:
+        timeout = 5.0
+
+    def __init__(self, delay=0.01):
+        self.delay = delay
+        self.sent = 0
+
+    def is_connected(self):
+        return True
+
+    def send_line(self, line):
+        time.sleep(self.delay)
+        self.sent += 1
+        return True
+
+    def query(self, cmd):
+        return ""
+
+
+def test_window_is_clipped_to_the_planner_queue():
+    capacity = [None]
+    flow = FlowControl(max_in_flight=8, planner_capacity=lambda: capacity[0])
+    assert flow.window() == 8
+    capacity[0] = 2
+    assert flow.window() == 2
+
+    assert flow.acquire() and flow.acquire()
+    taken = threading.Event()
+    threading.Thread(target=lambda: flow.acquire() and taken.set(), daemon=True).start()
+    assert not taken.wait(0.15)
+    flow.release()
+    assert taken.wait(1.0)
+    assert flow.stats()["waits"] == 1
+
+
+def test_enqueue_storm_is_bounded_on_the_host():
+    state = MachineState()
+    state.update_observed({"planner": {"gcode_length": 3}})
+    dispatcher = Dispatcher(SlowTransport(), state, max_queued=8, max_in_flight=16)
+    dispatcher.start()
+    try:
+        futures = []
+        depths = []
+
+        def produce():
+            for i in range(60):
+                futures.append(dispatcher.submit(GCodeInstruction(code_type="G", code_number=1, parameters={"X": i})))
+
+        producer = threading.Thread(target=produce)
+        producer.start()
+        while producer.is_alive():
+            depths.append((dispatcher.queue.qsize(), sum(dispatcher.sequencer.queue_depths().values())))
+            time.sleep(0.005)
+        producer.join()
+
+        results = dispatcher.wait_all(futures, timeout=5.0)
+        assert all(r.ok for r in results)
+        assert max(q for q, _ in depths) <= 8
+        # The sequencer never holds more than the planner-sized window
+        assert max(d for _, d in depths) <= 3
+        assert dispatcher.flow.stats()["peak"] <= 3
+    finally:
+        dispatcher.stop()
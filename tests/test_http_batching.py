@@ -0,0 +1,131 @@
+import time
+import urllib.parse
+
+from semantic_gcode.transport.http import HttpTransport
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.status_code = 200
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+
+class FakeDuetSession:
+    """Emulates the rr_gcode input buffer: batches fill it, polls drain it."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.used = 0
+        self.batches = []
+        self.polls = 0
+
+    def request(self, method, url, **kwargs):
+        text = urllib.parse.unquote(url.split("gcode=", 1)[1])
+        if text:
+            assert self.used + len(text.encode()) <= self.capacity, "buffer overrun"
+            self.batches.append(text.split("\n"))
+            self.used += len(text.encode())
+        else:
+            self.polls += 1
+            self.used = max(0, self.used - 30)
+        return FakeResponse({"buff": self.capacity - self.used})
+
+    def close(self):
+        pass
+
+
+def test_stream_lines_packs_batches_within_reported_buffer_space():
+    t = HttpTransport("http://duet.local", max_batch_bytes=64)
+    t.session = FakeDuetSession(capacity=64)
+    t._connected = True
+    lines = [f"G1 X{i} Y{i}" for i in range(20)]
+
+    result = t.stream_lines(lines)
+
+    sent = [ln for batch in t.session.batches for ln in batch]
+    assert sent == lines
+    assert len(result) == len(lines)
+    assert len(t.session.batches) < len(lines)
+    assert t.session.polls > 0
+
+
+def test_send_line_waits_for_buffer_space_instead_of_overrunning():
+    t = HttpTransport("http://duet.local")
+    t.session = FakeDuetSession(capacity=40)
+    t._connected = True
+
+    # Each line nearly fills the buffer, so every send after the first must wait
+    for i in range(4):
+        assert t.send_line(f"G1 X{i}00 Y{i}00 Z{i}00 F3000")
+
+    assert len(t.session.batches) == 4
+    assert t.session.polls > 0
+
+
+class FakeReplySession:
+    """Answers a command after a delay and bumps seqs.reply when it does."""
+
+    def __init__(self, replies, delay=0.03):
+        self.replies = dict(replies)
+        self.delay = delay
+        self.seq = 7
+        self.reply = "stale"
+        self.pending = None
+
+    def request(self, method, url, params=None, **kwargs):
+        if self.pending and time.time() >= self.pending[0]:
+            _, text = self.pending
+            self.pending = None
+            self.reply, self.seq = text, self.seq + 1
+        if url.endswith("/rr_model"):
+            return FakeResponse({"key": "seqs.reply", "result": self.seq})
+        if url.endswith("/rr_reply"):
+            text, self.reply = self.reply, ""
+            return FakeResponse({"buff": text})
+        command = urllib.parse.unquote(url.split("gcode=", 1)[1])
+        if command in self.replies:
+            self.pending = (time.time() + self.delay, self.replies[command])
+        return FakeResponse({"buff": 255})
+
+    def close(self):
+        pass
+
+
+def test_query_waits_for_reply_sequence_not_fixed_delay():
+    t = HttpTransport("http://duet.local")
+    t.session = FakeReplySession({"M114": "X:1.000 Y:2.000"})
+    t._connected = True
+    t._seen_reply_seq = 6  # a reply arrived that nobody fetched
+
+    assert t.query("M114") == "X:1.000 Y:2.000"
+    started = time.time()
+    assert t.query("G4 P0") == ""
+    assert time.time() - started < 0.5
+
+
+def test_query_keeps_waiting_for_a_slow_reply_after_the_input_drains():
+    t = HttpTransport("http://duet.local")
+    t.session = FakeReplySession({'M98 P"probe.g"': "Z probe triggered"}, delay=0.3)
+    t._connected = True
+
+    # The input buffer reports drained long before the reply is posted
+    assert t.query('M98 P"probe.g"') == "Z probe triggered"
+
+
+def test_unknown_buffer_space_does_not_count_as_drained():
+    class NoBufferSession(FakeReplySession):
+        def request(self, method, url, params=None, **kwargs):
+            response = super().request(method, url, params=params, **kwargs)
+            if "/rr_gcode" in url:
+                response._payload = {}
+            return response
+
+    t = HttpTransport("http://duet.local")
+    t.session = NoBufferSession({})
+    t._connected = True
+    t._buffer_capacity = 255
+
+    assert t._input_drained() is False
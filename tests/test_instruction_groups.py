@@ -0,0 +1,84 @@
+import threading
+
+from semantic_gcode.gcode.base import GCodeInstruction
+from semantic_gcode.dict.gcode_commands.M400.M400 import M400_WaitForMoves
+from realtime_hairbrush.runtime import Dispatcher, MachineState
+from realtime_hairbrush.runtime.sequencer import Request, RequestKind, Priority
+
+
+class StreamingTransport:
+    class config:
+        timeout = 5.0
+
+    def __init__(self, fail_on=None):
+        self.wire = []
+        self.fail_on = fail_on
+        self.lock = threading.Lock()
+
+    def is_connected(self):
+        return True
+
+    def send_line(self, line):
+        with self.lock:
+            self.wire.append(("send", line))
+        return not (self.fail_on and line.startswith(self.fail_on))
+
+    def query(self, cmd):
+        if not cmd:
+            return ""
+        with self.lock:
+            self.wire.append(("query", cmd))
+        return "ok"
+
+    def stream_lines(self, lines, window=None):
+        with self.lock:
+            self.wire.append(("stream", list(lines)))
+        return ["ok" for _ in lines]
+
+
+def _stroke():
+    return [
+        GCodeInstruction(code_type="T", code_number=0),
+        GCodeInstruction(code_type="G", code_number=1, parameters={"Z": 5}),
+        GCodeInstruction(code_type="M", code_number=106, parameters={"P": 2, "S": 1.0}),
+        GCodeInstruction(code_type="G", code_number=1, parameters={"X": 10, "Y": 10}),
+        GCodeInstruction(code_type="M", code_number=106, parameters={"P": 2, "S": 0.0}),
+        M400_WaitForMoves.create(),
+    ]
+
+
+def test_group_runs_contiguously_and_streams_plain_lines():
+    transport = StreamingTransport()
+    dispatcher = Dispatcher(transport, MachineState())
+    dispatcher.start()
+    try:
+        # Keep status polls queued while the group is submitted
+        for _ in range(5):
+            dispatcher.sequencer.submit(Request(kind=RequestKind.QUERY, priority=Priority.LOW, payload="M408", timeout_s=5.0))
+        results = dispatcher.wait_all(dispatcher.submit_group(_stroke()), timeout=2.0)
+        assert all(r.ok for r in results) and len(results) == 6
+
+        group_ops = [op for op in transport.wire if op[1] != "M408"]
+        assert group_ops[0] == ("send", "T0")
+        assert group_ops[1][0] == "stream" and len(group_ops[1][1]) == 4
+        assert group_ops[2][0] == "query" and group_ops[2][1].startswith("M400")
+        # No poll landed between the first and last wire operation of the group
+        start = transport.wire.index(group_ops[0])
+        end = transport.wire.index(group_ops[-1])
+        assert all(op[1] != "M408" for op in transport.wire[start:end + 1])
+        assert not dispatcher.sequencer._paused_updates
+    finally:
+        dispatcher.stop()
+
+
+def test_group_stops_after_a_failed_instruction():
+    transport = StreamingTransport(fail_on="T")
+    dispatcher = Dispatcher(transport, MachineState())
+    dispatcher.start()
+    try:
+        results = dispatcher.wait_all(dispatcher.submit_group(_stroke()), timeout=2.0)
+        assert not results[0].ok
+        assert all(not r.ok and r.error.startswith("skipped") for r in results[1:])
+        assert transport.wire == [("send", "T0")]
+    finally:
+        dispatcher.stop()
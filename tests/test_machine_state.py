@@ -0,0 +1,25 @@
+from realtime_hairbrush.runtime import MachineState
+
+
+def test_patches_share_untouched_subtrees_and_bump_the_version():
+    state = MachineState()
+    state.apply_patch({"coords": {"machine": [0, 0, 0]}, "diagnostics": {"vin": 24.0}})
+    before = state.snapshot()
+
+    version = state.apply_patch([1, 2, 3], path="coords.machine")
+
+    after = state.snapshot()
+    assert version == after["version"] == before["version"] + 1
+    assert after["observed"]["coords"]["machine"] == [1, 2, 3]
+    # The old snapshot is unchanged and the untouched branch is shared, not copied
+    assert before["observed"]["coords"]["machine"] == [0, 0, 0]
+    assert after["observed"]["diagnostics"] is before["observed"]["diagnostics"]
+    assert state.get("diagnostics.vin") == 24.0
+    assert state.get("diagnostics.missing", "n/a") == "n/a"
+
+
+def test_dict_patches_merge_and_other_values_replace():
+    state = MachineState()
+    state.update_observed({"firmware": {"status": "idle", "name": "RRF"}})
+    state.apply_patch({"status": "busy"}, path=("firmware",))
+    assert state.snapshot()["observed"]["firmware"] == {"status": "busy", "name": "RRF"}
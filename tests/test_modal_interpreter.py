@@ -0,0 +1,78 @@
+import time
+
+import pytest
+
+from semantic_gcode.gcode.base import GCodeInstruction
+from semantic_gcode.dict.gcode_commands.G1.G1 import G1_LinearMove
+from semantic_gcode.dict.gcode_commands.M400.M400 import M400_WaitForMoves
+from realtime_hairbrush.runtime import MachineState, ModalInterpreter
+
+
+def test_relative_moves_units_and_feedrate():
+    interp = ModalInterpreter()
+    assert interp.feed("G1 X10 Y10 F6000") == 0.0  # start position unknown
+    interp.feed("G91")
+    assert interp.feed("G1 X30 Y40") == pytest.approx(0.5)
+    assert interp.position() == {"x": 40.0, "y": 50.0}
+    interp.feed("G90 G20")
+    interp.feed("G1 X1 F60 ; inches")
+    assert interp.position()["x"] == pytest.approx(25.4)
+    assert interp.feedrate == pytest.approx(60 * 25.4)
+    assert interp.feed("G4 P250") == pytest.approx(0.25)
+
+
+def test_workplaces_g92_g53_and_tool_offsets():
+    interp = ModalInterpreter()
+    interp.run([
+        "G28",
+        "G10 L2 P2 X100 Y50",   # G55 origin at machine 100,50
+        "G55",
+        "G1 X10 Y10 F3000",
+    ])
+    assert interp.machine["X"] == 110.0 and interp.position()["x"] == 10.0
+    interp.feed("G92 X0")
+    assert interp.position()["x"] == 0.0 and interp.machine["X"] == 110.0
+    interp.feed("G1 X5")
+    assert interp.machine["X"] == 115.0
+    interp.feed("G53 G1 X0")
+    assert interp.machine["X"] == 0.0
+    interp.feed("G1 X0")  # G53 applied to one move only
+    assert interp.machine["X"] == 110.0
+    interp.feed("G92")
+    interp.feed("G54")
+    assert interp.position()["x"] == 110.0
+
+    # RepRapFirmware tool offsets: machine = user - offset
+    interp.feed("G10 P1 X-20")
+    interp.feed("T1")
+    assert interp.position()["x"] == 90.0
+    interp.feed("G1 X0")
+    assert interp.machine["X"] == 20.0
+    interp.feed("T-1")
+    assert interp.tool is None and interp.position()["x"] == 20.0
+
+
+def test_machine_state_predicts_in_place():
+    state = MachineState()
+    before = state.snapshot()["predictive"]
+    assert state.apply_predictive(G1_LinearMove.create(x=0, y=0, feedrate=600)) == 0.0
+    state.apply_predictive(GCodeInstruction(code_type="G", code_number=91))
+    assert state.apply_predictive(G1_LinearMove.create(x=10)) == pytest.approx(1.0)
+    snap = state.snapshot()["predictive"]
+    assert snap["position"]["x"] == 10.0 and snap["positioning"]["mode"] == "relative"
+    assert state.get("feedrate", tree="predictive") == 600
+    # Earlier snapshots are not modified and unchanged state is not rebuilt
+    assert before["position"] == {}
+    assert state.snapshot()["predictive"] is snap
+    # Instructions the interpreter does not model still apply their own effects
+    state.apply_predictive(M400_WaitForMoves.create())
+    assert state.snapshot()["predictive"]["motion"]["motion_complete"] is True
+    assert state.snapshot()["predictive"]["position"]["x"] == 10.0
+
+
+def test_large_job_predicts_quickly():
+    lines = ["G90", "G21", "G1 F6000"] + [f"G1 X{i % 200} Y{(i * 7) % 150}" for i in range(100_000)]
+    start = time.perf_counter()
+    interp = ModalInterpreter().run(lines)
+    assert time.perf_counter() - start < 5.0
+    assert interp.moves > 90_000 and interp.motion_s > 0
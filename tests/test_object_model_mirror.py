@@ -0,0 +1,99 @@
+import time
+from collections import Counter
+
+from realtime_hairbrush.runtime import MachineState
+from realtime_hairbrush.runtime.object_model import ObjectModelMirror
+from realtime_hairbrush.runtime.readers import StatusPoller
+from realtime_hairbrush.runtime.sequencer import RequestSequencer
+
+
+def test_mirror_paths_map_over_lists():
+    mirror = ObjectModelMirror()
+    mirror.apply_section("move", {"axes": [{"homed": True, "userPosition": 1.0}, {"homed": False, "userPosition": 2.0}]}, seq=3)
+    assert mirror.get("move.axes[].homed") == [True, False]
+    assert mirror.get("move.axes[1].userPosition") == 2.0
+    mirror.set("move.axes[].userPosition", [5.0, 6.0])
+    assert mirror.get("move.axes[].userPosition") == [5.0, 6.0]
+    assert mirror.stale_sections({"move": 3, "state": 1}) == ["state", "sensors", "boards", "job"]
+    assert "move" in mirror.stale_sections({"move": 4})
+
+
+class SeqsTransport:
+    """rr_model emulation with per-section sequence numbers."""
+
+    def __init__(self):
+        self.calls = Counter()
+        self.seqs = {"move": 1, "state": 1, "sensors": 1, "boards": 1, "job": 1, "reply": 0}
+        self.model = {
+            "move": {"axes": [{"homed": False, "userPosition": 0.0} for _ in range(3)]},
+            "state": {"status": "idle", "currentTool": 0},
+            "sensors": {"endstops": [{"triggered": False} for _ in range(3)]},
+            "boards": [{"vIn": {"current": 24.1}, "mcuTemp": {"current": 40.0}}],
+            "job": {"file": None},
+        }
+
+    def is_connected(self):
+        return True
+
+    def query(self, cmd):
+        return ""
+
+    def get_model(self, key=None, flags=None):
+        self.calls[key] = self.calls[key] + 1
+        if key == "seqs":
+            return {"key": key, "result": dict(self.seqs)}
+        if key in self.model:
+            return {"key": key, "result": self.model[key]}
+        if key == "state.status":
+            return {"key": key, "result": self.model["state"]["status"]}
+        return {"key": key, "result": None}
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_status_poller_refetches_only_changed_sections():
+    fake = SeqsTransport()
+    state = MachineState()
+    seq = RequestSequencer(transport=fake)
+    seq.start()
+    poller = StatusPoller(seq, state, interval_fast=0.05, interval_medium=10.0, interval_slow=10.0, interval_full=10.0)
+    try:
+        poller.start()
+        assert _wait_for(lambda: all(fake.calls[s] == 1 for s in ("move", "state", "sensors", "boards", "job")))
+        time.sleep(0.1)
+        seqs_before, positions_before = fake.calls["seqs"], fake.calls["move.axes[].userPosition"]
+        time.sleep(0.3)
+        # Idle and unchanged: seqs are polled, no section is fetched again, no positions polled
+        assert fake.calls["seqs"] > seqs_before
+        assert fake.calls["move"] == 1 and fake.calls["state"] == 1
+        assert fake.calls["move.axes[].userPosition"] == positions_before
+
+        fake.model["move"]["axes"][0]["homed"] = True
+        fake.seqs["move"] += 1
+        assert _wait_for(lambda: state.snapshot()["observed"].get("homed", {}).get("axes", [None])[0] is True)
+        assert fake.calls["move"] == 2
+        assert fake.calls["state"] == 1
+        assert state.snapshot()["observed"]["firmware"]["status"] == "idle"
+    finally:
+        poller.stop()
+        seq.stop()
+
+
+def test_status_poller_section_patch_keeps_user_coordinates_for_legacy_readers():
+    state = MachineState()
+    poller = StatusPoller(RequestSequencer(transport=SeqsTransport()), state)
+    axes = [{"homed": True, "userPosition": 1.0, "machinePosition": 11.0}, {"homed": True, "userPosition": 2.0, "machinePosition": 12.0}]
+    poller._on_section("move", 2, {"axes": axes, "queue": [{"gcodeLength": 40}]})
+
+    observed = state.snapshot()["observed"]
+    assert observed["coords"] == {"user_position": [1.0, 2.0], "machine_position": [11.0, 12.0]}
+    assert observed["raw_status"]["raw"]["coords"]["machine"] == [1.0, 2.0]
+    assert observed["homed"]["axes"] == [True, True]
+    assert observed["planner"]["gcode_length"] == 40
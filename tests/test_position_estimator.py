@@ -0,0 +1,69 @@
+import pytest
+
+from semantic_gcode.dict.gcode_commands.G1.G1 import G1_LinearMove
+from realtime_hairbrush.runtime import Dispatcher, MachineState, PositionEstimator
+
+
+def _at_rest(est, target=(0.0, 0.0, 0.0), observed=(0.0, 0.0, 0.0)):
+    # A first target plus a poll at rest anchors the estimator
+    est.plan(target, 6000, t=0.0)
+    est.correct(observed, t=0.0)
+
+
+def test_trapezoidal_interpolation():
+    est = PositionEstimator(accel_mm_s2=100.0)
+    _at_rest(est)
+    # 100 mm at 10 mm/s: 0.1 s ramps (0.5 mm each) and 9.9 s at speed
+    assert est.plan((100.0, 0.0, 0.0), 600, t=1.0)
+    assert est.position(t=1.0) == (0.0, 0.0, 0.0)
+    assert est.position(t=1.1)[0] == pytest.approx(0.5)
+    assert est.position(t=6.05)[0] == pytest.approx(50.0)
+    assert est.moving(t=10.0) and not est.moving(t=11.1)
+    assert est.position(t=12.0) == (100.0, 0.0, 0.0)
+
+
+def test_moves_chain_and_short_moves_are_triangular():
+    est = PositionEstimator(accel_mm_s2=100.0)
+    _at_rest(est)
+    est.plan((1.0, 0.0, 0.0), 6000, t=0.0)
+    est.plan((1.0, 1.0, 0.0), 6000, t=0.0)
+    # 1 mm never reaches 100 mm/s: 0.1 s up, 0.1 s down
+    assert est.position(t=0.1)[0] == pytest.approx(0.5)
+    assert est.position(t=0.2) == pytest.approx((1.0, 0.0, 0.0))
+    assert est.position(t=0.3) == pytest.approx((1.0, 0.5, 0.0))
+
+
+def test_polls_shift_timing_and_learn_the_frame():
+    est = PositionEstimator(accel_mm_s2=100.0)
+    # The poll reports machine coordinates 100 mm to the right of the commanded frame
+    _at_rest(est, observed=(100.0, 0.0, 0.0))
+    est.plan((100.0, 0.0, 0.0), 600, t=1.0)
+    # The machine only started 2 s later than planned: it is at 150 at t=8.05, not at 170
+    est.correct((150.0, 0.0, 0.0), t=8.05)
+    assert est.position(t=8.05)[0] == pytest.approx(150.0)
+    assert est.position(t=9.05)[0] == pytest.approx(160.0)
+    est.correct((200.0, 0.0, 0.0), t=13.5)
+    assert not est.moving(t=13.5) and est.position() == (200.0, 0.0, 0.0)
+
+    # Off the planned path: trust the poll and stop extrapolating
+    est.plan((0.0, 0.0, 0.0), 600, t=20.0)
+    est.correct((150.0, 40.0, 0.0), t=21.0)
+    assert not est.moving(t=21.0) and est.position(t=22.0) == (150.0, 40.0, 0.0)
+
+
+def test_dispatcher_plans_commanded_moves():
+    state = MachineState()
+    est = PositionEstimator(accel_mm_s2=1000.0)
+    dispatcher = Dispatcher(transport=None, state=state)
+    dispatcher.estimator = est
+    dispatcher._predict(G1_LinearMove.create(x=0, y=0, z=0, feedrate=600))
+    est.correct((0.0, 0.0, 0.0))
+    dispatcher._predict(G1_LinearMove.create(x=10, y=0))
+    assert est.moving()
+
+    # Tool changes and homing drop the plan and the frame
+    from semantic_gcode.dict.gcode_commands.T.T import T_SelectTool
+    dispatcher._predict(T_SelectTool.create(tool_number=1))
+    assert not est.moving()
+    dispatcher._predict(G1_LinearMove.create(x=20, y=0))
+    assert not est.moving()
@@ -0,0 +1,92 @@
+from realtime_hairbrush.runtime.sequencer import Request, RequestKind, Priority
+from realtime_hairbrush.runtime.sequencer.scheduler import RequestScheduler
+
+
+def _req(payload, priority, created, kind=RequestKind.QUERY, timeout=10.0, key=None):
+    req = Request(kind=kind, priority=priority, payload=payload, timeout_s=timeout, created_at_s=created)
+    req.coalesce_key = key
+    return req
+
+
+def test_fifo_within_priority_and_aging_across_priorities():
+    s = RequestScheduler(aging_s=1.0)
+    s.push(_req("status", Priority.LOW, created=100.0))
+    s.push(_req("g1-a", Priority.HIGH, created=100.5, kind=RequestKind.COMMAND))
+    s.push(_req("g1-b", Priority.HIGH, created=103.0, kind=RequestKind.COMMAND))
+    order = [s.pop(now=103.0)[0].payload for _ in range(3)]
+    # The status query has waited more than two aging steps, so it overtakes g1-b
+    assert order == ["g1-a", "status", "g1-b"]
+
+
+def test_coalesced_updates_keep_oldest_position():
+    s = RequestScheduler(aging_s=1.0)
+    s.push(_req("pos-1", Priority.LOW, created=100.0, key="pos"))
+    s.push(_req("temp", Priority.LOW, created=100.1, key="temp"))
+    s.push(_req("pos-2", Priority.LOW, created=100.2, key="pos"))
+    assert s.depths()[Priority.LOW] == 2
+    assert [s.pop(now=100.3)[0].payload for _ in range(2)] == ["pos-2", "temp"]
+    assert len(s) == 0
+
+
+def test_expired_queries_are_dropped_but_commands_are_not():
+    s = RequestScheduler()
+    s.push(_req("old-query", Priority.MEDIUM, created=100.0, timeout=1.0))
+    s.push(_req("old-command", Priority.MEDIUM, created=100.0, kind=RequestKind.COMMAND, timeout=1.0))
+    req, expired = s.pop(now=105.0)
+    assert req.payload == "old-command"
+    assert [r.payload for r in expired] == ["old-query"]
+    assert s.dropped_expired == 1
+
+
+def test_updates_are_skipped_while_paused():
+    s = RequestScheduler()
+    s.push(_req("status", Priority.LOW, created=100.0))
+    assert s.pop(include_updates=False, now=100.0)[0] is None
+    assert s.pop(now=100.0)[0].payload == "status"
+
+
+def test_coalescing_works_at_any_priority_and_queries_are_bounded():
+    s = RequestScheduler(max_depth=3)
+    for i in range(10):
+        s.push(_req(f"pos-{i}", Priority.MEDIUM, created=100.0 + i, key="fast:pos"))
+    assert s.depths()[Priority.MEDIUM] == 1
+    assert s.coalesced == 9
+
+    evicted = []
+    for i in range(5):
+        evicted += s.push(_req(f"q{i}", Priority.MEDIUM, created=200.0 + i))[0]
+    s.push(_req("G1 X1", Priority.MEDIUM, created=300.0, kind=RequestKind.COMMAND))
+    assert [r.payload for r in evicted] == ["pos-9", "q0", "q1"]
+    assert s.overflow[Priority.MEDIUM] == 3
+    assert [s.pop(now=0.0)[0].payload for _ in range(4)] == ["q2", "q3", "q4", "G1 X1"]
+
+
+def test_sequencer_completes_coalesced_waiters_with_latest_result():
+    import threading
+    from realtime_hairbrush.runtime.sequencer import RequestSequencer
+
+    gate = threading.Event()
+
+    class SlowTransport:
+        def query(self, cmd):
+            gate.wait(1.0)
+            return cmd
+
+    seq = RequestSequencer(transport=SlowTransport())
+    seq.start()
+    results = []
+    done = threading.Event()
+    try:
+        # The first query occupies the worker while the rest coalesce behind it
+        seq.submit(Request(kind=RequestKind.QUERY, priority=Priority.MEDIUM, payload="busy", timeout_s=5.0))
+        for i in range(20):
+            req = Request(kind=RequestKind.QUERY, priority=Priority.MEDIUM, payload=f"pos-{i}", timeout_s=5.0,
+                          on_complete=lambda res: (results.append(res.data), len(results) == 20 and done.set()))
+            seq.submit(req.with_coalesce_key("fast:pos"))
+        assert seq.stats()["depth"]["medium"] <= 2
+        gate.set()
+        assert done.wait(2.0)
+        assert results == ["pos-19"] * 20
+        assert seq.stats()["coalesced"] == 19
+    finally:
+        seq.stop()
@@ -0,0 +1,65 @@
+from semantic_gcode.transport.framing import (
+    GENERIC_FRAMER,
+    GRBL_FRAMER,
+    KLIPPER_FRAMER,
+    MARLIN_FRAMER,
+    RRF_FRAMER,
+    SMOOTHIE_FRAMER,
+    get_framer,
+)
+
+
+def test_get_framer_matches_identification_strings():
+    assert get_framer("FIRMWARE_NAME: RepRapFirmware for Duet 3 Mini 5+") is RRF_FRAMER
+    assert get_framer("FIRMWARE_NAME:Marlin 2.1.2 (Jan 1 2024)") is MARLIN_FRAMER
+    assert get_framer("Grbl 1.1h ['$' for help]") is GRBL_FRAMER
+    assert get_framer("FIRMWARE_NAME:Klipper FIRMWARE_VERSION:v0.12.0") is KLIPPER_FRAMER
+    assert get_framer("FIRMWARE_NAME:Smoothieware") is SMOOTHIE_FRAMER
+    assert get_framer("grbl") is GRBL_FRAMER
+    assert get_framer(None) is GENERIC_FRAMER
+
+
+def test_terminators_per_firmware():
+    assert MARLIN_FRAMER.is_terminal("ok T:21.0 /0.0 B:20.5 /0.0")
+    assert not MARLIN_FRAMER.is_terminal("Error:checksum mismatch, Last Line: 3")
+    assert GRBL_FRAMER.is_terminal("error:20")
+    assert GRBL_FRAMER.is_terminal("ALARM:1")
+    assert GRBL_FRAMER.is_error("error:20")
+    assert not GRBL_FRAMER.is_terminal("[MSG:Reset to continue]")
+    assert SMOOTHIE_FRAMER.is_terminal("!!")
+    assert not RRF_FRAMER.is_terminal("Error: G1: insufficient axes homed")
+    assert RRF_FRAMER.is_error("Error: G1: insufficient axes homed")
+
+
+class _FramedTransport:
+    class config:
+        timeout = 5.0
+
+    def __init__(self, framer, reply):
+        self.framer = framer
+        self.reply = reply
+
+    def is_connected(self):
+        return True
+
+    def query(self, cmd):
+        return self.reply
+
+
+def test_sequencer_reports_errors_through_the_link_framer():
+    from realtime_hairbrush.runtime.sequencer import Request, RequestKind, Priority, RequestSequencer
+
+    def run(framer, reply):
+        seq = RequestSequencer(_FramedTransport(framer, reply))
+        seq.start()
+        try:
+            req = Request(kind=RequestKind.COMMAND, priority=Priority.HIGH, payload="G1 X5", timeout_s=1.0, expects_ack=True)
+            return seq.submit(req).result(timeout=2.0)
+        finally:
+            seq.stop()
+
+    res = run(GRBL_FRAMER, "error:20")
+    assert not res.ok and res.error == "error:20"
+    assert not run(MARLIN_FRAMER, "!! Printer halted").ok
+    assert not run(None, "Error: G1: insufficient axes homed\nok").ok
+    assert run(GRBL_FRAMER, "ok").ok
@@ -0,0 +1,54 @@
+import json
+import threading
+import urllib.parse
+import zlib
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from semantic_gcode.sd_card import SDCard
+from semantic_gcode.transport.http import HttpTransport
+
+
+class UploadHandler(BaseHTTPRequestHandler):
+    uploads = []
+
+    def do_POST(self):
+        url = urllib.parse.urlparse(self.path)
+        params = dict(urllib.parse.parse_qsl(url.query))
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        ok = params.get("crc32") == f"{zlib.crc32(body):08x}"
+        UploadHandler.uploads.append((url.path, params["name"], body))
+        payload = json.dumps({"err": 0 if ok else 1}).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_sd_card_uploads_with_rr_upload_over_http(tmp_path):
+    server = HTTPServer(("127.0.0.1", 0), UploadHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    UploadHandler.uploads = []
+    try:
+        t = HttpTransport(f"http://127.0.0.1:{server.server_port}")
+        t._connected = True
+        sd = SDCard(t)
+
+        job = tmp_path / "job.gcode"
+        job.write_bytes(b"".join(f"G1 X{i} Y{i}\n".encode() for i in range(5000)))
+        progress = []
+        assert sd.stream_print_file("job.gcode", str(job), progress_callback=lambda sent, total: progress.append((sent, total)))
+        assert sd.upload_print_file("0:/macros/wipe.g", "G1 X0\nG1 X10\n")
+
+        (path, name, body), (_, macro_name, macro_body) = UploadHandler.uploads
+        assert path == "/rr_upload"
+        assert name == "0:/gcodes/job.gcode"
+        assert body == job.read_bytes()
+        assert len(progress) > 1 and progress[-1] == (len(body), len(body))
+        assert macro_name == "0:/macros/wipe.g"
+        assert macro_body == b"G1 X0\nG1 X10\n"
+    finally:
+        server.shutdown()
@@ -72,4 +72,41 @@ def test_status_poller_populates_observed():
             poller.stop()
         except Exception:
             pass
-        seq.stop() 
\ No newline at end of file
+        seq.stop() 
+
+def test_serial_polls_queued_behind_a_busy_worker_are_all_sent():
+    from realtime_hairbrush.runtime.sequencer import Request, RequestKind, Priority
+
+    gate = threading.Event()
+    sent = []
+
+    class SerialOnly:
+        def is_connected(self):
+            return True
+
+        def query(self, cmd):
+            if cmd == "G28":
+                gate.wait(2.0)
+            sent.append(cmd)
+            return '{"result": null}'
+
+    seq = RequestSequencer(transport=SerialOnly())
+    seq.start()
+    poller = StatusPoller(seq, MachineState(), interval_fast=10.0, interval_medium=10.0, interval_slow=10.0, interval_full=10.0)
+    try:
+        # Hold the worker so every tier's polls queue up behind it
+        seq.submit(Request(kind=RequestKind.COMMAND, priority=Priority.HIGH, payload="G28", timeout_s=5.0))
+        time.sleep(0.05)
+        poller.start()
+        time.sleep(0.1)
+        gate.set()
+        deadline = time.time() + 2.0
+        while time.time() < deadline and not any("mcuTemp" in c for c in sent):
+            time.sleep(0.02)
+        time.sleep(0.1)
+        for key in ("move.axes[].userPosition", "state.status", "state.currentTool", "sensors.endstops[].triggered",
+                    "move.axes[].homed", "boards[].vIn.current", "boards[].mcuTemp.current", "move.queue[].gcodeLength"):
+            assert any(f'K"{key}"' in c for c in sent), key
+    finally:
+        poller.stop()
+        seq.stop()
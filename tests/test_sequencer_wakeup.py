@@ -0,0 +1,67 @@
+import threading
+import time
+
+from semantic_gcode.gcode.base import GCodeInstruction
+from realtime_hairbrush.runtime import Dispatcher, MachineState
+from realtime_hairbrush.runtime.sequencer import Request, RequestKind, Priority, RequestSequencer
+
+
+class InstantTransport:
+    class config:
+        timeout = 5.0
+
+    def __init__(self):
+        self.sent = []
+
+    def is_connected(self):
+        return True
+
+    def send_line(self, line):
+        self.sent.append(line)
+        return True
+
+    def query(self, cmd):
+        return "ok"
+
+
+def test_sequencer_drains_bursts_without_per_request_sleep():
+    seq = RequestSequencer(transport=InstantTransport())
+    seq.start()
+    done = threading.Event()
+    count = 500
+    finished = []
+
+    def on_complete(res):
+        finished.append(res)
+        if len(finished) == count:
+            done.set()
+
+    try:
+        started = time.time()
+        for i in range(count):
+            seq.submit(Request(kind=RequestKind.QUERY, priority=Priority.MEDIUM, payload=f"M409 K\"k{i}\"",
+                               timeout_s=1.0, on_complete=on_complete))
+        assert done.wait(2.0)
+        # A fixed 10 ms sleep per request would need at least 5 s for this burst
+        assert time.time() - started < 2.0
+    finally:
+        seq.stop()
+
+
+def test_dispatcher_reacts_to_new_work_and_stops_promptly():
+    transport = InstantTransport()
+    dispatcher = Dispatcher(transport, MachineState())
+    dispatcher.start()
+    try:
+        time.sleep(0.05)
+        started = time.time()
+        dispatcher.enqueue(GCodeInstruction(code_type="M", code_number=117, parameters={}))
+        deadline = time.time() + 1.0
+        while not transport.sent and time.time() < deadline:
+            time.sleep(0.001)
+        assert transport.sent
+        assert time.time() - started < 0.1
+    finally:
+        started = time.time()
+        dispatcher.stop()
+        assert time.time() - started < 0.5
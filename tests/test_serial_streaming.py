@@ -0,0 +1,200 @@
+import threading
+from collections import deque
+
+import pytest
+
+from semantic_gcode.transport.serial import SerialTransport, LINE_JSON, LINE_MESSAGE
+from semantic_gcode.utils.exceptions import TimeoutError
+
+
+class FakeSerial:
+    """Echoes one 'ok' per written line and records the peak number in flight."""
+
+    def __init__(self, extra_output=None):
+        self.written = []
+        self._replies = deque()
+        self._extra = dict(extra_output or {})
+        self.acked = 0
+        self.peak_in_flight = 0
+        self.timeout = 5.0
+        self._ready = threading.Condition()
+
+    def write(self, data: bytes) -> int:
+        line = data.decode().strip()
+        with self._ready:
+            self.written.append(line)
+            for extra in self._extra.get(line, []):
+                self._replies.append(extra.encode() + b"\n")
+            self._replies.append(b"ok\n")
+            self.peak_in_flight = max(self.peak_in_flight, len(self.written) - self.acked)
+            self._ready.notify_all()
+        return len(data)
+
+    def emit(self, text: str) -> None:
+        with self._ready:
+            self._replies.append(text.encode() + b"\n")
+            self._ready.notify_all()
+
+    def flush(self) -> None:
+        pass
+
+    def readline(self) -> bytes:
+        with self._ready:
+            if not self._replies:
+                self._ready.wait(timeout=0.05)
+            if not self._replies:
+                return b""
+            data = self._replies.popleft()
+            if data == b"ok\n":
+                self.acked += 1
+            return data
+
+    def close(self) -> None:
+        pass
+
+
+def _transport(fake, **kwargs):
+    t = SerialTransport(port="/dev/null", auto_detect_board=False, **kwargs)
+    t._serial = fake
+    t._connected = True
+    return t
+
+
+def test_unsolicited_output_is_not_lost():
+    fake = FakeSerial(extra_output={"M115": ["FIRMWARE_NAME: RepRapFirmware"]})
+    t = _transport(fake)
+    try:
+        assert t.send_line("M115") == "FIRMWARE_NAME: RepRapFirmware\nok"
+        fake.emit("Warning: motor phase A may be disconnected")
+        assert t.read_message(timeout=1.0) == (LINE_MESSAGE, "Warning: motor phase A may be disconnected")
+        assert t.query("M400") == "ok"
+    finally:
+        t.disconnect()
+
+
+def test_stream_lines_respects_window_and_orders_responses():
+    fake = FakeSerial(extra_output={"M114": ["X:1.0 Y:2.0 Z:3.0"]})
+    t = _transport(fake, stream_window=3, stream_buffer_bytes=0)
+    lines = [f"G1 X{i}" for i in range(10)] + ["M114"]
+    seen = []
+    try:
+        responses = t.stream_lines(lines, on_response=lambda i, ln, r: seen.append((i, ln)))
+    finally:
+        t.disconnect()
+    assert fake.written == lines
+    assert fake.peak_in_flight <= 3
+    assert len(responses) == len(lines)
+    assert responses[-1] == "X:1.0 Y:2.0 Z:3.0\nok"
+    assert [i for i, _ in seen] == list(range(len(lines)))
+
+
+def test_stream_lines_respects_byte_budget():
+    fake = FakeSerial()
+    t = _transport(fake, stream_window=16, stream_buffer_bytes=20)
+    try:
+        t.stream_lines(["G1 X100 Y100", "G1 X200 Y200", "G1 X300 Y300"])
+    finally:
+        t.disconnect()
+    # Each line is 13 bytes with the newline, so only one fits in a 20 byte buffer
+    assert fake.peak_in_flight == 1
+
+
+class CorruptingSerial(FakeSerial):
+    """Requests a resend of line 1 the first time it is received."""
+
+    def __init__(self):
+        super().__init__()
+        self.corrupted = False
+
+    def write(self, data: bytes) -> int:
+        if data.startswith(b"N1 ") and not self.corrupted:
+            self.corrupted = True
+            with self._ready:
+                self.written.append(data.decode().strip())
+                self._replies.append(b"Error: checksum mismatch\n")
+                self._replies.append(b"Resend: 1\n")
+                self._replies.append(b"ok\n")
+                self._ready.notify_all()
+            return len(data)
+        return super().write(data)
+
+
+def test_send_numbered_adds_checksum_and_honours_resend():
+    fake = CorruptingSerial()
+    t = _transport(fake)
+    try:
+        assert t.send_numbered("G1 X5 ; comment") == "ok"
+        assert t.send_numbered("G1 X6") == "ok"
+    finally:
+        t.disconnect()
+    first = "N1 G1 X5"
+    assert fake.written == [
+        "M110 N0",
+        f"{first}*{SerialTransport.checksum(first)}",
+        f"{first}*{SerialTransport.checksum(first)}",
+        f"N2 G1 X6*{SerialTransport.checksum('N2 G1 X6')}",
+    ]
+
+
+def test_late_reply_to_a_timed_out_command_does_not_shift_replies():
+    fake = FakeSerial(extra_output={"M114": ["X:1 Y:2 Z:0"]})
+    held = []
+    original_write = fake.write
+
+    def write(data):
+        # M400 is acknowledged only after its caller has given up
+        if data.decode().strip() == "M400":
+            with fake._ready:
+                fake.written.append("M400")
+            held.append(True)
+            return len(data)
+        return original_write(data)
+
+    fake.write = write
+    t = _transport(fake)
+    try:
+        with pytest.raises(TimeoutError):
+            t._exchange("M400", timeout=0.1)
+        fake.emit("ok")
+        assert t.query("M114") == "X:1 Y:2 Z:0\nok"
+        assert t.query("M115") == "ok"
+    finally:
+        t.disconnect()
+
+
+def test_truncated_reply_raises_timeout_with_the_partial_lines():
+    fake = FakeSerial()
+    original_write = fake.write
+
+    def write(data):
+        # The first line of the reply arrives, its terminator never does
+        if data.decode().strip() == "M122":
+            with fake._ready:
+                fake.written.append("M122")
+            fake.emit("=== Diagnostics ===")
+            return len(data)
+        return original_write(data)
+
+    fake.write = write
+    t = _transport(fake)
+    try:
+        with pytest.raises(TimeoutError) as err:
+            t._exchange("M122", timeout=0.2)
+        assert err.value.details["partial"] == ["=== Diagnostics ==="]
+    finally:
+        t.disconnect()
+
+
+def test_unsolicited_lines_during_a_command_go_to_messages():
+    fake = FakeSerial(extra_output={"M114": ["echo:busy: processing", '{"status":"B"}', "X:1 Y:2 Z:0"],
+                                    'M409 K"state.status"': ['{"key":"state.status","result":"idle"}']})
+    t = _transport(fake, firmware="marlin")
+    try:
+        assert t.query("M114") == "X:1 Y:2 Z:0\nok"
+        assert t.read_message(timeout=1.0) == (LINE_MESSAGE, "echo:busy: processing")
+        assert t.read_message(timeout=1.0) == (LINE_JSON, '{"status":"B"}')
+        # JSON asked for by the command stays in its reply
+        assert t.query('M409 K"state.status"') == '{"key":"state.status","result":"idle"}\nok'
+        assert t.read_message() is None
+    finally:
+        t.disconnect()
@@ -0,0 +1,51 @@
+import threading
+import time
+
+from realtime_hairbrush.runtime.sequencer import Request, RequestKind, Priority, RequestSequencer, HttpQuerySpec
+
+
+class CountingModelTransport:
+    def __init__(self):
+        self.calls = 0
+        self.gate = threading.Event()
+
+    def get_model(self, key=None, flags=None):
+        self.calls += 1
+        self.gate.wait(1.0)
+        return {"key": key, "result": [1.0, 2.0, 3.0]}
+
+
+def _position_query(on_complete, priority=Priority.MEDIUM):
+    spec = HttpQuerySpec(endpoint="rr_model", params={"key": "move.axes[].machinePosition", "flags": "f"})
+    return Request(kind=RequestKind.QUERY, priority=priority, payload=spec, timeout_s=2.0, on_complete=on_complete)
+
+
+def test_identical_queries_share_one_request_and_a_fresh_result():
+    fake = CountingModelTransport()
+    seq = RequestSequencer(transport=fake, cache_ttl_s=0.5)
+    seq.start()
+    results = []
+    try:
+        for _ in range(5):
+            seq.submit(_position_query(results.append))
+        fake.gate.set()
+        deadline = time.time() + 2.0
+        while len(results) < 5 and time.time() < deadline:
+            time.sleep(0.01)
+        assert fake.calls == 1
+        assert [r.data["result"] for r in results] == [[1.0, 2.0, 3.0]] * 5
+
+        # Within the TTL a repeat read is answered from the cache
+        seq.submit(_position_query(results.append))
+        assert len(results) == 6 and fake.calls == 1
+
+        time.sleep(0.6)
+        seq.submit(_position_query(results.append))
+        deadline = time.time() + 2.0
+        while len(results) < 7 and time.time() < deadline:
+            time.sleep(0.01)
+        assert fake.calls == 2
+        stats = seq.stats()
+        assert stats["shared"] == 4 and stats["cache_hits"] == 1
+    finally:
+        seq.stop()
@@ -0,0 +1,78 @@
+import time
+
+from realtime_hairbrush.runtime.sequencer import HttpQuerySpec, Priority, Request, RequestKind, RequestSequencer
+
+
+class SlowSerialLink:
+    """Command link whose every command takes a while to be acknowledged."""
+
+    def __init__(self, query_transport=None):
+        self.query_transport = query_transport
+        self.commands = []
+
+    def is_connected(self):
+        return True
+
+    def send_line(self, line):
+        return True
+
+    def query(self, cmd):
+        time.sleep(0.2)
+        self.commands.append(cmd)
+        return "ok"
+
+
+class HttpLink:
+    def __init__(self):
+        self.reads = []
+
+    def is_connected(self):
+        return True
+
+    def get_model(self, key=None, flags=None):
+        self.reads.append(key)
+        return {"key": key, "result": [1.0, 2.0, 3.0]}
+
+
+def _command(line):
+    return Request(kind=RequestKind.COMMAND, priority=Priority.HIGH, payload=line, timeout_s=5.0, expects_ack=True)
+
+
+def _position_query():
+    spec = HttpQuerySpec(endpoint="rr_model", params={"key": "move.axes[].userPosition", "flags": "f"})
+    return Request(kind=RequestKind.QUERY, priority=Priority.LOW, payload=spec, timeout_s=5.0)
+
+
+def test_queries_use_the_http_link_while_commands_run_on_serial():
+    http = HttpLink()
+    serial = SlowSerialLink(query_transport=http)
+    seq = RequestSequencer(transport=serial, cache_ttl_s=0.0)
+    seq.start()
+    try:
+        commands = [seq.submit(_command(f"G1 X{i}")) for i in range(3)]
+        time.sleep(0.05)
+        # A serial command is in progress; reads are answered without waiting for it
+        start = time.time()
+        reads = [seq.submit(_position_query()).result(timeout=1.0) for _ in range(5)]
+        assert all(r.ok for r in reads)
+        assert time.time() - start < 0.15
+        assert len(serial.commands) < 3
+
+        assert all(r.ok for r in seq.wait_all(commands, timeout=2.0))
+        assert http.reads and "M409" not in " ".join(serial.commands)
+        assert "query_lane" in seq.stats()
+    finally:
+        seq.stop()
+
+
+def test_single_link_keeps_queries_on_the_command_worker():
+    serial = SlowSerialLink()
+    seq = RequestSequencer(transport=serial)
+    seq.start()
+    try:
+        assert seq.query_lane is None
+        res = seq.submit(_position_query()).result(timeout=2.0)
+        assert res.ok
+        assert any("M409" in c for c in serial.commands)
+    finally:
+        seq.stop()
@@ -0,0 +1,78 @@
+from realtime_hairbrush.runtime import MachineState
+
+
+def test_subscription_fires_only_on_changes_under_its_path():
+    state = MachineState()
+    calls = []
+    state.subscribe("coords", calls.append)
+
+    state.apply_patch({"coords": {"user_position": [0, 0, 0]}, "firmware": {"status": "I"}})
+    state.apply_patch({"firmware": {"status": "B"}})
+    state.apply_patch({"coords": {"user_position": [0, 0, 0]}})
+    state.apply_patch([1, 2, 3], path="coords.user_position")
+
+    assert calls == [
+        {"coords.user_position": (None, [0, 0, 0])},
+        {"coords.user_position": ([0, 0, 0], [1, 2, 3])},
+    ]
+
+
+def test_globs_and_multiple_paths():
+    state = MachineState()
+    calls = []
+    state.subscribe(("raw_status.raw.*", "homed"), calls.append)
+    state.apply_patch({"raw_status": {"raw": {"currentTool": 1}}, "homed": {"axes": [True]}, "diagnostics": {"vin": 24}})
+    assert calls == [{"raw_status.raw.currentTool": (None, 1), "homed.axes": (None, [True])}]
+
+
+def test_scheduled_cycle_coalesces_updates_and_drops_reverted_values():
+    state = MachineState()
+    scheduled = []
+    calls = []
+    state.set_scheduler(scheduled.append)
+    state.subscribe("firmware", calls.append)
+
+    state.apply_patch({"firmware": {"status": "I", "fw": "3.5"}})
+    state.apply_patch({"firmware": {"status": "B"}})
+    state.apply_patch({"firmware": {"status": "P"}})
+    assert calls == [] and len(scheduled) == 1
+    scheduled.pop()()
+    assert calls == [{"firmware.status": (None, "P"), "firmware.fw": (None, "3.5")}]
+
+    state.apply_patch({"firmware": {"status": "B"}})
+    state.apply_patch({"firmware": {"status": "P"}})
+    scheduled.pop()()
+    assert len(calls) == 1
+
+
+def test_batch_and_unsubscribe():
+    state = MachineState()
+    calls = []
+    unsubscribe = state.subscribe("coords", calls.append)
+    with state.batch():
+        state.apply_patch({"coords": {"x": 1}})
+        state.apply_patch({"coords": {"x": 2}})
+        assert calls == []
+    assert calls == [{"coords.x": (None, 2)}]
+
+    unsubscribe()
+    state.apply_patch({"coords": {"x": 3}})
+    assert len(calls) == 1
+    # A failing subscriber does not break updates
+    state.subscribe("coords", lambda changes: 1 / 0)
+    assert state.apply_patch({"coords": {"x": 4}}) == state.version
+
+
+def test_tool_manager_close_drops_its_subscription():
+    from realtime_hairbrush.execution.tool_manager import ToolManager
+
+    state = MachineState()
+    managers = [ToolManager(None, state) for _ in range(3)]
+    state.apply_patch({"raw_status": {"raw": {"coords": {"machine": [1.0, 2.0, 0.0]}}}})
+    assert all(m._observed_xy == (1.0, 2.0) for m in managers)
+
+    for m in managers:
+        m.close()
+    state.apply_patch({"raw_status": {"raw": {"coords": {"machine": [5.0, 6.0, 0.0]}}}})
+    assert all(m._observed_xy == (1.0, 2.0) for m in managers)
+    assert not state._subs
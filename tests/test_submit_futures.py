@@ -0,0 +1,59 @@
+import asyncio
+import threading
+
+from semantic_gcode.gcode.base import GCodeInstruction
+from realtime_hairbrush.runtime import Dispatcher, MachineState
+from realtime_hairbrush.runtime.sequencer import Request, RequestKind, Priority, RequestSequencer
+
+
+class EchoTransport:
+    class config:
+        timeout = 5.0
+
+    def __init__(self, gate=None):
+        self.gate = gate
+
+    def is_connected(self):
+        return True
+
+    def send_line(self, line):
+        return True
+
+    def query(self, cmd):
+        if self.gate is not None:
+            self.gate.wait(2.0)
+        return f"{cmd} ok"
+
+
+def test_dispatcher_submit_resolves_each_instruction_in_a_batch():
+    dispatcher = Dispatcher(EchoTransport(), MachineState())
+    dispatcher.start()
+    try:
+        move = GCodeInstruction(code_type="G", code_number=1, parameters={"X": 1})
+        # The same instruction object may be queued more than once
+        futures = [dispatcher.submit(move) for _ in range(3)]
+        futures.append(dispatcher.submit(GCodeInstruction(code_type="M", code_number=117, parameters={})))
+        results = dispatcher.wait_all(futures, timeout=2.0)
+        assert all(r.ok for r in results)
+    finally:
+        dispatcher.stop()
+
+
+def test_sequencer_futures_are_awaitable_and_batches_time_out():
+    gate = threading.Event()
+    seq = RequestSequencer(transport=EchoTransport(gate))
+    seq.start()
+    try:
+        slow = seq.submit(Request(kind=RequestKind.QUERY, priority=Priority.MEDIUM, payload="M114", timeout_s=5.0))
+        (pending,) = seq.wait_all([slow], timeout=0.05)
+        assert not pending.ok and "timed out" in pending.error
+        gate.set()
+
+        async def ask():
+            return await seq.submit_async(Request(kind=RequestKind.QUERY, priority=Priority.MEDIUM, payload="M115", timeout_s=5.0))
+
+        res = asyncio.run(ask())
+        assert res.ok and res.data == "M115 ok"
+        assert slow.result(timeout=1.0).data == "M114 ok"
+    finally:
+        seq.stop()
@@ -0,0 +1,71 @@
+import struct
+
+import pytest
+
+from realtime_hairbrush.runtime import TelemetryBuffer, TelemetrySeries, MachineState
+from realtime_hairbrush.runtime.readers import StatusPoller
+
+
+def test_series_windowed_queries_and_wraparound():
+    series = TelemetrySeries(capacity=4)
+    assert series.latest() is None and series.mean() is None and series.rate() is None
+    for i in range(6):
+        series.append(10.0 * i, t=float(i))
+    # Only the last 4 samples (t=2..5) are kept
+    assert len(series) == 4
+    assert series.latest() == (5.0, 50.0)
+    assert [t for t, _ in series.window()] == [2.0, 3.0, 4.0, 5.0]
+    assert series.mean() == pytest.approx(35.0)
+    assert series.mean(seconds=1.0) == pytest.approx(45.0)
+    assert series.rate() == pytest.approx(10.0)
+    assert series.rate(seconds=0.0) is None
+
+
+def test_vector_series():
+    series = TelemetrySeries(capacity=8, width=3)
+    series.append([0, 0, 0], t=0.0)
+    series.append([2, 4], t=2.0)
+    assert series.latest() == (2.0, (2.0, 4.0, 0.0))
+    assert series.mean() == pytest.approx((1.0, 2.0, 0.0))
+    assert series.rate() == pytest.approx((1.0, 2.0, 0.0))
+
+
+def test_buffer_records_patches_applied_to_state_and_saves_npy(tmp_path):
+    telemetry = TelemetryBuffer(capacity=16)
+    state = MachineState()
+    telemetry.attach(state)
+    poller = StatusPoller(sequencer=None, state=state)
+    poller._apply_patch(poller._patch_for("move.axes[].machinePosition", [1.0, 2.0, 3.0]))
+    poller._apply_patch(poller._patch_for("boards[].vIn.current", [24.1]))
+    poller._apply_patch(poller._patch_for("boards[].vIn.current", [23.9]))
+    assert telemetry.series("machine_position").latest()[1] == (1.0, 2.0, 3.0)
+    assert telemetry.series("vin").mean() == pytest.approx(24.0)
+    assert telemetry.series("mcu_temp_c") is None
+    assert telemetry.ingest({"diagnostics": {"vin": "n/a"}}) == 0
+
+    paths = telemetry.save(str(tmp_path))
+    assert sorted(p.rsplit("/", 1)[-1] for p in paths) == ["machine_position.npy", "vin.npy"]
+    with open(tmp_path / "vin.npy", "rb") as f:
+        data = f.read()
+    assert data[:8] == b"\x93NUMPY\x01\x00"
+    header_len = struct.unpack("<H", data[8:10])[0]
+    assert (10 + header_len) % 64 == 0
+    assert "'shape': (2, 2)" in data[10:10 + header_len].decode("latin1")
+    values = struct.unpack("<4d", data[10 + header_len:])
+    assert values[1::2] == (24.1, 23.9)
+
+
+def test_every_producer_is_recorded_once_until_detached():
+    telemetry = TelemetryBuffer(capacity=16)
+    state = MachineState()
+    detach = telemetry.attach(state)
+    # Poller patches and agent patches merged by the UI both go through apply_patch
+    state.apply_patch({"diagnostics": {"vin": 24.0}})
+    state.apply_patch({"coords": {"machine_position": [1.0, 2.0, 3.0]}})
+    state.apply_patch(23.0, path="diagnostics.vin")
+    assert len(telemetry.series("vin")) == 2
+    assert len(telemetry.series("machine_position")) == 1
+
+    detach()
+    state.apply_patch({"diagnostics": {"vin": 22.0}})
+    assert len(telemetry.series("vin")) == 2